@@ -9,13 +9,15 @@ def format_signal_message(signal_data: dict) -> str:
     tps = signal_data['tps']
     atr = signal_data['atr']
     rsi = signal_data.get('rsi', 0)
+    timeframe = signal_data.get('timeframe')
+    title = f"{symbol} {timeframe}" if timeframe else symbol
     
     # Formatting numbers
     def fmt(val):
         return f"{val:.4f}" if val < 10 else f"{val:.2f}"
 
     msg = (
-        f"📊 **Trading Signal: {symbol}**\n"
+        f"📊 **Trading Signal: {title}**\n"
         f"━━━━━━━━━━━━━━━━━━━━\n"
         f"**Direction:** {direction}\n"
         f"**Entry:** `{fmt(entry)}`\n"
@@ -30,3 +32,81 @@ def format_signal_message(signal_data: dict) -> str:
         f"⚠️ _Trade at your own risk._"
     )
     return msg
+
+def _split_digest(title: str, blocks, limit: int, separator: str = "\n\n"):
+    """
+    Packs blocks into as few messages of at most `limit` characters as
+    possible, each starting with the title (and a part number when split).
+    """
+    # Leave room for the header on every part
+    budget = limit - len(title) - 16
+    parts = [[]]
+    size = 0
+    for block in blocks:
+        if parts[-1] and size + len(block) + len(separator) > budget:
+            parts.append([])
+            size = 0
+        parts[-1].append(block)
+        size += len(block) + len(separator)
+
+    messages = []
+    for i, part in enumerate(parts, 1):
+        header = title
+        if len(parts) > 1:
+            header += f" ({i}/{len(parts)})"
+        messages.append(header + "\n\n" + separator.join(part))
+    return messages
+
+def format_signal_digest(signals, limit: int = 4000):
+    """
+    Merges the signals of one scan pass into as few messages as possible,
+    each at most `limit` characters. A single signal is sent as is.
+    """
+    blocks = [format_signal_message(signal) for signal in signals]
+    if len(blocks) <= 1:
+        return blocks
+    return _split_digest(f"🔔 **Scan digest: {len(blocks)} signals**", blocks, limit)
+
+def format_outcome_digest(events, limit: int = 4000):
+    """
+    TP/SL/expiry updates from one SignalMonitor tick, one line per signal.
+    """
+    def fmt(val):
+        return f"{val:.4f}" if val < 10 else f"{val:.2f}"
+
+    lines = []
+    for e in events:
+        name = f"`{e['symbol']}` {e['direction']}"
+        after = f" after TP{e['hit_tp']}" if e['hit_tp'] else ""
+        if e['event'] == 'SL':
+            lines.append(f"🛑 {name} stopped out at `{fmt(e['price'])}`{after}")
+        elif e['event'] == 'EXPIRED':
+            lines.append(f"⌛ {name} expired{after}")
+        else:
+            lines.append(f"🎯 {name} hit **{e['event']}** at `{fmt(e['price'])}` (entry `{fmt(e['entry'])}`)")
+    if not lines:
+        return []
+    return _split_digest("📡 **Signal updates**", lines, limit, separator="\n")
+
+def format_stats_message(stats: dict) -> str:
+    def ms(seconds):
+        return f"{seconds * 1000:.1f}ms"
+
+    lines = [
+        "📈 **Scanner Stats**",
+        "━━━━━━━━━━━━━━━━━━━━",
+        f"**Passes:** `{stats['passes']}` | **Avg pass:** `{stats['avg_pass']:.1f}s`",
+        f"**Symbols scanned:** `{int(stats['symbols_scanned'])}`",
+        f"**Signals:** `{int(stats['signals'])}`",
+        f"**API errors:** `{int(stats['api_errors'])}` | **Retries:** `{int(stats['retries'])}`",
+        f"**Loop lag:** `{ms(stats['loop_lag_p50'])}` p50 | `{ms(stats['loop_lag_p95'])}` p95",
+        f"**Indicator cache:** `{int(stats['indicator_hits'])}` hits / `{int(stats['indicator_lookups'])}` lookups",
+        f"**Notifications:** `{int(stats['notifications_sent'])}` sent | `{int(stats['notifications_failed'])}` failed",
+    ]
+    if stats['stages']:
+        lines.append("")
+        lines.append("**Stage latency** (avg / p50 / p95):")
+        for stage, s in stats['stages'].items():
+            lines.append(f"`{stage}`: {ms(s['avg'])} / {ms(s['p50'])} / {ms(s['p95'])} ({s['count']})")
+    lines.append("━━━━━━━━━━━━━━━━━━━━")
+    return "\n".join(lines)
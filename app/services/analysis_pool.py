@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from config import Config
+from app.services.metrics import LOOP_LAG_SECONDS
+
+class AnalysisPool:
+    """
+    Runs CPU-bound analysis off the event loop.
+
+    mode is 'thread' (default: shares memory, so stateful caches keep
+    working), 'process' (true parallelism, arguments and results are
+    pickled, no shared state) or 'inline' (runs on the loop, for debugging).
+    At most `max_pending` calls are queued or running at once; further
+    callers wait for a slot instead of piling work into the executor.
+    """
+
+    MODES = ('thread', 'process', 'inline')
+
+    def __init__(self, mode: str = None, workers: int = None, max_pending: int = None):
+        if mode is None:
+            mode = Config.ANALYSIS_EXECUTOR
+        if workers is None:
+            workers = Config.ANALYSIS_WORKERS
+        if max_pending is None:
+            max_pending = Config.ANALYSIS_MAX_PENDING
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown analysis executor: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.executor = None
+        # Created on first use, inside the running loop
+        self._slots = None
+
+    @property
+    def shares_memory(self) -> bool:
+        return self.mode != 'process'
+
+    async def run(self, func, *args):
+        if self.mode == 'inline':
+            return func(*args)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        if self.executor is None:
+            cls = ThreadPoolExecutor if self.mode == 'thread' else ProcessPoolExecutor
+            self.executor = cls(max_workers=self.workers)
+
+        async with self._slots:
+            self.pending += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+            finally:
+                self.pending -= 1
+
+    def shutdown(self, wait: bool = True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+            self.executor = None
+
+class LoopLagMonitor:
+    """
+    Measures event-loop responsiveness: a probe sleeps `interval` and
+    records how much later than that it actually woke up. Anything that
+    holds the loop (CPU work, blocking calls) shows up as lag.
+    """
+
+    def __init__(self, interval: float = None, warn: float = None):
+        if interval is None:
+            interval = Config.LOOP_LAG_INTERVAL
+        if warn is None:
+            warn = Config.LOOP_LAG_WARN
+        self.interval = interval
+        self.warn = warn
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._probe())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _probe(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            if lag > self.warn:
+                logging.warning(f"Event loop stalled for {lag * 1000:.0f}ms")
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+from config import Config
+from app.services.signal_analysis import SignalAnalysisService
+
+class BacktestEngine:
+    """
+    Single-pass backtester.
+
+    Indicators are computed once over the whole history (ATR and RSI are
+    causal, so the value at bar i is the same as on the prefix df[:i+1]),
+    entries are taken from boolean masks and every trade is resolved by
+    searching forward for the first SL/TP hit with array operations.
+    """
+
+    # We need a window for ATR/RSI, so start after period
+    START_INDEX = 50
+    RISK_PER_TRADE = 10  # Assume $10 risk (1%)
+
+    # Search window for the SL/TP lookup. It doubles for trades that are
+    # still open, and rows are chunked so a block stays under MAX_CELLS.
+    INITIAL_WINDOW = 32
+    MAX_WINDOW = 1 << 16
+    MAX_CELLS = 1 << 22
+
+    @staticmethod
+    def find_entries(close, atr, rsi, start: int = None, oversold: float = None, overbought: float = None):
+        """
+        Returns (indices, is_long) of every bar where generate_signal would fire.
+        """
+        if start is None:
+            start = BacktestEngine.START_INDEX
+        if oversold is None:
+            oversold = Config.RSI_OVERSOLD
+        if overbought is None:
+            overbought = Config.RSI_OVERBOUGHT
+
+        n = len(close)
+        valid = ~(np.isnan(atr) | np.isnan(rsi))
+        valid[:start] = False
+        # The last bar has no future candles to resolve a trade on
+        valid[max(n - 1, 0):] = False
+
+        long_mask = valid & (rsi < oversold)
+        short_mask = valid & (rsi > overbought)
+
+        idx = np.flatnonzero(long_mask | short_mask)
+        return idx, long_mask[idx]
+
+    @staticmethod
+    def trade_levels(entry, atr, is_long, atr_multiplier: float = None, ratio: float = None):
+        """
+        Same SL/TP arithmetic as SignalAnalysisService.generate_signal, on arrays.
+        """
+        if atr_multiplier is None:
+            atr_multiplier = Config.ATR_MULTIPLIER_SL
+        if ratio is None:
+            ratio = Config.RISK_REWARD_RATIOS[0]
+
+        sl_dist = atr * atr_multiplier
+        sl = np.where(is_long, entry - sl_dist, entry + sl_dist)
+        tp = entry + atr * np.where(is_long, ratio, -ratio)
+        return sl, tp
+
+    @staticmethod
+    def first_exit(high, low, start, is_long, sl, tp):
+        """
+        For each trade, finds the first bar >= start where the SL or TP is hit.
+
+        Returns (exit_idx, is_loss). exit_idx is len(high) for trades that never
+        close. The SL is checked first on a bar that touches both levels, like
+        the original row-by-row loop.
+        """
+        n = len(high)
+        m = len(start)
+        exit_idx = np.full(m, n, dtype=np.int64)
+        is_loss = np.zeros(m, dtype=bool)
+
+        pos = np.asarray(start, dtype=np.int64).copy()
+        active = np.flatnonzero(pos < n)
+        window = BacktestEngine.INITIAL_WINDOW
+
+        while active.size:
+            offsets = np.arange(window)
+            rows = max(1, BacktestEngine.MAX_CELLS // window)
+            still_open = []
+
+            for lo in range(0, active.size, rows):
+                act = active[lo:lo + rows]
+                idx = pos[act][:, None] + offsets
+                in_range = idx < n
+                np.minimum(idx, n - 1, out=idx)
+
+                highs = high[idx]
+                lows = low[idx]
+                long_ = is_long[act][:, None]
+                sl_ = sl[act][:, None]
+                tp_ = tp[act][:, None]
+
+                sl_hit = np.where(long_, lows <= sl_, highs >= sl_) & in_range
+                tp_hit = np.where(long_, highs >= tp_, lows <= tp_) & in_range
+                hit = sl_hit | tp_hit
+
+                closed = hit.any(axis=1)
+                first = hit.argmax(axis=1)
+
+                done = act[closed]
+                exit_idx[done] = pos[done] + first[closed]
+                is_loss[done] = sl_hit[np.flatnonzero(closed), first[closed]]
+
+                # Trades that ran off the end of the data never close
+                rest = act[~closed]
+                pos[rest] += window
+                still_open.append(rest[pos[rest] < n])
+
+            active = np.concatenate(still_open)
+            window = min(window * 2, BacktestEngine.MAX_WINDOW)
+
+        return exit_idx, is_loss
+
+    @staticmethod
+    def simulate(high, low, close, atr, rsi, atr_multiplier: float = None, ratio: float = None, start: int = None,
+                 oversold: float = None, overbought: float = None):
+        """
+        Array-level backtest. Returns a dict of per-trade arrays, in entry order.
+        """
+        if ratio is None:
+            ratio = Config.RISK_REWARD_RATIOS[0]
+
+        entry_idx, is_long = BacktestEngine.find_entries(close, atr, rsi, start, oversold, overbought)
+        entry = close[entry_idx]
+        sl, tp = BacktestEngine.trade_levels(entry, atr[entry_idx], is_long, atr_multiplier, ratio)
+        exit_idx, is_loss = BacktestEngine.first_exit(high, low, entry_idx + 1, is_long, sl, tp)
+
+        closed = exit_idx < len(high)
+        is_loss = is_loss[closed]
+        pnl = np.where(is_loss, -BacktestEngine.RISK_PER_TRADE, BacktestEngine.RISK_PER_TRADE * ratio).astype(float)
+
+        return {
+            "entry_idx": entry_idx[closed],
+            "exit_idx": exit_idx[closed],
+            "is_long": is_long[closed],
+            "entry": entry[closed],
+            "is_loss": is_loss,
+            "pnl": pnl,
+        }
+
+    @staticmethod
+    def run(symbol: str, df: pd.DataFrame, initial_balance: float = 1000):
+        """
+        Backtests the RSI/ATR strategy on df. Gives the same trades as calling
+        generate_signal on every prefix of df.
+        """
+        high = df['high'].to_numpy(dtype=float)
+        low = df['low'].to_numpy(dtype=float)
+        close = df['close'].to_numpy(dtype=float)
+        atr = SignalAnalysisService.calculate_atr(df).to_numpy(dtype=float)
+        rsi = SignalAnalysisService.calculate_rsi(df).to_numpy(dtype=float)
+
+        result = BacktestEngine.simulate(high, low, close, atr, rsi)
+        pnl = result["pnl"]
+
+        # Accumulate in trade order so the balance matches a running sum exactly
+        balance = np.cumsum(np.concatenate([[float(initial_balance)], pnl]))[-1]
+
+        dates = df['timestamp'].iloc[result["entry_idx"]].tolist()
+        directions = np.where(result["is_long"], "LONG", "SHORT").tolist()
+        outcomes = np.where(result["is_loss"], "LOSS", "WIN").tolist()
+        trades = [
+            {"date": ts, "type": d, "entry": e, "outcome": o, "pnl": p}
+            for ts, d, e, o, p in zip(dates, directions, result["entry"].tolist(), outcomes, pnl.tolist())
+        ]
+
+        wins = int((~result["is_loss"]).sum())
+        return {
+            "symbol": symbol,
+            "candles": len(df),
+            "initial_balance": initial_balance,
+            "final_balance": float(balance),
+            "trades": trades,
+            "wins": wins,
+            "losses": len(trades) - wins,
+        }
@@ -0,0 +1,167 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from config import Config
+
+class CandleStore:
+    """
+    Append-only on-disk candle store, one file per (exchange, symbol, timeframe).
+
+    Each file is a flat array of fixed-size records (see DTYPE), so reading it
+    back is a single np.memmap with no parsing. Only closed candles are
+    stored. New downloads start right after the last stored candle, and a
+    request reaching back before the first one downloads the missing head
+    and rewrites the file once.
+    """
+
+    DTYPE = np.dtype([
+        ('timestamp', '<i8'),
+        ('open', '<f8'),
+        ('high', '<f8'),
+        ('low', '<f8'),
+        ('close', '<f8'),
+        ('volume', '<f8'),
+    ])
+
+    def __init__(self, root: str = None):
+        if root is None:
+            root = Config.CANDLE_STORE_DIR
+        self.root = root
+
+    def path(self, exchange_id: str, symbol: str, timeframe: str) -> str:
+        # BTC/USDT:USDT -> BTC_USDT_USDT
+        safe_symbol = re.sub(r'[^A-Za-z0-9]+', '_', symbol).strip('_')
+        return os.path.join(self.root, exchange_id, safe_symbol, f"{timeframe}.bin")
+
+    def read(self, exchange_id: str, symbol: str, timeframe: str, since: int = None, until: int = None) -> np.ndarray:
+        """
+        Returns the stored candles as a read-only structured array (memory-mapped).
+        since/until are millisecond timestamps, until is exclusive.
+        """
+        path = self.path(exchange_id, symbol, timeframe)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        # Ignore a trailing partial record left by an interrupted write
+        count = size // self.DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=self.DTYPE)
+
+        candles = np.memmap(path, dtype=self.DTYPE, mode='r', shape=(count,))
+        ts = candles['timestamp']
+        lo = 0 if since is None else np.searchsorted(ts, since, side='left')
+        hi = count if until is None else np.searchsorted(ts, until, side='left')
+        return candles[lo:hi]
+
+    def last_timestamp(self, exchange_id: str, symbol: str, timeframe: str):
+        candles = self.read(exchange_id, symbol, timeframe)
+        if len(candles) == 0:
+            return None
+        return int(candles['timestamp'][-1])
+
+    def append(self, exchange_id: str, symbol: str, timeframe: str, rows) -> int:
+        """
+        Appends ccxt OHLCV rows, skipping anything not newer than the last
+        stored candle. Returns the number of candles written.
+        """
+        if not rows:
+            return 0
+
+        records = self._records(rows)
+        last = self.last_timestamp(exchange_id, symbol, timeframe)
+        if last is not None:
+            records = records[records['timestamp'] > last]
+        if len(records) == 0:
+            return 0
+
+        path = self.path(exchange_id, symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            # Drop a trailing partial record before appending
+            f.seek(0, os.SEEK_END)
+            f.truncate(f.tell() - f.tell() % self.DTYPE.itemsize)
+            f.write(records.tobytes())
+        return len(records)
+
+    def prepend(self, exchange_id: str, symbol: str, timeframe: str, rows) -> int:
+        """
+        Inserts ccxt OHLCV rows older than the first stored candle, by
+        writing a new file and swapping it in (open memmaps keep reading
+        the old one). Returns the number of candles written.
+        """
+        if not rows:
+            return 0
+
+        records = self._records(rows)
+        stored = self.read(exchange_id, symbol, timeframe)
+        if len(stored):
+            records = records[records['timestamp'] < stored['timestamp'][0]]
+        if len(records) == 0:
+            return 0
+
+        path = self.path(exchange_id, symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(records.tobytes())
+            f.write(stored.tobytes())
+        os.replace(tmp, path)
+        return len(records)
+
+    def _records(self, rows) -> np.ndarray:
+        return np.array([tuple(r[:6]) for r in rows], dtype=self.DTYPE)
+
+    async def sync(self, market_service, symbol: str, timeframe: str = None, since: int = None) -> int:
+        """
+        Downloads the candles missing from the local store: from `since` on
+        the first run, then the tail after the last stored candle, plus the
+        head before the first one when `since` reaches further back than
+        any earlier run. Returns the number of new candles.
+
+        Exchange errors are raised, not treated as the end of the history.
+        The tail pages stored until then are kept (the store stays gap-free)
+        and the next sync resumes after them.
+        """
+        if timeframe is None:
+            timeframe = Config.DEFAULT_TIMEFRAME
+
+        exchange_id = market_service.exchange_id
+        stored = self.read(exchange_id, symbol, timeframe)
+        tf_ms = market_service.exchange.parse_timeframe(timeframe) * 1000
+
+        written = 0
+        if len(stored):
+            first = int(stored['timestamp'][0])
+            if since is not None and since < first:
+                # The head is only written once complete, so it joins the first stored candle
+                head = []
+                async for page in market_service.fetch_ohlcv_history(symbol, timeframe, since=since, until=first):
+                    head += page
+                written += self.prepend(exchange_id, symbol, timeframe, head)
+            since = int(stored['timestamp'][-1]) + tf_ms
+
+        # Only store closed candles, the last one from the API is still forming
+        until = market_service.now() // tf_ms * tf_ms
+
+        async for page in market_service.fetch_ohlcv_history(symbol, timeframe, since=since, until=until):
+            written += self.append(exchange_id, symbol, timeframe, page)
+        return written
+
+    async def load_dataframe(self, market_service, symbol: str, timeframe: str = None, since: int = None):
+        """
+        Syncs the store and returns the candles from `since` as a DataFrame in
+        the same shape as MarketDataService.fetch_ohlcv.
+        """
+        if timeframe is None:
+            timeframe = Config.DEFAULT_TIMEFRAME
+
+        await self.sync(market_service, symbol, timeframe, since)
+        candles = self.read(market_service.exchange_id, symbol, timeframe, since=since)
+        if len(candles) == 0:
+            return None
+        return self.to_dataframe(candles)
+
+    @staticmethod
+    def to_dataframe(candles: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame({name: np.asarray(candles[name]) for name in candles.dtype.names})
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df
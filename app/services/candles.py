@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+import numpy as np
+
+class Candles:
+    """
+    Compact OHLCV window for the live path.
+
+    Timestamps (ms) are one int64 array and the prices/volume live in a
+    single contiguous (5, n) float64 block, so a 100-candle window is two
+    allocations instead of a DataFrame with an index, six columns and a
+    datetime conversion. The arrays are read-only because fetched windows
+    are shared between callers through the market data cache.
+    """
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, timestamp, open, high, low, close, volume):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_ohlcv(cls, rows):
+        """
+        Builds the window from ccxt rows [timestamp, open, high, low, close, volume].
+        """
+        if len(rows) == 0:
+            return cls.empty()
+        data = np.array(rows, dtype=np.float64)
+        timestamp = data[:, 0].astype(np.int64)
+        block = np.ascontiguousarray(data[:, 1:6].T)
+        timestamp.flags.writeable = False
+        block.flags.writeable = False
+        return cls(timestamp, *block)
+
+    @classmethod
+    def empty(cls):
+        block = np.empty((5, 0), dtype=np.float64)
+        return cls(np.empty(0, dtype=np.int64), *block)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("Candles only support slicing")
+        return Candles(*(getattr(self, name)[index] for name in self.COLUMNS))
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamp.nbytes + 5 * self.close.nbytes
+
+    def datetime_at(self, index: int) -> datetime:
+        # Naive UTC, like pd.to_datetime(unit='ms') in fetch_ohlcv
+        return datetime.fromtimestamp(int(self.timestamp[index]) / 1000, timezone.utc).replace(tzinfo=None)
+
+    def to_dataframe(self):
+        """
+        Same shape as MarketDataService.fetch_ohlcv. pandas is only imported here.
+        """
+        import pandas as pd
+        df = pd.DataFrame({name: np.array(getattr(self, name)) for name in self.COLUMNS})
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df
@@ -0,0 +1,74 @@
+import time
+from config import Config
+
+class ExchangeHealth:
+    """
+    Smoothed API latency and error rate of one exchange.
+
+    Both averages start from zero, so a single slow answer (a cold
+    connection, say) moves them by HEALTH_ALPHA of its size only. They also
+    fade with a half-life of HEALTH_HALF_LIFE seconds while no new samples
+    come in: an exchange that was routed away from for being slow or
+    failing is tried again after a while, and the stale average then
+    gives way to the fresh sample.
+
+    After HEALTH_MAX_ERRORS failures in a row the exchange is considered
+    down for HEALTH_COOLDOWN seconds. Only failures that are the
+    exchange's fault (network errors, timeouts, throttling) should be
+    reported, not e.g. a symbol it does not list.
+    """
+    __slots__ = ('alpha', 'latency', 'error_rate', 'consecutive_errors', 'down_until', 'updated', 'requests', 'errors')
+
+    def __init__(self, alpha: float = None):
+        self.alpha = Config.HEALTH_ALPHA if alpha is None else alpha
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.consecutive_errors = 0
+        self.down_until = 0.0
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+
+    def _fade(self, now: float) -> float:
+        return 0.5 ** ((now - self.updated) / Config.HEALTH_HALF_LIFE)
+
+    def _weight(self, now: float) -> float:
+        # Weight of a new sample: alpha, growing as the average goes stale
+        return 1 - (1 - self.alpha) * self._fade(now)
+
+    def success(self, seconds: float = None):
+        """
+        Records an answer. `seconds` is left out for calls whose duration
+        says little about the exchange (market metadata, all-symbol
+        snapshots), they only reset the error streak.
+        """
+        now = time.monotonic()
+        weight = self._weight(now)
+        self.requests += 1
+        if seconds is not None:
+            self.latency += weight * (seconds - self.latency)
+        self.error_rate *= 1 - weight
+        self.consecutive_errors = 0
+        self.updated = now
+
+    def failure(self):
+        now = time.monotonic()
+        weight = self._weight(now)
+        self.requests += 1
+        self.errors += 1
+        self.error_rate += weight * (1 - self.error_rate)
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= Config.HEALTH_MAX_ERRORS:
+            self.down_until = now + Config.HEALTH_COOLDOWN
+        self.updated = now
+
+    @property
+    def down(self) -> bool:
+        return time.monotonic() < self.down_until
+
+    def degraded(self, budget: float) -> bool:
+        """
+        Failing often, or usually slower than the latency budget, as of now.
+        """
+        fade = self._fade(time.monotonic())
+        return self.error_rate * fade > Config.HEALTH_MAX_ERROR_RATE or self.latency * fade > budget
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+from config import Config
+from app.services.market_data import MarketDataService
+from app.services.metrics import MARKET_ROUTES
+
+class HedgedMarketData:
+    """
+    Market data from a ranked list of exchanges, one MarketDataService
+    (client, connection pool, rate limiter, candle cache) per exchange.
+
+    Each call goes to the best exchange on the route: healthy ones in their
+    configured order, then degraded ones, then those cooling down after an
+    outage. If it has not answered within `budget` seconds (or has already
+    failed) the same call is also sent to the next exchange, and the first
+    usable answer wins. Losing requests are left to finish in the
+    background so their latency still counts towards their exchange's
+    health, and the answer fills that exchange's cache. Ticker snapshots
+    and raw requests are not hedged, only failed over.
+
+    Candles come with the exchange that answered (fetch_candles_with_source)
+    so indicator state and signals stay per exchange. The first exchange of
+    the list provides the clock, the stream and the backtest history.
+    """
+
+    _shared = None
+
+    def __init__(self, services, budget: float = None):
+        if not services:
+            raise ValueError("HedgedMarketData needs at least one market data service")
+        self.services = list(services)
+        self.budget = Config.HEDGE_BUDGET if budget is None else budget
+        self._background = set()
+
+    @classmethod
+    def shared(cls):
+        """
+        Process-wide instance over Config.EXCHANGE_IDS.
+        """
+        if cls._shared is None:
+            cls._shared = cls([MarketDataService(exchange_id=exchange_id) for exchange_id in Config.EXCHANGE_IDS])
+        return cls._shared
+
+    @classmethod
+    async def close_shared(cls):
+        if cls._shared is not None:
+            await cls._shared.close()
+            cls._shared = None
+
+    @property
+    def primary(self) -> MarketDataService:
+        return self.services[0]
+
+    @property
+    def exchange_id(self) -> str:
+        return self.primary.exchange_id
+
+    @property
+    def exchange(self):
+        return self.primary.exchange
+
+    @property
+    def stream(self):
+        return self.primary.stream
+
+    def route(self):
+        """
+        Services in the order they should be asked.
+        """
+        ranked = range(len(self.services))
+        health = [service.health for service in self.services]
+        order = sorted(ranked, key=lambda i: (health[i].down, health[i].degraded(self.budget), i))
+        return [self.services[i] for i in order]
+
+    async def _call(self, service, method: str, args):
+        try:
+            return service, await getattr(service, method)(*args)
+        except Exception as e:
+            logging.warning(f"{method} failed on {service.exchange_id}: {e}")
+            return service, None
+
+    async def _hedged(self, method: str, *args):
+        """
+        Calls `method` on the route with hedging. Returns the service that
+        answered first with a truthy result and that result, or (None, None)
+        if every exchange failed.
+        """
+        loop = asyncio.get_running_loop()
+        route = self.route()
+        pending = set()
+        for i, service in enumerate(route):
+            pending.add(asyncio.ensure_future(self._call(service, method, args)))
+            last = i == len(route) - 1
+            deadline = loop.time() + self.budget
+            while pending:
+                timeout = None if last else deadline - loop.time()
+                if timeout is not None and timeout <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Budget missed: hedge to the next exchange
+                    break
+                for task in done:
+                    winner, result = task.result()
+                    if result:
+                        self._detach(pending)
+                        MARKET_ROUTES.inc(exchange=winner.exchange_id, route='first' if winner is route[0] else 'hedge')
+                        return winner, result
+                # Everything in flight failed: go to the next exchange right away
+
+        MARKET_ROUTES.inc(exchange='none', route='failed')
+        return None, None
+
+    def _detach(self, tasks):
+        for task in tasks:
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def fetch_candles(self, symbol: str, timeframe: str = None, limit: int = None):
+        return (await self.fetch_candles_with_source(symbol, timeframe, limit))[1]
+
+    async def fetch_candles_with_source(self, symbol: str, timeframe: str = None, limit: int = None):
+        """
+        (exchange_id, candles): which exchange answered matters to anything
+        that carries state across calls, an indicator fold or an open
+        signal must not mix two price feeds.
+        """
+        winner, candles = await self._hedged('fetch_candles', symbol, timeframe, limit)
+        return (winner.exchange_id if winner is not None else self.exchange_id), candles
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = None, limit: int = None):
+        candles = await self.fetch_candles(symbol, timeframe, limit)
+        if candles is None:
+            return None
+        return candles.to_dataframe()
+
+    async def fetch_tickers(self, symbols=None):
+        """
+        Tickers from the first exchange on the route that answers. Failed
+        over like request(), not hedged: an all-symbols snapshot is the
+        heaviest call there is, and a hedge would spend it twice.
+        """
+        route = self.route()
+        for service in route:
+            # MarketDataService.fetch_tickers reports a failure as {}
+            tickers = (await self._call(service, 'fetch_tickers', (symbols,)))[1]
+            if tickers:
+                MARKET_ROUTES.inc(exchange=service.exchange_id, route='first' if service is route[0] else 'failover')
+                return tickers
+        MARKET_ROUTES.inc(exchange='none', route='failed')
+        return {}
+
+    async def request(self, method: str, *args, cost: float = 1, **kwargs):
+        """
+        Raw exchange call, failing over down the route (no hedging: raw
+        calls can be heavy, e.g. an all-symbols ticker snapshot).
+        """
+        error = None
+        for service in self.route():
+            try:
+                return await service.request(method, *args, cost=cost, **kwargs)
+            except Exception as e:
+                error = e
+        raise error
+
+    async def fetch_ohlcv_history(self, symbol: str, timeframe: str = None, since: int = None, until: int = None):
+        # History stays on one exchange so a backtest never mixes price feeds
+        async for rows in self.primary.fetch_ohlcv_history(symbol, timeframe, since, until):
+            yield rows
+
+    async def load_markets(self, reload: bool = False):
+        results = await asyncio.gather(*(s.load_markets(reload) for s in self.services), return_exceptions=True)
+        return results[0] if not isinstance(results[0], BaseException) else None
+
+    def now(self) -> int:
+        return self.primary.now()
+
+    async def sync_clock(self) -> int:
+        return await self.primary.sync_clock()
+
+    async def start_stream(self, symbols, timeframes, on_close=None):
+        return await self.primary.start_stream(symbols, timeframes, on_close)
+
+    async def stop_stream(self):
+        await self.primary.stop_stream()
+
+    async def close(self):
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        for service in self.services:
+            await service.close()
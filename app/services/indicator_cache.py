@@ -0,0 +1,210 @@
+import bisect
+import threading
+from collections import OrderedDict
+from config import Config
+from app.services.indicators import WilderATR, WilderRSI
+from app.services.metrics import INDICATOR_CACHE
+
+# name -> (factory, candle columns passed to update()/peek())
+INDICATORS = {
+    'atr': (WilderATR, ('high', 'low', 'close')),
+    'rsi': (WilderRSI, ('close',)),
+}
+
+class _Entry:
+    __slots__ = ('indicator', 'last_timestamp', 'memo_key', 'memo_value')
+
+    def __init__(self, indicator):
+        self.indicator = indicator
+        self.last_timestamp = None
+        self.memo_key = None
+        self.memo_value = None
+
+class IndicatorCache:
+    """
+    Indicator values shared by everything that analyses the same candles.
+
+    One streaming indicator is kept per (exchange, symbol, timeframe,
+    indicator, params). Its last value is memoized against the last candle
+    of the window (timestamp, and prices if it is still forming), so asking
+    again for the same candle is a lookup, and a window that moved on only
+    folds in the candles closed since. Entries are evicted least recently
+    used once there are more than `maxsize`.
+
+    New indicators are added with register(); any object with
+    update(*columns), peek(*columns) and value works. Lookups are
+    serialized by a lock, so analysis threads can share one cache.
+    """
+
+    def __init__(self, maxsize: int = None):
+        if maxsize is None:
+            maxsize = Config.INDICATOR_CACHE_SIZE
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.indicators = dict(INDICATORS)
+        self.hits = 0
+        self.extends = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def register(self, name: str, factory, columns=('close',)):
+        self.indicators[name] = (factory, tuple(columns))
+
+    def get(self, exchange_id: str, symbol: str, timeframe: str, name: str, candles, params=(),
+            forming: bool = True) -> float:
+        """
+        Value of indicator `name` at the last candle of `candles`.
+
+        With forming=True the last candle is still open: it is evaluated
+        with peek() but not committed, so it is folded in once it closes.
+        """
+        with self.lock:
+            return self._get(exchange_id, symbol, timeframe, name, candles, tuple(params), forming)
+
+    def _get(self, exchange_id, symbol, timeframe, name, candles, params, forming):
+        if len(candles) == 0:
+            return float('nan')
+        factory, columns = self.indicators[name]
+        key = (exchange_id, symbol, timeframe, name, params)
+
+        entry = self.entries.get(key)
+        if entry is not None and entry.memo_key == _memo_key(candles, columns, forming):
+            self._settle(key, entry, 'hit')
+            return entry.memo_value
+
+        entry, value, outcome = fold(entry, factory, params, columns, candles, forming)
+        self._settle(key, entry, outcome)
+        return value
+
+    def _settle(self, key, entry, outcome):
+        """
+        Stores a folded entry as most recently used and counts the lookup.
+        Called with the lock held.
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if outcome == 'hit':
+            self.hits += 1
+        elif outcome == 'extend':
+            self.extends += 1
+        else:
+            self.misses += 1
+        INDICATOR_CACHE.inc(result=outcome)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def latest(self, exchange_id: str, symbol: str, timeframe: str, candles, forming: bool = True,
+               atr_period: int = None, rsi_period: int = 14):
+        """
+        (atr, rsi) of the last candle, the pair the RSI/ATR strategy needs.
+        """
+        if atr_period is None:
+            atr_period = Config.ATR_PERIOD
+        return (
+            self.get(exchange_id, symbol, timeframe, 'atr', candles, (atr_period,), forming),
+            self.get(exchange_id, symbol, timeframe, 'rsi', candles, (rsi_period,), forming),
+        )
+
+    async def latest_in(self, pool, exchange_id: str, symbol: str, timeframe: str, candles,
+                        forming: bool = True, atr_period: int = None, rsi_period: int = 14):
+        """
+        latest() run on an AnalysisPool. Worker processes cannot see the
+        cache, so the entries are sent along with the window and the folded
+        ones stored back: every executor mode gives the same values.
+        """
+        if pool.shares_memory:
+            return await pool.run(self.latest, exchange_id, symbol, timeframe, candles, forming,
+                                  atr_period, rsi_period)
+        if atr_period is None:
+            atr_period = Config.ATR_PERIOD
+        if len(candles) == 0:
+            return float('nan'), float('nan')
+
+        keys = [(exchange_id, symbol, timeframe, 'atr', (atr_period,)),
+                (exchange_id, symbol, timeframe, 'rsi', (rsi_period,))]
+        with self.lock:
+            jobs = []
+            for key in keys:
+                factory, columns = self.indicators[key[3]]
+                jobs.append((self.entries.get(key), factory, key[4], columns))
+            # Same candle as last time: no need to ask a worker
+            if all(entry is not None and entry.memo_key == _memo_key(candles, columns, forming)
+                   for entry, _, _, columns in jobs):
+                for key, job in zip(keys, jobs):
+                    self._settle(key, job[0], 'hit')
+                return tuple(job[0].memo_value for job in jobs)
+
+        results = await pool.run(fold_all, jobs, candles, forming)
+        with self.lock:
+            for key, (entry, _, outcome) in zip(keys, results):
+                self._settle(key, entry, outcome)
+        return tuple(value for _, value, _ in results)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.extends + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "extends": self.extends,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def _memo_key(candles, columns, forming):
+    # The last candle: its timestamp, and its prices while it is still forming
+    last_ts = int(candles.timestamp[-1])
+    if forming:
+        return (last_ts, True) + tuple(float(getattr(candles, c)[-1]) for c in columns)
+    return (last_ts, False)
+
+def fold(entry, factory, params, columns, candles, forming):
+    """
+    Brings `entry` (None for a new one) up to the last candle of `candles`.
+    Returns (entry, value, outcome), outcome being 'hit', 'extend' or
+    'miss'. Touches nothing but the entry, so it also runs in a worker
+    process on a pickled copy.
+    """
+    memo_key = _memo_key(candles, columns, forming)
+    closed = len(candles) - 1 if forming else len(candles)
+    timestamps = candles.timestamp
+    start = 0
+    if entry is not None and entry.last_timestamp is not None:
+        # Continue right after the last committed candle
+        start = bisect.bisect_right(timestamps, entry.last_timestamp, 0, closed)
+        behind = closed > 0 and int(timestamps[closed - 1]) < entry.last_timestamp
+        if (start == 0 and closed > 0) or behind:
+            # The window does not reach back to it, or ends before it: start over
+            entry = None
+            start = 0
+
+    if entry is None:
+        entry = _Entry(factory(*params))
+        outcome = 'miss'
+    elif start < closed:
+        outcome = 'extend'
+    else:
+        # Same closed candles, only the forming one moved
+        outcome = 'hit'
+
+    indicator = entry.indicator
+    if start < closed:
+        cols = [getattr(candles, c)[start:closed].tolist() for c in columns]
+        for row in zip(*cols):
+            indicator.update(*row)
+        entry.last_timestamp = int(timestamps[closed - 1])
+
+    if forming:
+        value = indicator.peek(*memo_key[2:])
+    else:
+        value = indicator.value
+    entry.memo_key = memo_key
+    entry.memo_value = value
+    return entry, value, outcome
+
+def fold_all(jobs, candles, forming):
+    """fold() for each (entry, factory, params, columns) of `jobs`."""
+    return [fold(entry, factory, params, columns, candles, forming)
+            for entry, factory, params, columns in jobs]
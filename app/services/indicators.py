@@ -0,0 +1,169 @@
+import math
+import numpy as np
+from config import Config
+
+def _wilder_step(avg: float, x: float, alpha: float) -> float:
+    # One step of pandas ewm(alpha=alpha, adjust=False).mean(), written the
+    # same way as pandas so the streaming values match the batch ones
+    if avg != avg:
+        return x
+    if avg == x:
+        return avg
+    old_wt = 1. - alpha
+    return ((old_wt * avg) + (alpha * x)) / (old_wt + alpha)
+
+class WilderATR:
+    """
+    Streaming ATR with Wilder smoothing. Same recurrence as the manual
+    SignalAnalysisService.calculate_atr, updated in O(1) per candle.
+    """
+    __slots__ = ('alpha', 'value', 'prev_close')
+
+    def __init__(self, period: int = None):
+        if period is None:
+            period = Config.ATR_PERIOD
+        self.alpha = 1 / period
+        self.value = math.nan
+        self.prev_close = math.nan
+
+    def _next(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        prev = self.prev_close
+        if prev == prev:
+            tr = max(tr, abs(high - prev), abs(low - prev))
+        return _wilder_step(self.value, tr, self.alpha)
+
+    def peek(self, high: float, low: float, close: float) -> float:
+        """
+        Value after this candle, without committing it (for a forming candle).
+        """
+        return self._next(high, low, close)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.value = self._next(high, low, close)
+        self.prev_close = close
+        return self.value
+
+class WilderRSI:
+    """
+    Streaming RSI with Wilder smoothing. Same recurrence as the manual
+    SignalAnalysisService.calculate_rsi, updated in O(1) per candle.
+    """
+    __slots__ = ('alpha', 'avg_gain', 'avg_loss', 'prev_close')
+
+    def __init__(self, period: int = 14):
+        self.alpha = 1 / period
+        self.avg_gain = math.nan
+        self.avg_loss = math.nan
+        self.prev_close = math.nan
+
+    def _next(self, close: float):
+        delta = close - self.prev_close
+        # The first candle has no delta, the batch version fills it with 0
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        return _wilder_step(self.avg_gain, gain, self.alpha), _wilder_step(self.avg_loss, loss, self.alpha)
+
+    @staticmethod
+    def _rsi(avg_gain: float, avg_loss: float) -> float:
+        if avg_loss == 0:
+            # Matches the float division in pandas: x/0 -> inf, 0/0 -> nan
+            return 100.0 if avg_gain > 0 else math.nan
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    @property
+    def value(self) -> float:
+        return self._rsi(self.avg_gain, self.avg_loss)
+
+    def peek(self, close: float) -> float:
+        return self._rsi(*self._next(close))
+
+    def update(self, close: float) -> float:
+        self.avg_gain, self.avg_loss = self._next(close)
+        self.prev_close = close
+        return self.value
+
+class IndicatorState:
+    """
+    ATR and RSI state for one (symbol, timeframe), with the timestamp of the
+    last closed candle folded in.
+    """
+    __slots__ = ('atr', 'rsi', 'last_timestamp')
+
+    def __init__(self, atr_period: int = None, rsi_period: int = 14):
+        self.atr = WilderATR(atr_period)
+        self.rsi = WilderRSI(rsi_period)
+        self.last_timestamp = None
+
+    def update(self, timestamp, high: float, low: float, close: float):
+        self.atr.update(high, low, close)
+        self.rsi.update(close)
+        self.last_timestamp = timestamp
+
+    def peek(self, high: float, low: float, close: float):
+        return self.atr.peek(high, low, close), self.rsi.peek(close)
+
+def latest_indicators(highs, lows, closes, atr_period: int = None, rsi_period: int = 14):
+    """
+    (atr, rsi) of the last candle, folding the whole window once. For one
+    short window this is cheaper than building pandas objects.
+    """
+    state = IndicatorState(atr_period, rsi_period)
+    for high, low, close in zip(np.asarray(highs).tolist(), np.asarray(lows).tolist(), np.asarray(closes).tolist()):
+        state.update(None, high, low, close)
+    return state.atr.value, state.rsi.value
+
+def wilder_smooth(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    pandas ewm(alpha=1/period, adjust=False).mean() along the last axis of a
+    2-D (symbols x bars) array: one vectorized step per bar for all symbols.
+    Leading NaNs (symbols with a shorter history) are skipped like pandas does.
+    """
+    alpha = 1 / period
+    old_wt = 1. - alpha
+    out = np.empty_like(values, dtype=float)
+    avg = values[:, 0].astype(float)
+    out[:, 0] = avg
+    with np.errstate(invalid='ignore'):
+        for t in range(1, values.shape[1]):
+            x = values[:, t]
+            step = ((old_wt * avg) + (alpha * x)) / (old_wt + alpha)
+            avg = np.where(np.isnan(avg), x, np.where(avg == x, avg, step))
+            out[:, t] = avg
+    return out
+
+def batch_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = None) -> np.ndarray:
+    """
+    ATR for a (symbols x bars) block, same values as the manual calculate_atr.
+    """
+    if period is None:
+        period = Config.ATR_PERIOD
+
+    prev_close = np.empty_like(close, dtype=float)
+    prev_close[:, 0] = np.nan
+    prev_close[:, 1:] = close[:, :-1]
+
+    # fmax skips NaN like DataFrame.max(axis=1) does on the first bar
+    tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    return wilder_smooth(tr, period)
+
+def batch_rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    RSI for a (symbols x bars) block, same values as the manual calculate_rsi.
+    """
+    delta = np.empty_like(close, dtype=float)
+    delta[:, 0] = np.nan
+    delta[:, 1:] = close[:, 1:] - close[:, :-1]
+
+    # The first delta of every symbol is filled with 0, padding stays NaN
+    missing = np.isnan(close)
+    with np.errstate(invalid='ignore'):
+        gain = np.where(missing, np.nan, np.where(delta > 0, delta, 0.0))
+        loss = np.where(missing, np.nan, np.where(delta < 0, -delta, 0.0))
+    gain = wilder_smooth(gain, period)
+    loss = wilder_smooth(loss, period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        return 100 - (100 / (1 + rs))
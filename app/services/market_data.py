@@ -1,37 +1,394 @@
-import ccxt.async_support as ccxt
-import pandas as pd
 import asyncio
+import json
+import logging
+import os
+import time
+import numpy as np
 from config import Config
+from app.services.rate_limiter import TokenBucket
+from app.services.exchange_health import ExchangeHealth
+from app.services.candles import Candles
+from app.services.resampler import ResampledSeries, can_resample
+from app.services.streaming import KlineStream
+from app.services.metrics import STAGE_SECONDS, API_ERRORS, API_RETRIES, OHLCV_CACHE
+
+def _rate_limited(error: Exception) -> bool:
+    # ccxt is only imported here once a request has failed, by then the
+    # exchange client has loaded it anyway
+    from ccxt.base.errors import RateLimitExceeded, DDoSProtection
+    return isinstance(error, (RateLimitExceeded, DDoSProtection))
+
+def _exchange_fault(error: Exception) -> bool:
+    # Network trouble, timeouts and throttling count against the exchange's
+    # health, a bad symbol or parameter does not
+    from ccxt.base.errors import NetworkError
+    return isinstance(error, (NetworkError, asyncio.TimeoutError, OSError))
+
+# Calls whose duration rates the exchange for routing. Market metadata and
+# ticker snapshots are large and rare, one slow answer must not demote it
+TIMED_METHODS = ('fetch_ohlcv',)
 
 class MarketDataService:
-    def __init__(self):
-        self.exchange_id = Config.EXCHANGE_ID
-        self.exchange_class = getattr(ccxt, self.exchange_id)
-        self.exchange = self.exchange_class()
+    _shared = None
+    # exchange_id -> (loaded_at, markets, currencies), shared by every instance in the process
+    _markets = {}
+
+    def __init__(self, exchange=None, exchange_id: str = None):
+        if exchange is None:
+            # Imported on first use: ccxt loads every exchange class, which
+            # is most of the bot's startup time
+            import ccxt.async_support as ccxt
+            self.exchange_id = exchange_id or Config.EXCHANGE_ID
+            self.exchange_class = getattr(ccxt, self.exchange_id)
+            self.exchange = self.exchange_class()
+        else:
+            # Pre-built exchange (e.g. a fake one in tests)
+            self.exchange_id = exchange.id
+            self.exchange_class = type(exchange)
+            self.exchange = exchange
+
+        # Our token bucket replaces the ccxt throttler so that concurrent
+        # requests can burst within the exchange budget
+        self.rate_limiter = TokenBucket.for_exchange(self.exchange)
+        self.exchange.enableRateLimit = False
+
+        # (symbol, timeframe, limit) -> (expires_at_ms, Candles)
+        self._cache = {}
+        # (symbol, timeframe, limit) -> task of the fetch in flight
+        self._inflight = {}
+        # (symbol, timeframe) -> ResampledSeries rolled forward from the base timeframe
+        self.base_timeframe = Config.BASE_TIMEFRAME or None
+        self._series = {}
+        # Exchange clock minus local clock, see sync_clock()
+        self.clock_offset = 0
+        # KlineStream while streaming mode is on, see start_stream()
+        self.stream = None
+        # Task of the (cached) load_markets, requests wait for it once
+        self._markets_task = None
+        # Latency and errors of the API calls, used to route between exchanges
+        self.health = ExchangeHealth()
+
+    @classmethod
+    def shared(cls):
+        """
+        Process-wide instance, so every handler reuses one exchange client,
+        its HTTP connection pool, rate limiter and candle cache.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    async def close_shared(cls):
+        if cls._shared is not None:
+            await cls._shared.close()
+            cls._shared = None
 
     async def close(self):
+        await self.stop_stream()
         await self.exchange.close()
 
+    async def start_stream(self, symbols, timeframes, on_close=None):
+        """
+        Switches the watchlist to WebSocket candles: fetch_candles is served
+        from the stream's windows and on_close(symbol, timeframe) is awaited
+        whenever a candle closes.
+        """
+        await self.stop_stream()
+        stream = KlineStream(self, symbols, timeframes, on_close)
+        await stream.start()
+        self.stream = stream
+        return stream
+
+    async def stop_stream(self):
+        if self.stream is not None:
+            await self.stream.stop()
+            self.stream = None
+
+    @property
+    def services(self):
+        # The exchanges behind this service, HedgedMarketData has several
+        return [self]
+
+    def now(self) -> int:
+        """
+        Exchange time in milliseconds. Candle closes and cache expiry use
+        this rather than the local clock.
+        """
+        return self.exchange.milliseconds() + self.clock_offset
+
+    async def sync_clock(self) -> int:
+        """
+        Measures the exchange clock offset with fetch_time. Keeps the previous
+        offset if the exchange does not support it. Returns the offset in ms.
+        """
+        try:
+            before = self.exchange.milliseconds()
+            server_time = await self.request('fetch_time')
+            after = self.exchange.milliseconds()
+        except Exception as e:
+            logging.warning(f"Error syncing clock with {self.exchange_id}: {e}")
+            return self.clock_offset
+        self.clock_offset = int(server_time) - (before + after) // 2
+        return self.clock_offset
+
+    async def request(self, method: str, *args, cost: float = 1, **kwargs):
+        """
+        Calls an exchange method through the rate limiter, retrying with
+        backoff when the exchange answers with a rate-limit error (429/418).
+        """
+        if method != 'load_markets':
+            if self._markets_task is None:
+                self._markets_task = asyncio.ensure_future(self._load_markets())
+            if not self._markets_task.done():
+                # Otherwise ccxt loads them inside the first request, bypassing the disk cache
+                await asyncio.shield(self._markets_task)
+
+        for attempt in range(Config.RATE_LIMIT_MAX_RETRIES + 1):
+            await self.rate_limiter.acquire(cost)
+            try:
+                started = time.monotonic()
+                with STAGE_SECONDS.time(stage=method, exchange=self.exchange_id):
+                    result = await getattr(self.exchange, method)(*args, **kwargs)
+                self.health.success(time.monotonic() - started if method in TIMED_METHODS else None)
+                return result
+            except Exception as e:
+                API_ERRORS.inc(exchange=self.exchange_id, method=method, error=type(e).__name__)
+                if _exchange_fault(e):
+                    self.health.failure()
+                if not _rate_limited(e) or attempt == Config.RATE_LIMIT_MAX_RETRIES:
+                    raise
+                API_RETRIES.inc(exchange=self.exchange_id, method=method)
+                delay = self.rate_limiter.backoff(attempt)
+                logging.warning(f"Rate limited by {self.exchange_id} ({e}), backing off {delay:.1f}s")
+
+    async def load_markets(self, reload: bool = False):
+        """
+        Loads the exchange's market metadata, from memory or disk when a copy
+        younger than MARKETS_CACHE_TTL exists. A fresh load is written back
+        to MARKETS_CACHE_DIR, so restarts skip the (large) markets request.
+        Returns the markets, or None if they could not be loaded.
+
+        Requests wait for the same load, whether it was started here or by
+        the first request.
+        """
+        if reload or self._markets_task is None:
+            self._markets_task = asyncio.ensure_future(self._load_markets(reload))
+        return await asyncio.shield(self._markets_task)
+
+    async def _load_markets(self, reload: bool = False):
+        if not hasattr(self.exchange, 'set_markets'):
+            # Test doubles have no market metadata
+            return None
+        now = time.time()
+        ttl = Config.MARKETS_CACHE_TTL
+        path = os.path.join(Config.MARKETS_CACHE_DIR, f"{self.exchange_id}.json")
+
+        cached = None if reload else self._markets.get(self.exchange_id)
+        if cached is None and not reload:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                cached = (data['loaded_at'], data['markets'], data.get('currencies'))
+            except (OSError, ValueError, KeyError):
+                cached = None
+        if cached is not None and now - cached[0] < ttl:
+            self.exchange.set_markets(cached[1], cached[2])
+            self._markets[self.exchange_id] = cached
+            return self.exchange.markets
+
+        try:
+            markets = await self.request('load_markets', reload)
+        except Exception as e:
+            logging.error(f"Error loading markets for {self.exchange_id}: {e}")
+            return None
+        currencies = self.exchange.currencies
+        self._markets[self.exchange_id] = (now, markets, currencies)
+        try:
+            os.makedirs(Config.MARKETS_CACHE_DIR, exist_ok=True)
+            tmp = path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump({'loaded_at': now, 'markets': markets, 'currencies': currencies}, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"Could not cache markets for {self.exchange_id}: {e}")
+        return markets
+
     async def fetch_ohlcv(self, symbol: str, timeframe: str = None, limit: int = None):
         """
-        Fetches OHLCV data for a given symbol.
+        Fetches OHLCV data for a given symbol as a DataFrame.
+
+        Goes through the same cache as fetch_candles, every caller gets its
+        own DataFrame. The live signal path should use fetch_candles instead.
+        """
+        candles = await self.fetch_candles(symbol, timeframe, limit)
+        if candles is None:
+            return None
+        return candles.to_dataframe()
+
+    async def fetch_candles(self, symbol: str, timeframe: str = None, limit: int = None):
+        """
+        Fetches OHLCV data for a given symbol as a read-only Candles window.
+
+        Results are cached until the current candle closes, and concurrent
+        calls for the same (symbol, timeframe, limit) share one request.
+        With a base timeframe set, coarser timeframes are built from it locally.
         """
         if timeframe is None:
             timeframe = Config.DEFAULT_TIMEFRAME
         if limit is None:
             limit = Config.DEFAULT_LIMIT
+        if self.stream is not None and limit <= self.stream.window:
+            candles = self.stream.candles(symbol, timeframe, limit)
+            if candles is not None:
+                OHLCV_CACHE.inc(exchange=self.exchange_id, result='stream')
+                return candles
+        if self.resamples(timeframe):
+            return await self._resampled_candles(symbol, timeframe, limit)
+
+        key = (symbol, timeframe, limit)
+        cached = self._cache.get(key)
+        if cached is not None and self.now() < cached[0]:
+            OHLCV_CACHE.inc(exchange=self.exchange_id, result='hit')
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            OHLCV_CACHE.inc(exchange=self.exchange_id, result='coalesced')
+        else:
+            OHLCV_CACHE.inc(exchange=self.exchange_id, result='miss')
+            task = asyncio.ensure_future(self._fetch_candles(symbol, timeframe, limit))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # A cancelled caller must not cancel the fetch the others wait on
+        return await asyncio.shield(task)
+
+    async def fetch_candles_with_source(self, symbol: str, timeframe: str = None, limit: int = None):
+        """
+        (exchange_id, candles) like HedgedMarketData's, where the exchange can
+        vary from call to call. Indicator state and signals are keyed by it.
+        """
+        return self.exchange_id, await self.fetch_candles(symbol, timeframe, limit)
 
+    async def _fetch_candles(self, symbol: str, timeframe: str, limit: int):
         try:
             # ccxt returns: [timestamp, open, high, low, close, volume]
-            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            ohlcv = await self.request('fetch_ohlcv', symbol, timeframe, limit=limit)
             
             if not ohlcv:
                 return None
 
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            return df
+            with STAGE_SECONDS.time(stage='parse', exchange=self.exchange_id):
+                candles = Candles.from_ohlcv(ohlcv)
             
         except Exception as e:
-            print(f"Error fetching data for {symbol}: {e}")
+            logging.error(f"Error fetching data for {symbol}: {e}")
+            return None
+
+        self._store(symbol, timeframe, limit, candles)
+        return candles
+
+    def resamples(self, timeframe: str) -> bool:
+        if self.base_timeframe is None or timeframe == self.base_timeframe:
+            return False
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        base_ms = self.exchange.parse_timeframe(self.base_timeframe) * 1000
+        # The base window has to hold a whole forming candle (e.g. a 1d
+        # from 1m needs BASE_LIMIT >= 1440), larger timeframes are fetched
+        return can_resample(tf_ms, base_ms) and tf_ms <= Config.BASE_LIMIT * base_ms
+
+    async def _resampled_candles(self, symbol: str, timeframe: str, limit: int):
+        # Every timeframe of a symbol shares this (cached) base fetch
+        base = await self.fetch_candles(symbol, self.base_timeframe, Config.BASE_LIMIT)
+        if base is None:
+            return None
+
+        base_ms = self.exchange.parse_timeframe(self.base_timeframe) * 1000
+        series = self._series.get((symbol, timeframe))
+        if series is None or series.maxlen < limit or not series.covers(int(base.timestamp[0])):
+            series = await self._seed_series(symbol, timeframe, limit, base_ms)
+            if series is None:
+                return None
+
+        with STAGE_SECONDS.time(stage='resample', exchange=self.exchange_id):
+            rows = np.column_stack([base.timestamp, base.open, base.high, base.low, base.close, base.volume])
+            closed = base.timestamp + base_ms <= self.now()
+            series.fold(rows[closed])
+            return series.window(limit, rows[~closed])
+
+    async def _seed_series(self, symbol: str, timeframe: str, limit: int, base_ms: int):
+        try:
+            now = self.now()
+            ohlcv = await self.request('fetch_ohlcv', symbol, timeframe, limit=max(limit, Config.DEFAULT_LIMIT))
+        except Exception as e:
+            logging.error(f"Error fetching data for {symbol}: {e}")
+            return None
+        if not ohlcv:
             return None
+
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        series = ResampledSeries(tf_ms, base_ms, max(limit, Config.DEFAULT_LIMIT))
+        series.seed(ohlcv, now)
+        self._series[(symbol, timeframe)] = series
+        return series
+
+    def _store(self, symbol: str, timeframe: str, limit: int, candles):
+        # Expire at the close of the current candle on the exchange clock
+        now = self.now()
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        expires_at = (now // tf_ms + 1) * tf_ms
+
+        if len(self._cache) >= Config.OHLCV_CACHE_SIZE:
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            if len(self._cache) >= Config.OHLCV_CACHE_SIZE:
+                # Still full of live entries: drop the oldest insertions
+                for k in list(self._cache)[:len(self._cache) // 2]:
+                    del self._cache[k]
+
+        self._cache[(symbol, timeframe, limit)] = (expires_at, candles)
+
+    async def fetch_tickers(self, symbols=None):
+        """
+        Last prices for many symbols in one request. Returns {symbol: price},
+        symbols without a usable price are left out.
+        """
+        try:
+            # One request however many symbols are asked for
+            tickers = await self.request('fetch_tickers', list(symbols) if symbols is not None else None)
+        except Exception as e:
+            logging.error(f"Error fetching tickers: {e}")
+            return {}
+
+        prices = {}
+        for symbol, ticker in tickers.items():
+            price = ticker.get('last') or ticker.get('close')
+            if price:
+                prices[symbol] = float(price)
+        return prices
+
+    async def fetch_ohlcv_history(self, symbol: str, timeframe: str = None, since: int = None, until: int = None):
+        """
+        Pages through historical OHLCV data with a `since` cursor.
+        Yields lists of raw ccxt rows, oldest first. until is exclusive.
+        A failed page raises, so a caller never takes part of the history
+        for all of it.
+        """
+        if timeframe is None:
+            timeframe = Config.DEFAULT_TIMEFRAME
+
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        if until is None:
+            until = self.now()
+        if since is None:
+            since = until - Config.DEFAULT_LIMIT * tf_ms
+
+        cursor = since
+        while cursor < until:
+            page = await self.request('fetch_ohlcv', symbol, timeframe, since=cursor, limit=Config.HISTORY_PAGE_LIMIT)
+            page = [row for row in page if cursor <= row[0] < until]
+            if not page:
+                return
+
+            yield page
+            cursor = page[-1][0] + tf_ms
@@ -0,0 +1,274 @@
+import bisect
+import threading
+import time
+from config import Config
+
+# Seconds, tuned for exchange calls (tens of ms) down to indicator math (sub-ms)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _label_key(labelnames, labels: dict):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+def _format_labels(labelnames, key, extra: str = ''):
+    parts = [f'{name}="{value}"' for name, value in zip(labelnames, key) if value != '']
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+class Counter:
+    __slots__ = ('name', 'help', 'labelnames', 'values', '_lock')
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def _items(self):
+        # Taken under inc()'s lock: a new series added mid-iteration would break it
+        with self._lock:
+            return list(self.values.items())
+
+    def total(self, **labels) -> float:
+        """
+        Sum over every series matching the given labels.
+        """
+        match = [(self.labelnames.index(k), str(v)) for k, v in labels.items()]
+        return sum(v for key, v in self._items() if all(key[i] == val for i, val in match))
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in sorted(self._items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Each series keeps per-bucket counts, a sum and a
+    count, so observe() is a bisect and three additions.
+    """
+    __slots__ = ('name', 'help', 'labelnames', 'buckets', 'series', '_lock')
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # key -> [bucket counts (+Inf last), sum, count]
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _items(self):
+        # Copied under observe()'s lock, so a series' buckets, sum and count agree
+        with self._lock:
+            return [(key, (list(buckets), s, c)) for key, (buckets, s, c) in self.series.items()]
+
+    def time(self, **labels) -> _Timer:
+        return _Timer(self, labels)
+
+    def merged(self, **labels):
+        """
+        (bucket counts, sum, count) over every series matching the labels.
+        """
+        match = [(self.labelnames.index(k), str(v)) for k, v in labels.items()]
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        count = 0
+        for key, (buckets, s, c) in self._items():
+            if all(key[i] == val for i, val in match):
+                counts = [a + b for a, b in zip(counts, buckets)]
+                total += s
+                count += c
+        return counts, total, count
+
+    def quantile(self, q: float, **labels) -> float:
+        """
+        Estimates a quantile by interpolating inside the matching bucket.
+        """
+        counts, _, count = self.merged(**labels)
+        if count == 0:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c > 0:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+    def label_values(self, name: str):
+        i = self.labelnames.index(name)
+        return sorted({key[i] for key, _ in self._items()})
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, (buckets, total, count) in sorted(self._items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets, buckets):
+                cumulative += c
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        if name not in self.metrics:
+            self.metrics[name] = Counter(name, help, labelnames)
+        return self.metrics[name]
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        if name not in self.metrics:
+            self.metrics[name] = Histogram(name, help, labelnames, buckets)
+        return self.metrics[name]
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """
+        Summary used by the /stats command.
+        """
+        stages = {}
+        for stage in STAGE_SECONDS.label_values('stage'):
+            _, total, count = STAGE_SECONDS.merged(stage=stage)
+            stages[stage] = {
+                "count": count,
+                "avg": total / count if count else 0.0,
+                "p50": STAGE_SECONDS.quantile(0.5, stage=stage),
+                "p95": STAGE_SECONDS.quantile(0.95, stage=stage),
+            }
+        _, pass_total, passes = SCAN_PASS_SECONDS.merged()
+        return {
+            "stages": stages,
+            "passes": passes,
+            "avg_pass": pass_total / passes if passes else 0.0,
+            "symbols_scanned": SYMBOLS_SCANNED.total(),
+            "signals": SIGNALS_EMITTED.total(),
+            "api_errors": API_ERRORS.total(),
+            "retries": API_RETRIES.total(),
+            "loop_lag_p50": LOOP_LAG_SECONDS.quantile(0.5),
+            "loop_lag_p95": LOOP_LAG_SECONDS.quantile(0.95),
+            "indicator_hits": INDICATOR_CACHE.total(result='hit'),
+            "indicator_lookups": INDICATOR_CACHE.total(),
+            "notifications_sent": NOTIFICATIONS.total(result='sent'),
+            "notifications_failed": NOTIFICATIONS.total(result='failed') + NOTIFICATIONS.total(result='dropped'),
+        }
+
+metrics = MetricsRegistry()
+
+# Scan pipeline
+# No symbol label: with a universe scan that is thousands of series per stage
+STAGE_SECONDS = metrics.histogram(
+    'scanner_stage_seconds', 'Time spent in each scan pipeline stage',
+    ('stage', 'exchange'),
+)
+SCAN_PASS_SECONDS = metrics.histogram(
+    'scanner_pass_seconds', 'Duration of a full scan pass',
+    buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+SYMBOLS_SCANNED = metrics.counter('scanner_symbols_total', 'Symbols scanned', ('exchange',))
+SIGNALS_EMITTED = metrics.counter('scanner_signals_total', 'Signals emitted', ('exchange', 'symbol', 'direction'))
+SIGNALS_SUPPRESSED = metrics.counter('scanner_signals_suppressed_total', 'Signals not sent again because the same one is still open', ('exchange',))
+SIGNAL_OUTCOMES = metrics.counter('signal_outcomes_total', 'TP/SL/expiry events of tracked signals', ('exchange', 'outcome'))
+
+# Candle-close scheduling
+CLOSE_BUCKETS = (0.5, 1, 2, 3, 5, 10, 15, 30, 60, 120, 300, 600)
+SCHEDULE_LAG_SECONDS = metrics.histogram(
+    'scheduler_tick_lag_seconds', 'Time from candle close to the scan tick', ('timeframe',), CLOSE_BUCKETS,
+)
+SIGNAL_LATENCY_SECONDS = metrics.histogram(
+    'scanner_close_to_alert_seconds', 'Time from candle close to the signal digest being queued', ('timeframe',), CLOSE_BUCKETS,
+)
+SCHEDULE_MISSED = metrics.counter('scheduler_missed_closes_total', 'Candle closes skipped after a stall', ('timeframe',))
+
+# Exchange API
+API_ERRORS = metrics.counter('exchange_api_errors_total', 'Exchange API errors', ('exchange', 'method', 'error'))
+API_RETRIES = metrics.counter('exchange_api_retries_total', 'Requests retried after a rate-limit error', ('exchange', 'method'))
+OHLCV_CACHE = metrics.counter('ohlcv_cache_requests_total', 'fetch_ohlcv calls by cache result', ('exchange', 'result'))
+MARKET_ROUTES = metrics.counter('market_data_routes_total', 'Multi-exchange calls by the exchange that answered and how', ('exchange', 'route'))
+
+# Event loop
+LOOP_LAG_SECONDS = metrics.histogram(
+    'event_loop_lag_seconds', 'How late the event loop ran a scheduled probe',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+# Indicator cache
+INDICATOR_CACHE = metrics.counter('indicator_cache_requests_total', 'Indicator lookups by cache result', ('result',))
+
+# Telegram delivery
+NOTIFICATIONS = metrics.counter('notifications_total', 'Outbound Telegram messages by result', ('result',))
+NOTIFY_FLOOD_WAITS = metrics.counter('notifications_flood_waits_total', 'Flood waits (429) returned by Telegram')
+
+# WebSocket candle stream
+STREAM_MESSAGES = metrics.counter('stream_kline_messages_total', 'Kline updates received over WebSocket')
+STREAM_RECONNECTS = metrics.counter('stream_reconnects_total', 'WebSocket reconnect attempts')
+STREAM_GAP_FILLS = metrics.counter('stream_gap_fills_total', 'Missed candles recovered over REST')
+
+async def start_metrics_server(host: str = None, port: int = None):
+    """
+    Serves registry.render() at http://host:port/metrics. Returns the aiohttp
+    runner, call `await runner.cleanup()` to stop it.
+    """
+    from aiohttp import web
+
+    if host is None:
+        host = Config.METRICS_HOST
+    if port is None:
+        port = Config.METRICS_PORT
+
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from config import Config
+from app.services.rate_limiter import TokenBucket
+from app.services.metrics import STAGE_SECONDS, NOTIFICATIONS, NOTIFY_FLOOD_WAITS
+from app.bot.formatting import format_signal_digest
+
+class NotificationService:
+    """
+    Background delivery queue for outbound Telegram messages.
+
+    publish() only enqueues, so the scanner never waits on Telegram. Each
+    chat has its own FIFO and worker task, which keeps a chat's messages in
+    order while other chats keep flowing. Every send takes a token from the
+    chat's bucket and from one global bucket shared by all chats, and a
+    flood wait pauses the chat for exactly the `retry_after` Telegram asks for.
+    """
+
+    def __init__(self, bot, subscribers=None, parse_mode: str = "Markdown"):
+        self.bot = bot
+        self.parse_mode = parse_mode
+        if subscribers is None:
+            subscribers = [Config.ADMIN_ID] if Config.ADMIN_ID != 0 else []
+            subscribers += Config.SUBSCRIBER_IDS
+        # dict keeps the order subscribers were added in
+        self.subscribers = dict.fromkeys(subscribers)
+        self.global_bucket = TokenBucket(Config.TELEGRAM_GLOBAL_RATE)
+        self.chat_buckets = {}
+        self.queues = {}
+        self.workers = {}
+        self.pending = 0
+
+    def subscribe(self, chat_id: int):
+        self.subscribers[chat_id] = None
+
+    def unsubscribe(self, chat_id: int):
+        self.subscribers.pop(chat_id, None)
+
+    def publish(self, text: str, chat_ids=None) -> int:
+        """
+        Queues `text` for every chat (all subscribers by default) and returns
+        immediately. Returns how many messages were queued.
+        """
+        if chat_ids is None:
+            chat_ids = list(self.subscribers)
+        if not chat_ids:
+            logging.warning("⚠️ Nothing to deliver to: ADMIN_ID and SUBSCRIBER_IDS are not set in config.")
+            return 0
+
+        queued = 0
+        for chat_id in chat_ids:
+            if self.pending >= Config.NOTIFY_QUEUE_SIZE:
+                NOTIFICATIONS.inc(result='dropped')
+                logging.warning(f"Notification queue full, dropping message for {chat_id}")
+                continue
+            self._queue(chat_id).put_nowait(text)
+            self.pending += 1
+            queued += 1
+        return queued
+
+    def publish_digest(self, signals, chat_ids=None) -> int:
+        """
+        Queues the signals of one scan pass as a single digest (split only
+        when it would exceed Telegram's message size).
+        """
+        queued = 0
+        for message in format_signal_digest(signals, Config.NOTIFY_DIGEST_LIMIT):
+            queued += self.publish(message, chat_ids)
+        return queued
+
+    def _queue(self, chat_id) -> asyncio.Queue:
+        queue = self.queues.get(chat_id)
+        if queue is None:
+            queue = self.queues[chat_id] = asyncio.Queue()
+            # One message per second per chat, no bursts
+            self.chat_buckets[chat_id] = TokenBucket(Config.TELEGRAM_CHAT_RATE, 1)
+        worker = self.workers.get(chat_id)
+        if worker is None or worker.done():
+            self.workers[chat_id] = asyncio.create_task(self._worker(chat_id, queue))
+        return queue
+
+    async def _worker(self, chat_id, queue: asyncio.Queue):
+        while True:
+            text = await queue.get()
+            try:
+                await self._send(chat_id, text)
+            except Exception as e:
+                NOTIFICATIONS.inc(result='failed')
+                logging.error(f"Failed to send message to {chat_id}: {e}")
+            finally:
+                self.pending -= 1
+                queue.task_done()
+
+    async def _send(self, chat_id, text: str):
+        # Other API errors (blocked by the user, bad markup...) are not retried
+        bucket = self.chat_buckets[chat_id]
+        for attempt in range(Config.NOTIFY_MAX_RETRIES + 1):
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                with STAGE_SECONDS.time(stage='send_message'):
+                    await self.bot.send_message(chat_id, text, parse_mode=self.parse_mode)
+                NOTIFICATIONS.inc(result='sent')
+                return
+            except TelegramRetryAfter as e:
+                if attempt == Config.NOTIFY_MAX_RETRIES:
+                    raise
+                NOTIFY_FLOOD_WAITS.inc()
+                logging.warning(f"Flood wait for {chat_id}, retrying in {e.retry_after}s")
+                bucket.pause(e.retry_after)
+            except (TelegramNetworkError, TelegramServerError, asyncio.TimeoutError, OSError) as e:
+                if attempt == Config.NOTIFY_MAX_RETRIES:
+                    raise
+                delay = bucket.backoff(attempt)
+                logging.warning(f"Sending to {chat_id} failed ({e}), retrying in {delay:.1f}s")
+            NOTIFICATIONS.inc(result='retried')
+
+    async def join(self):
+        """
+        Waits until every queued message has been delivered or given up on.
+        """
+        await asyncio.gather(*(queue.join() for queue in list(self.queues.values())))
+
+    async def close(self, timeout: float = 10.0):
+        """
+        Gives pending messages up to `timeout` seconds, then stops the workers.
+        """
+        if self.pending:
+            try:
+                await asyncio.wait_for(self.join(), timeout)
+            except asyncio.TimeoutError:
+                logging.warning(f"Dropping {self.pending} undelivered notification(s) on shutdown")
+        workers = list(self.workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self.workers.clear()
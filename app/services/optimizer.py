@@ -0,0 +1,139 @@
+import itertools
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from config import Config
+from app.services.signal_analysis import SignalAnalysisService
+from app.services.backtest_engine import BacktestEngine
+
+PARAMETERS = ['rsi_oversold', 'rsi_overbought', 'atr_period', 'atr_multiplier', 'reward_ratio']
+
+# Candle arrays of the current sweep, attached once per worker process
+_shared = {}
+
+def build_grid(rsi_oversold=None, rsi_overbought=None, atr_period=None, atr_multiplier=None, reward_ratio=None):
+    """
+    Cartesian product of the given values. Parameters left out keep their
+    Config value.
+    """
+    values = {
+        'rsi_oversold': rsi_oversold or [Config.RSI_OVERSOLD],
+        'rsi_overbought': rsi_overbought or [Config.RSI_OVERBOUGHT],
+        'atr_period': atr_period or [Config.ATR_PERIOD],
+        'atr_multiplier': atr_multiplier or [Config.ATR_MULTIPLIER_SL],
+        'reward_ratio': reward_ratio or [Config.RISK_REWARD_RATIOS[0]],
+    }
+    return [dict(zip(PARAMETERS, combo)) for combo in itertools.product(*(values[p] for p in PARAMETERS))]
+
+def _attach(name: str, shape, offsets):
+    # Workers share the parent's resource tracker, so the block is unlinked
+    # once, by the parent, when the sweep ends
+    shm = shared_memory.SharedMemory(name=name)
+    _shared['shm'] = shm
+    _shared['data'] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _shared['offsets'] = offsets
+
+def _evaluate(task):
+    """
+    Runs every combination of one (symbol, atr_period) work unit. RSI does
+    not depend on any swept parameter and comes precomputed from the parent,
+    ATR is computed once here for all combinations of the unit.
+    """
+    symbol_idx, atr_period, combos = task
+    lo, hi = _shared['offsets'][symbol_idx], _shared['offsets'][symbol_idx + 1]
+    high, low, close, rsi = (row[lo:hi] for row in _shared['data'])
+
+    df = pd.DataFrame({'high': high, 'low': low, 'close': close})
+    atr = SignalAnalysisService.calculate_atr(df, atr_period).to_numpy(dtype=float)
+
+    rows = []
+    for params in combos:
+        result = BacktestEngine.simulate(
+            high, low, close, atr, rsi,
+            atr_multiplier=params['atr_multiplier'],
+            ratio=params['reward_ratio'],
+            oversold=params['rsi_oversold'],
+            overbought=params['rsi_overbought'],
+        )
+        pnl = result['pnl']
+        equity = np.concatenate([[0.0], np.cumsum(pnl)])
+        drawdown = float((np.maximum.accumulate(equity) - equity).max())
+        rows.append({
+            'symbol_idx': symbol_idx,
+            **params,
+            'trades': len(pnl),
+            'wins': int((~result['is_loss']).sum()),
+            'pnl': float(pnl.sum()),
+            'max_drawdown': drawdown,
+        })
+    return rows
+
+class ParameterSweep:
+    """
+    Evaluates a parameter grid across many symbols on a process pool.
+
+    The candle arrays (and the RSI, which no swept parameter changes) are
+    copied once into a shared-memory block that every worker maps, instead
+    of being pickled into each task.
+    """
+
+    def __init__(self, candles: dict, workers: int = None):
+        # candles: symbol -> DataFrame with high/low/close columns
+        self.symbols = list(candles)
+        self.candles = candles
+        self.workers = workers or Config.SWEEP_WORKERS or os.cpu_count()
+
+    def _share(self):
+        lengths = [len(self.candles[s]) for s in self.symbols]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        shape = (4, int(offsets[-1]))
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for i, symbol in enumerate(self.symbols):
+            df = self.candles[symbol]
+            lo, hi = offsets[i], offsets[i + 1]
+            data[0, lo:hi] = df['high'].to_numpy(dtype=float)
+            data[1, lo:hi] = df['low'].to_numpy(dtype=float)
+            data[2, lo:hi] = df['close'].to_numpy(dtype=float)
+            data[3, lo:hi] = SignalAnalysisService.calculate_rsi(df).to_numpy(dtype=float)
+        del data
+        return shm, shape, offsets
+
+    def run(self, grid: list) -> pd.DataFrame:
+        """
+        Returns one row per parameter set, aggregated over all symbols and
+        ranked by total PnL.
+        """
+        # One work unit per (symbol, atr_period) so ATR is computed once per unit
+        by_period = defaultdict(list)
+        for params in grid:
+            by_period[params['atr_period']].append(params)
+        tasks = [(i, period, combos) for i in range(len(self.symbols)) for period, combos in by_period.items()]
+
+        shm, shape, offsets = self._share()
+        try:
+            with ProcessPoolExecutor(self.workers, initializer=_attach, initargs=(shm.name, shape, offsets)) as pool:
+                rows = [row for chunk in pool.map(_evaluate, tasks) for row in chunk]
+        finally:
+            shm.close()
+            shm.unlink()
+
+        per_symbol = pd.DataFrame(rows)
+        per_symbol['symbol'] = [self.symbols[i] for i in per_symbol.pop('symbol_idx')]
+        return self.rank(per_symbol)
+
+    @staticmethod
+    def rank(per_symbol: pd.DataFrame) -> pd.DataFrame:
+        table = per_symbol.groupby(PARAMETERS, as_index=False).agg(
+            symbols=('symbol', 'nunique'),
+            trades=('trades', 'sum'),
+            wins=('wins', 'sum'),
+            pnl=('pnl', 'sum'),
+            worst_drawdown=('max_drawdown', 'max'),
+        )
+        table['win_rate'] = np.where(table['trades'] > 0, table['wins'] / table['trades'].clip(lower=1) * 100, 0.0)
+        return table.sort_values(['pnl', 'win_rate'], ascending=False).reset_index(drop=True)
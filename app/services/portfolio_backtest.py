@@ -0,0 +1,241 @@
+import heapq
+from collections import deque
+from datetime import datetime, timezone
+from operator import itemgetter
+from config import Config
+from app.services.indicators import IndicatorState
+from app.services.backtest_engine import BacktestEngine
+
+def candle_feed(store, exchange_id: str, symbols, timeframe: str = None, since: int = None, until: int = None,
+                chunk: int = None):
+    """
+    Yields (timestamp, symbol, open, high, low, close, volume) for every
+    stored candle of `symbols`, merged in time order.
+
+    Each symbol is read from its memory-mapped file `chunk` candles at a
+    time and heapq.merge holds one pending row per symbol, so memory stays
+    flat however many years are replayed.
+    """
+    if chunk is None:
+        chunk = Config.PORTFOLIO_CHUNK
+
+    def rows(symbol):
+        candles = store.read(exchange_id, symbol, timeframe or Config.DEFAULT_TIMEFRAME, since, until)
+        for lo in range(0, len(candles), chunk):
+            block = candles[lo:lo + chunk]
+            yield from zip(
+                block['timestamp'].tolist(), [symbol] * len(block), block['open'].tolist(), block['high'].tolist(),
+                block['low'].tolist(), block['close'].tolist(), block['volume'].tolist(),
+            )
+
+    return heapq.merge(*(rows(symbol) for symbol in symbols), key=itemgetter(0))
+
+class Position:
+    __slots__ = ('symbol', 'is_long', 'entry', 'qty', 'remaining', 'sl', 'tps', 'tps_hit', 'opened_at', 'pnl', 'fees')
+
+    def __init__(self, symbol, is_long, entry, qty, sl, tps, opened_at):
+        self.symbol = symbol
+        self.is_long = is_long
+        self.entry = entry
+        self.qty = qty
+        self.remaining = qty
+        self.sl = sl
+        self.tps = tps
+        self.tps_hit = 0
+        self.opened_at = opened_at
+        self.pnl = 0.0
+        self.fees = 0.0
+
+class PortfolioBacktester:
+    """
+    Event-driven backtest of the RSI/ATR strategy over many symbols at once.
+
+    Candles are consumed one at a time from a time-merged feed (see
+    candle_feed). Each symbol holds at most one position, so a signal that
+    repeats while a trade is open is ignored instead of counted again.
+    Positions are sized to risk `risk_per_trade` of the balance at the SL,
+    capped at the balance not already committed to open positions (no
+    leverage), a share of the position is closed at each of the three TPs
+    and the rest at the SL. Entries and stops fill with slippage, TPs fill
+    at their limit price, and every fill pays `fee_rate`. Drawdown is
+    measured on equity marked to the last close after every candle.
+
+    Only aggregates and the last `keep_trades` trades are kept; pass
+    `on_trade` to stream every closed trade elsewhere.
+    """
+
+    def __init__(self, initial_balance: float = 1000, risk_per_trade: float = None, fee_rate: float = None,
+                 slippage: float = None, max_positions: int = None, tp_fractions=None, keep_trades: int = 100,
+                 on_trade=None):
+        self.initial_balance = initial_balance
+        self.balance = float(initial_balance)
+        self.risk_per_trade = Config.PORTFOLIO_RISK_PER_TRADE if risk_per_trade is None else risk_per_trade
+        self.fee_rate = Config.FEE_RATE if fee_rate is None else fee_rate
+        self.slippage = Config.SLIPPAGE if slippage is None else slippage
+        self.max_positions = max_positions or Config.PORTFOLIO_MAX_POSITIONS
+        self.tp_fractions = list(tp_fractions or Config.TP_FRACTIONS)
+        self.on_trade = on_trade
+
+        self.states = {}
+        self.bars = {}
+        self.last_close = {}
+        self.positions = {}
+        # Entry value of the open quantity of every position
+        self.committed = 0.0
+        self.trades = deque(maxlen=keep_trades)
+
+        self.candles = 0
+        self.closed_trades = 0
+        self.wins = 0
+        self.tp_hits = [0, 0, 0]
+        self.stopped = 0
+        self.fees = 0.0
+        self.peak = self.balance
+        self.max_drawdown = 0.0
+
+    def signal(self, symbol: str, high: float, low: float, close: float):
+        """
+        Folds the closed candle into the symbol's indicators and applies the
+        entry rule. Returns (is_long, atr) or None.
+        """
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = IndicatorState(Config.ATR_PERIOD)
+        state.update(None, high, low, close)
+        bars = self.bars[symbol] = self.bars.get(symbol, 0) + 1
+        # Same warm-up as BacktestEngine
+        if bars <= BacktestEngine.START_INDEX:
+            return None
+
+        atr, rsi = state.atr.value, state.rsi.value
+        if atr != atr or rsi != rsi:
+            return None
+        if rsi < Config.RSI_OVERSOLD:
+            return True, atr
+        if rsi > Config.RSI_OVERBOUGHT:
+            return False, atr
+        return None
+
+    def on_candle(self, timestamp: int, symbol: str, high: float, low: float, close: float):
+        self.candles += 1
+        self.last_close[symbol] = close
+
+        position = self.positions.get(symbol)
+        if position is not None:
+            self._manage(position, timestamp, high, low)
+
+        signal = self.signal(symbol, high, low, close)
+        if signal is not None and symbol not in self.positions and len(self.positions) < self.max_positions:
+            self._open(symbol, timestamp, close, *signal)
+
+        equity = self.equity()
+        self.peak = max(self.peak, equity)
+        if self.peak > 0:
+            self.max_drawdown = max(self.max_drawdown, (self.peak - equity) / self.peak)
+
+    def equity(self) -> float:
+        # Balance plus open positions marked at their symbol's last close
+        unrealized = 0.0
+        for position in self.positions.values():
+            side = 1 if position.is_long else -1
+            unrealized += (self.last_close[position.symbol] - position.entry) * position.remaining * side
+        return self.balance + unrealized
+
+    def run(self, feed):
+        for timestamp, symbol, _, high, low, close, _ in feed:
+            self.on_candle(timestamp, symbol, high, low, close)
+        return self.report()
+
+    def _fill(self, position: Position, qty: float, price: float):
+        side = 1 if position.is_long else -1
+        fee = price * qty * self.fee_rate
+        pnl = (price - position.entry) * qty * side - fee
+        position.remaining -= qty
+        self.committed -= position.entry * qty
+        position.pnl += pnl
+        position.fees += fee
+        self.fees += fee
+        self.balance += pnl
+
+    def _open(self, symbol, timestamp, close, is_long, atr):
+        # Market entry at the signal candle's close, filled with slippage
+        entry = close * (1 + self.slippage if is_long else 1 - self.slippage)
+        sl_dist = atr * Config.ATR_MULTIPLIER_SL
+        side = 1 if is_long else -1
+        sl = close - side * sl_dist
+        tps = [close + side * atr * ratio for ratio in Config.RISK_REWARD_RATIOS[:3]]
+
+        risk = abs(entry - sl)
+        free = self.balance - self.committed
+        if risk <= 0 or self.balance <= 0 or free <= 0:
+            return
+        qty = min(self.balance * self.risk_per_trade / risk, free / entry)
+
+        position = Position(symbol, is_long, entry, qty, sl, tps, timestamp)
+        fee = entry * qty * self.fee_rate
+        position.pnl -= fee
+        position.fees += fee
+        self.fees += fee
+        self.balance -= fee
+        self.committed += entry * qty
+        self.positions[symbol] = position
+
+    def _manage(self, position: Position, timestamp: int, high: float, low: float):
+        long_ = position.is_long
+        # SL first on a candle that touches both, like BacktestEngine
+        if (low <= position.sl) if long_ else (high >= position.sl):
+            price = position.sl * (1 - self.slippage if long_ else 1 + self.slippage)
+            self._fill(position, position.remaining, price)
+            self.stopped += 1
+            self._close(position, timestamp, 'SL')
+            return
+
+        while position.tps_hit < len(position.tps):
+            tp = position.tps[position.tps_hit]
+            if not ((high >= tp) if long_ else (low <= tp)):
+                break
+            last = position.tps_hit == len(position.tps) - 1
+            qty = position.remaining if last else position.qty * self.tp_fractions[position.tps_hit]
+            self._fill(position, min(qty, position.remaining), tp)
+            self.tp_hits[position.tps_hit] += 1
+            position.tps_hit += 1
+        if position.tps_hit == len(position.tps):
+            self._close(position, timestamp, f"TP{position.tps_hit}")
+
+    def _close(self, position: Position, timestamp: int, reason: str):
+        del self.positions[position.symbol]
+        self.closed_trades += 1
+        if position.pnl > 0:
+            self.wins += 1
+
+        trade = {
+            "symbol": position.symbol,
+            "type": "LONG" if position.is_long else "SHORT",
+            "opened": datetime.fromtimestamp(position.opened_at / 1000, timezone.utc).replace(tzinfo=None),
+            "closed": datetime.fromtimestamp(timestamp / 1000, timezone.utc).replace(tzinfo=None),
+            "entry": position.entry,
+            "outcome": reason,
+            "tps_hit": position.tps_hit,
+            "pnl": position.pnl,
+            "fees": position.fees,
+        }
+        self.trades.append(trade)
+        if self.on_trade is not None:
+            self.on_trade(trade)
+
+    def report(self) -> dict:
+        return {
+            "candles": self.candles,
+            "initial_balance": self.initial_balance,
+            "final_balance": self.balance,
+            "equity": self.equity(),
+            "trades": self.closed_trades,
+            "wins": self.wins,
+            "losses": self.closed_trades - self.wins,
+            "tp_hits": list(self.tp_hits),
+            "stopped": self.stopped,
+            "fees": self.fees,
+            "max_drawdown": self.max_drawdown,
+            "open_positions": len(self.positions),
+            "recent_trades": list(self.trades),
+        }
@@ -0,0 +1,72 @@
+import asyncio
+import random
+import time
+from config import Config
+
+class TokenBucket:
+    """
+    Async token bucket shared by every request to one exchange.
+
+    `rate` tokens are added per second up to `capacity`, and each request
+    takes `cost` tokens (its API weight). After a 429 the whole bucket is
+    paused with backoff(), so concurrent workers all slow down together.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def for_exchange(cls, exchange):
+        """
+        Builds a bucket from Config, falling back to the ccxt `rateLimit`
+        (milliseconds between requests) of the exchange.
+        """
+        rate = Config.RATE_LIMIT_PER_SECOND
+        if not rate:
+            rate = 1000 / max(getattr(exchange, 'rateLimit', 1000) or 1000, 1)
+        return cls(rate, Config.RATE_LIMIT_BURST)
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, cost: float = 1):
+        # Waiters are served in order, the lock is held while sleeping
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill(now)
+                # A request heavier than the whole bucket (a bulk ticker call)
+                # goes out once it is full and leaves it in debt
+                needed = min(cost, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Pauses the bucket after a rate-limit error. Returns the delay in seconds.
+        """
+        delay = min(Config.RATE_LIMIT_BACKOFF * 2 ** attempt, Config.RATE_LIMIT_MAX_BACKOFF)
+        delay *= random.uniform(0.8, 1.2)
+        self.pause(delay)
+        return delay
+
+    def pause(self, delay: float):
+        """
+        Blocks every acquire() for `delay` seconds (e.g. a server-side flood wait).
+        """
+        # Start refilling from empty once the pause is over
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self.tokens = 0
+        self.updated = self.blocked_until
@@ -0,0 +1,94 @@
+import numpy as np
+from app.services.candles import Candles
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+def can_resample(timeframe_ms: int, base_ms: int) -> bool:
+    """
+    Whether `timeframe` candles can be built from `base` candles. Buckets are
+    aligned to the epoch, which matches exchange candles up to 1d.
+    """
+    return timeframe_ms > base_ms and timeframe_ms % base_ms == 0 and DAY_MS % timeframe_ms == 0
+
+def resample(rows: np.ndarray, timeframe_ms: int) -> np.ndarray:
+    """
+    Aggregates (n, 6) OHLCV rows, oldest first, into `timeframe_ms` candles.
+    """
+    if len(rows) == 0:
+        return np.empty((0, 6))
+    bucket = rows[:, 0] // timeframe_ms * timeframe_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(rows)] - 1
+
+    out = np.empty((len(starts), 6))
+    out[:, 0] = bucket[starts]
+    out[:, 1] = rows[starts, 1]
+    out[:, 2] = np.maximum.reduceat(rows[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(rows[:, 3], starts)
+    out[:, 4] = rows[ends, 4]
+    out[:, 5] = np.add.reduceat(rows[:, 5], starts)
+    return out
+
+def _extend(data: np.ndarray, new: np.ndarray) -> np.ndarray:
+    # new[0] may continue the candle data[-1] is building
+    if len(data) and len(new) and data[-1, 0] == new[0, 0]:
+        last = data[-1].copy()
+        last[2] = max(last[2], new[0, 2])
+        last[3] = min(last[3], new[0, 3])
+        last[4] = new[0, 4]
+        last[5] += new[0, 5]
+        return np.concatenate([data[:-1], last[None], new[1:]])
+    return np.concatenate([data, new])
+
+class ResampledSeries:
+    """
+    Candles of one timeframe rolled forward from a finer base feed.
+
+    The series is seeded once with the exchange's closed candles, after that
+    only closed base candles are folded in, so keeping 15m, 1h and 4h
+    current costs one base fetch instead of one fetch per timeframe. The
+    forming candle of this timeframe is always built from base candles, so
+    the base window has to reach back to its start. The forming base
+    candle is laid over a copy in window() and never stored.
+    """
+
+    def __init__(self, timeframe_ms: int, base_ms: int, maxlen: int):
+        self.timeframe_ms = timeframe_ms
+        self.base_ms = base_ms
+        self.maxlen = maxlen
+        self.data = np.empty((0, 6))
+        # Base candles starting before this are already in `data`
+        self.folded_until = 0
+
+    def seed(self, rows, now: int):
+        """
+        Starts from exchange candles of this timeframe fetched at `now`.
+        The forming one is dropped: part of its volume would be folded in
+        again from the base candles.
+        """
+        data = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        data = data[data[:, 0] + self.timeframe_ms <= now]
+        self.data = data[-self.maxlen:]
+        # Base candles after the last closed one are folded in, including
+        # a closed candle the exchange did not list yet
+        self.folded_until = int(data[-1, 0]) + self.timeframe_ms if len(data) else 0
+
+    def covers(self, base_start: int) -> bool:
+        # False when base candles were missed and the series must be seeded again
+        return len(self.data) > 0 and base_start <= self.folded_until
+
+    def fold(self, rows: np.ndarray):
+        """
+        Folds closed base rows in, skipping the ones already folded.
+        """
+        rows = rows[rows[:, 0] >= self.folded_until]
+        if len(rows) == 0:
+            return
+        self.folded_until = int(rows[-1, 0]) + self.base_ms
+        self.data = _extend(self.data, resample(rows, self.timeframe_ms))[-self.maxlen:]
+
+    def window(self, limit: int, forming: np.ndarray = None) -> Candles:
+        data = self.data[-limit:]
+        if forming is not None and len(forming):
+            data = _extend(data, resample(forming, self.timeframe_ms))[-limit:]
+        return Candles.from_ohlcv(data)
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+from config import Config
+from app.services.signal_analysis import SignalAnalysisService
+from app.services.backtest_engine import BacktestEngine
+
+def walk_forward_splits(n: int, folds: int = None, train_ratio: float = None, anchored: bool = False):
+    """
+    (train_start, train_end, test_end) bar ranges for a walk-forward test.
+
+    The history is cut into `folds` test windows that follow each other,
+    each preceded by a training window `train_ratio` times as long. Rolling
+    windows keep the training length fixed, anchored ones always start at
+    bar 0. Ends are exclusive.
+    """
+    if folds is None:
+        folds = Config.WALK_FORWARD_FOLDS
+    if train_ratio is None:
+        train_ratio = Config.WALK_FORWARD_TRAIN_RATIO
+
+    test = int(n / (folds + train_ratio))
+    train = n - folds * test
+    if test <= 0 or train <= 0:
+        return []
+    splits = []
+    for i in range(folds):
+        train_end = train + i * test
+        train_start = 0 if anchored else train_end - train
+        splits.append((train_start, train_end, train_end + test))
+    return splits
+
+def _summary(result: dict) -> dict:
+    pnl = result['pnl']
+    return {
+        'trades': len(pnl),
+        'wins': int((~result['is_loss']).sum()),
+        'pnl': float(pnl.sum()),
+    }
+
+def walk_forward(df: pd.DataFrame, grid: list, folds: int = None, train_ratio: float = None, anchored: bool = False):
+    """
+    Picks the best parameter set (by PnL) on each training window and
+    trades it, unchanged, on the test window that follows.
+
+    Indicators are computed once per ATR period over the whole history
+    (they are causal). A window only takes entries inside it and resolves
+    trades on its own candles, so the test windows never see the future
+    and the training windows never see the test.
+
+    Returns one row per fold plus the out-of-sample totals: `efficiency`
+    is the out-of-sample PnL per bar over the in-sample PnL per bar, the
+    usual overfitting check (near 1 is robust, near 0 or below is fitted
+    noise).
+    """
+    high = df['high'].to_numpy(dtype=float)
+    low = df['low'].to_numpy(dtype=float)
+    close = df['close'].to_numpy(dtype=float)
+    rsi = SignalAnalysisService.calculate_rsi(df).to_numpy(dtype=float)
+    atrs = {}
+
+    def simulate(params, lo, hi):
+        period = params['atr_period']
+        if period not in atrs:
+            atrs[period] = SignalAnalysisService.calculate_atr(df, period).to_numpy(dtype=float)
+        return BacktestEngine.simulate(
+            high[:hi], low[:hi], close[:hi], atrs[period][:hi], rsi[:hi],
+            atr_multiplier=params['atr_multiplier'],
+            ratio=params['reward_ratio'],
+            start=max(lo, BacktestEngine.START_INDEX),
+            oversold=params['rsi_oversold'],
+            overbought=params['rsi_overbought'],
+        )
+
+    rows = []
+    for fold, (train_start, train_end, test_end) in enumerate(walk_forward_splits(len(df), folds, train_ratio, anchored)):
+        best, best_train = None, None
+        for params in grid:
+            train = _summary(simulate(params, train_start, train_end))
+            if best_train is None or train['pnl'] > best_train['pnl']:
+                best, best_train = params, train
+        test_result = simulate(best, train_end, test_end)
+        test = _summary(test_result)
+        rows.append({
+            'fold': fold,
+            'train_bars': train_end - train_start,
+            'test_bars': test_end - train_end,
+            **best,
+            'train_trades': best_train['trades'],
+            'train_pnl': best_train['pnl'],
+            'test_trades': test['trades'],
+            'test_wins': test['wins'],
+            'test_pnl': test['pnl'],
+            'test_trade_pnl': test_result['pnl'],
+        })
+
+    train_rate = sum(r['train_pnl'] for r in rows) / max(sum(r['train_bars'] for r in rows), 1)
+    test_rate = sum(r['test_pnl'] for r in rows) / max(sum(r['test_bars'] for r in rows), 1)
+    return {
+        'folds': rows,
+        'test_trades': sum(r['test_trades'] for r in rows),
+        'test_pnl': sum(r['test_pnl'] for r in rows),
+        'efficiency': test_rate / train_rate if train_rate > 0 else float('nan'),
+        # Out-of-sample trades in time order, e.g. for monte_carlo()
+        'test_trade_pnl': np.concatenate([r.pop('test_trade_pnl') for r in rows]) if rows else np.empty(0),
+    }
+
+def monte_carlo(pnl, initial_balance: float = 1000, resamples: int = None, seed: int = None, points: int = None,
+                percentiles=(5, 25, 50, 75, 95), chunk: int = None) -> dict:
+    """
+    Bootstraps the trade sequence: `resamples` equity curves, each drawing
+    len(pnl) trades with replacement.
+
+    Resamples are built `chunk` cells (resamples x trades) at a time with
+    one integer draw, a gather and a cumulative sum, so hundreds of
+    thousands of curves take seconds and bounded memory. Each curve keeps
+    `points` evenly spaced equity values for the confidence bands.
+
+    Returns the final balance and max drawdown (in $ and as a fraction of
+    the running peak) at each percentile, the probability of ending below
+    the initial balance and of the balance reaching zero, and the bands:
+    {percentile: equity at each of `steps`}.
+    """
+    if resamples is None:
+        resamples = Config.MONTE_CARLO_RESAMPLES
+    if points is None:
+        points = Config.MONTE_CARLO_POINTS
+    if chunk is None:
+        chunk = Config.MONTE_CARLO_CHUNK
+
+    pnl = np.asarray(pnl, dtype=float)
+    m = len(pnl)
+    if m == 0:
+        return None
+
+    rng = np.random.default_rng(seed)
+    initial_balance = float(initial_balance)
+    steps = np.unique(np.linspace(0, m, min(points, m) + 1).round().astype(np.int64))
+    finals = np.empty(resamples)
+    drawdowns = np.empty(resamples)
+    drawdown_pcts = np.empty(resamples)
+    ruined = 0
+    curves = np.empty((resamples, len(steps)), dtype=np.float32)
+
+    rows = max(1, chunk // m)
+    for lo in range(0, resamples, rows):
+        hi = min(lo + rows, resamples)
+        equity = np.empty((hi - lo, m + 1))
+        equity[:, 0] = initial_balance
+        np.cumsum(pnl[rng.integers(0, m, size=(hi - lo, m))], axis=1, out=equity[:, 1:])
+        equity[:, 1:] += initial_balance
+
+        peak = np.maximum.accumulate(equity, axis=1)
+        drawdown = peak - equity
+        finals[lo:hi] = equity[:, -1]
+        drawdowns[lo:hi] = drawdown.max(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown_pcts[lo:hi] = np.nanmax(np.where(peak > 0, drawdown / peak, 1.0), axis=1)
+        ruined += int((equity.min(axis=1) <= 0).sum())
+        curves[lo:hi] = equity[:, steps]
+
+    q = list(percentiles)
+    return {
+        'resamples': resamples,
+        'trades': m,
+        'final_balance': dict(zip(q, np.percentile(finals, q).tolist())),
+        'max_drawdown': dict(zip(q, np.percentile(drawdowns, q).tolist())),
+        'max_drawdown_pct': dict(zip(q, np.percentile(drawdown_pcts, q).tolist())),
+        'prob_loss': float((finals < initial_balance).mean()),
+        'prob_ruin': ruined / resamples,
+        'steps': steps,
+        'bands': dict(zip(q, np.percentile(curves, q, axis=0))),
+    }
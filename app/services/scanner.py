@@ -1,54 +1,274 @@
 import asyncio
 import logging
+import sqlite3
+import time
+from datetime import datetime, timezone
+import numpy as np
 from aiogram import Bot
 from config import Config
 from app.services.market_data import MarketDataService
 from app.services.signal_analysis import SignalAnalysisService
-from app.bot.formatting import format_signal_message
+from app.services.indicator_cache import IndicatorCache
+from app.services.analysis_pool import AnalysisPool
+from app.services.metrics import (
+    STAGE_SECONDS, SCAN_PASS_SECONDS, SYMBOLS_SCANNED, SIGNALS_EMITTED, SIGNALS_SUPPRESSED,
+    SIGNAL_LATENCY_SECONDS,
+)
+from app.services.notifier import NotificationService
+from app.services.signal_store import SignalStore
+from app.services.scheduler import CandleCloseScheduler
+from app.services.universe import UniverseScreener
+from app.services.streaming import KlineStream
 
 class ScannerService:
-    def __init__(self, bot: Bot):
+    def __init__(self, bot: Bot, market_service: MarketDataService = None, notifier: NotificationService = None,
+                 signal_store: SignalStore = None, indicator_cache: IndicatorCache = None,
+                 analysis_pool: AnalysisPool = None):
         self.bot = bot
-        self.market_service = MarketDataService()
+        # Signals are handed to the notifier's queue, a scan never waits on Telegram
+        self.owns_notifier = notifier is None
+        self.notifier = notifier or NotificationService(bot)
+        # Requests are paced by the market service's rate limiter, so the
+        # scan itself only bounds how many symbols are in flight at once
+        self.owns_market_service = market_service is None
+        self.market_service = market_service or MarketDataService()
+        # ATR/RSI carried across passes, only new candles are folded in. Pass
+        # the cache /signal uses so both share the work
+        self.indicators = indicator_cache or IndicatorCache()
+        # Indicator work runs in a worker pool, the loop keeps serving commands
+        self.owns_analysis_pool = analysis_pool is None
+        self.analysis_pool = analysis_pool or AnalysisPool()
+        # Without a store every signal is sent, even if it is still open
+        self.signal_store = signal_store
         self.is_running = False
+        # Streaming mode: (signal, candle close) waiting for the digest
+        self.streaming = False
+        self._stream_signals = []
+        self._flush_task = None
+
+    async def scan_symbol(self, symbol: str, timeframe: str = None, close_ts: int = None):
+        """
+        Evaluates the latest candle of one symbol. With close_ts (a candle
+        close from the scheduler) the candle that just closed is evaluated
+        instead of the one forming after it.
+        """
+        if timeframe is None:
+            timeframe = Config.DEFAULT_TIMEFRAME
+        logging.info(f"🔍 Scanning {symbol} {timeframe}...")
+        SYMBOLS_SCANNED.inc(exchange=self.market_service.exchange_id)
+
+        with STAGE_SECONDS.time(stage='fetch', exchange=self.market_service.exchange_id) as timer:
+            exchange, candles = await self.market_service.fetch_candles_with_source(symbol, timeframe)
+            # Timed against the exchange that answered, a backup when the primary was hedged
+            timer.labels['exchange'] = exchange
+        if candles is None:
+            return None
+        forming = close_ts is None
+        if not forming:
+            candles = candles[:int(np.searchsorted(candles.timestamp, close_ts))]
+            if len(candles) == 0:
+                return None
+
+        return await self.evaluate(symbol, timeframe, candles, forming, exchange)
+
+    async def evaluate(self, symbol: str, timeframe: str, candles, forming: bool = True, exchange: str = None):
+        """
+        Folds the window into the indicator cache and applies the entry
+        rules to its last candle. Returns the signal or None. `exchange` is
+        the one the candles came from, the market service's by default.
+        """
+        if exchange is None:
+            exchange = self.market_service.exchange_id
+        with STAGE_SECONDS.time(stage='indicators', exchange=exchange):
+            atr_value, rsi_value = await self.indicators.latest_in(
+                self.analysis_pool, exchange, symbol, timeframe, candles, forming
+            )
+            signal = SignalAnalysisService.build_signal(
+                symbol, float(candles.close[-1]), atr_value, rsi_value, candles.datetime_at(-1)
+            )
+
+        if signal and "error" not in signal:
+            logging.info(f"✅ Signal found for {symbol} {timeframe}!")
+            signal['timeframe'] = timeframe
+            signal['exchange'] = exchange
+            SIGNALS_EMITTED.inc(exchange=exchange, symbol=symbol, direction=signal['direction'])
+            return signal
+
+        logging.info(f"No signal for {symbol} {timeframe}.")
+        return None
+
+    async def scan_pass(self, symbols=None, concurrency: int = None, timeframes=None, closes: dict = None):
+        """
+        Scans every (symbol, timeframe) once with a fixed pool of workers,
+        then queues the new signals as one digest. Returns the new signals.
+        closes maps timeframes to the candle close being scanned, if any.
+        """
+        if symbols is None:
+            symbols = Config.SYMBOLS_TO_SCAN
+        if concurrency is None:
+            concurrency = Config.SCAN_CONCURRENCY
+        if timeframes is None:
+            timeframes = list(closes) if closes else Config.SCAN_TIMEFRAMES
+        if closes is None:
+            closes = {}
+
+        # The timeframes of a symbol are queued together, so with local
+        # resampling they share one in-flight base fetch
+        pairs = [(symbol, timeframe) for symbol in symbols for timeframe in timeframes]
+        queue = asyncio.Queue()
+        for pair in pairs:
+            queue.put_nowait(pair)
+
+        signals = []
+
+        async def worker():
+            while True:
+                try:
+                    symbol, timeframe = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    signal = await self.scan_symbol(symbol, timeframe, closes.get(timeframe))
+                    if signal:
+                        signals.append(signal)
+                except Exception as e:
+                    logging.error(f"Error scanning {symbol} {timeframe}: {e}")
+
+        workers = max(1, min(concurrency, len(pairs)))
+        with SCAN_PASS_SECONDS.time():
+            await asyncio.gather(*(worker() for _ in range(workers)))
+
+        if signals:
+            # Digest in scan order rather than completion order
+            order = {pair: i for i, pair in enumerate(pairs)}
+            signals.sort(key=lambda signal: order[signal['symbol'], signal['timeframe']])
+            signals = await self._unsent(signals)
+        if signals:
+            self.notifier.publish_digest(signals)
+            now = self.market_service.now()
+            for timeframe in {signal['timeframe'] for signal in signals} & closes.keys():
+                SIGNAL_LATENCY_SECONDS.observe((now - closes[timeframe]) / 1000, timeframe=timeframe)
+        return signals
+
+    async def _unsent(self, signals):
+        # Drops signals whose previous copy is still open in the store. SQLite
+        # runs in a thread, the loop keeps serving commands meanwhile
+        if self.signal_store is None:
+            return signals
+        return await asyncio.to_thread(self._record_fresh, signals)
+
+    def _record_fresh(self, signals):
+        fresh = []
+        for signal in signals:
+            exchange = signal.get('exchange', self.market_service.exchange_id)
+            try:
+                signal_id = self.signal_store.record(signal, exchange, signal['timeframe'])
+            except sqlite3.IntegrityError as e:
+                logging.error(f"Signal for {signal['symbol']} could not be stored ({e}), not sending it.")
+                continue
+            if signal_id is None:
+                SIGNALS_SUPPRESSED.inc(exchange=exchange)
+                logging.info(f"Signal for {signal['symbol']} is already open, not sending it again.")
+            else:
+                fresh.append(signal)
+        return fresh
 
     async def start_scanning(self):
+        """
+        Scans each timeframe a few seconds after its candles close. With
+        UNIVERSE_SCAN every tick first screens the whole exchange and only
+        the tiers due on that tick are scanned.
+        """
         self.is_running = True
         logging.info("🚀 Scanner started...")
-        
-        while self.is_running:
+
+        await self.market_service.sync_clock()
+        synced_at = time.monotonic()
+        scheduler = CandleCloseScheduler(Config.SCAN_TIMEFRAMES, self.market_service.now)
+        screener = UniverseScreener(self.market_service) if Config.UNIVERSE_SCAN else None
+        tick = 0
+
+        async for closes in scheduler.ticks():
+            if not self.is_running:
+                break
             try:
-                for symbol in Config.SYMBOLS_TO_SCAN:
-                    logging.info(f"🔍 Scanning {symbol}...")
-                    df = await self.market_service.fetch_ohlcv(symbol)
-                    
-                    if df is not None:
-                        signal = SignalAnalysisService.generate_signal(symbol, df)
-                        
-                        if signal and "error" not in signal:
-                            logging.info(f"✅ Signal found for {symbol}!")
-                            msg = format_signal_message(signal)
-                            
-                            if Config.ADMIN_ID != 0:
-                                try:
-                                    await self.bot.send_message(Config.ADMIN_ID, msg, parse_mode="Markdown")
-                                except Exception as e:
-                                    logging.error(f"Failed to send message to admin: {e}")
-                            else:
-                                logging.warning("⚠️ Signal found but ADMIN_ID is not set in config.")
-                        else:
-                            logging.info(f"No signal for {symbol}.")
-                    
-                    # Small delay between symbols to avoid rate limits
-                    await asyncio.sleep(2)
-                
-                logging.info(f"💤 Sleeping for {Config.SCAN_INTERVAL} seconds...")
-                await asyncio.sleep(Config.SCAN_INTERVAL)
-                
+                symbols = None
+                if screener is not None:
+                    await screener.refresh()
+                    symbols = screener.due(tick)
+                tick += 1
+                await self.scan_pass(symbols, closes=closes)
             except Exception as e:
                 logging.error(f"Error in scanner loop: {e}")
-                await asyncio.sleep(60) # Wait a bit before retrying on error
+
+            if time.monotonic() - synced_at > Config.CLOCK_SYNC_INTERVAL:
+                await self.market_service.sync_clock()
+                synced_at = time.monotonic()
+            logging.info(f"💤 Next close at {datetime.fromtimestamp(scheduler.next_close() / 1000, timezone.utc):%H:%M:%S} UTC")
+
+    async def start_streaming(self, symbols=None, timeframes=None):
+        """
+        Evaluates each (symbol, timeframe) the moment its candle closes on
+        the exchange's WebSocket stream instead of polling REST. Returns
+        False without streaming if there is no stream for the exchange, the
+        caller should then start_scanning().
+        """
+        if not KlineStream.supports(self.market_service.exchange_id):
+            logging.warning(f"No kline stream for {self.market_service.exchange_id}, scanning over REST")
+            return False
+        if symbols is None:
+            symbols = Config.SYMBOLS_TO_SCAN
+        if timeframes is None:
+            timeframes = Config.SCAN_TIMEFRAMES
+        self.is_running = True
+        self.streaming = True
+        logging.info(f"📡 Streaming {len(symbols)} symbols x {len(timeframes)} timeframes...")
+        await self.market_service.start_stream(symbols, timeframes, self.on_candle_close)
+        return True
+
+    async def on_candle_close(self, symbol: str, timeframe: str):
+        SYMBOLS_SCANNED.inc(exchange=self.market_service.exchange_id)
+        candles = self.market_service.stream.candles(symbol, timeframe, Config.DEFAULT_LIMIT, forming=False)
+        if candles is None:
+            return
+        signal = await self.evaluate(symbol, timeframe, candles, forming=False)
+        if signal is None:
+            return
+
+        close_ts = int(candles.timestamp[-1]) + self.market_service.stream.windows[symbol, timeframe].timeframe_ms
+        self._queue_stream_signal(signal, close_ts)
+
+    def _queue_stream_signal(self, signal: dict, close_ts: int):
+        self._stream_signals.append((signal, close_ts))
+        # Closes of one candle arrive within a moment of each other: one digest for all of them
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_stream_signals())
+
+    async def _flush_stream_signals(self):
+        await asyncio.sleep(Config.STREAM_DIGEST_DELAY)
+        # Signals queued while the store was checked go out in another digest
+        # from this task: a running flush is not restarted for them
+        while self._stream_signals:
+            pending, self._stream_signals = self._stream_signals, []
+            signals = await self._unsent([signal for signal, _ in pending])
+            if not signals:
+                continue
+            self.notifier.publish_digest(signals)
+            now = self.market_service.now()
+            sent = {id(signal) for signal in signals}
+            for signal, close_ts in pending:
+                if id(signal) in sent:
+                    SIGNAL_LATENCY_SECONDS.observe((now - close_ts) / 1000, timeframe=signal['timeframe'])
 
     async def stop(self):
         self.is_running = False
-        await self.market_service.close()
+        if self.streaming:
+            await self.market_service.stop_stream()
+            self.streaming = False
+        if self.owns_notifier:
+            await self.notifier.close()
+        if self.owns_analysis_pool:
+            self.analysis_pool.shutdown(wait=False)
+        # A shared market service is closed by whoever created it
+        if self.owns_market_service:
+            await self.market_service.close()
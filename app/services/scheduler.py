@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import random
+from config import Config
+from app.services.metrics import SCHEDULE_LAG_SECONDS, SCHEDULE_MISSED
+
+class CandleCloseScheduler:
+    """
+    Yields a tick shortly after candles close on the exchange clock.
+
+    Each tick is {timeframe: close_ts} for every timeframe whose candle
+    closed since the last tick, so the 15m and 1h closes at the top of the
+    hour come out together and are scanned in one pass. A tick fires
+    `delay` seconds after the close (exchanges publish the final candle
+    with a short lag) plus up to `jitter` random seconds to spread load.
+    If the consumer stalls past one or more closes, the missed ones are
+    skipped and the next tick carries only the latest close.
+    """
+
+    def __init__(self, timeframes, clock, delay: float = None, jitter: float = None, sleep=asyncio.sleep):
+        if delay is None:
+            delay = Config.SCHEDULE_DELAY
+        if jitter is None:
+            jitter = Config.SCHEDULE_JITTER
+        # clock() returns the exchange time in milliseconds
+        self.clock = clock
+        self.delay_ms = int(delay * 1000)
+        self.jitter = jitter
+        self.sleep = sleep
+        from ccxt.base.exchange import Exchange
+        self.timeframe_ms = {tf: Exchange.parse_timeframe(tf) * 1000 for tf in timeframes}
+
+        # Closes already handled: start with the candles forming now
+        now = self.clock()
+        self.last_close = {tf: now // ms * ms for tf, ms in self.timeframe_ms.items()}
+
+    def next_close(self) -> int:
+        return min(self.last_close[tf] + ms for tf, ms in self.timeframe_ms.items())
+
+    def due(self, now: int) -> dict:
+        """
+        {timeframe: latest close} for the timeframes due at `now`, marking
+        them handled. Closes skipped in between are counted as missed.
+        """
+        ready = now - self.delay_ms
+        closes = {}
+        for tf, ms in self.timeframe_ms.items():
+            close = ready // ms * ms
+            if close > self.last_close[tf]:
+                missed = (close - self.last_close[tf]) // ms - 1
+                if missed:
+                    SCHEDULE_MISSED.inc(missed, timeframe=tf)
+                    logging.warning(f"⏭️ Skipped {missed} missed {tf} close(s)")
+                self.last_close[tf] = close
+                closes[tf] = close
+        return closes
+
+    async def ticks(self):
+        while True:
+            wake = self.next_close() + self.delay_ms
+            now = self.clock()
+            if now < wake:
+                await self.sleep((wake - now) / 1000 + random.uniform(0, self.jitter))
+                now = self.clock()
+
+            closes = self.due(now)
+            if not closes:
+                # Woke early (clock adjusted), go back to sleep
+                continue
+            for tf, close in closes.items():
+                SCHEDULE_LAG_SECONDS.observe((now - close) / 1000, timeframe=tf)
+            yield closes
@@ -1,12 +1,13 @@
-import pandas as pd
+from __future__ import annotations
+import importlib.util
 import numpy as np
 from config import Config
+from app.services.candles import Candles
+from app.services.indicators import batch_atr, batch_rsi, latest_indicators
 
-try:
-    import pandas_ta as ta
-    HAS_PANDAS_TA = True
-except ImportError:
-    HAS_PANDAS_TA = False
+# pandas and pandas_ta are only imported by the DataFrame functions below,
+# the live path works on Candles and never loads them
+HAS_PANDAS_TA = importlib.util.find_spec("pandas_ta") is not None
 
 class SignalAnalysisService:
     @staticmethod
@@ -15,41 +16,11 @@ class SignalAnalysisService:
             period = Config.ATR_PERIOD
             
         if HAS_PANDAS_TA:
+            import pandas_ta  # registers the df.ta accessor
             return df.ta.atr(length=period)
         else:
-            # Manual ATR Calculation
-            high = df['high']
-            low = df['low']
-            close = df['close']
-            
-            tr1 = high - low
-            tr2 = (high - close.shift()).abs()
-            tr3 = (low - close.shift()).abs()
-            
-            tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-            atr = tr.rolling(window=period).mean() # Simple Moving Average of TR
-            # For Wilder's smoothing (RMA), which is standard for ATR:
-            # atr = tr.ewm(alpha=1/period, adjust=False).mean() 
-            # Using simple rolling mean for simplicity if pandas_ta fails, 
-import pandas as pd
-import numpy as np
-from config import Config
-
-try:
-    import pandas_ta as ta
-    HAS_PANDAS_TA = True
-except ImportError:
-    HAS_PANDAS_TA = False
+            import pandas as pd
 
-class SignalAnalysisService:
-    @staticmethod
-    def calculate_atr(df: pd.DataFrame, period: int = None) -> pd.Series:
-        if period is None:
-            period = Config.ATR_PERIOD
-            
-        if HAS_PANDAS_TA:
-            return df.ta.atr(length=period)
-        else:
             # Manual ATR Calculation
             high = df['high']
             low = df['low']
@@ -72,6 +43,7 @@ class SignalAnalysisService:
     @staticmethod
     def calculate_rsi(df: pd.DataFrame, period: int = 14) -> pd.Series:
         if HAS_PANDAS_TA:
+            import pandas_ta  # registers the df.ta accessor
             return df.ta.rsi(length=period)
         else:
             # Manual RSI Calculation
@@ -92,10 +64,13 @@ class SignalAnalysisService:
             return rsi
 
     @staticmethod
-    def generate_signal(symbol: str, df: pd.DataFrame):
+    def generate_signal(symbol: str, df: pd.DataFrame | Candles):
         """
         Generates a trading signal based on the latest data.
         """
+        if isinstance(df, Candles):
+            return SignalAnalysisService.generate_signal_from_candles(symbol, df)
+
         if df is None or df.empty:
             return None
 
@@ -105,20 +80,45 @@ class SignalAnalysisService:
         
         # Get latest candle
         latest = df.iloc[-1]
-        current_price = latest['close']
-        atr_value = latest['ATR']
-        rsi_value = latest['RSI']
-        
-        if pd.isna(atr_value) or pd.isna(rsi_value):
+        return SignalAnalysisService.build_signal(
+            symbol, latest['close'], latest['ATR'], latest['RSI'], latest['timestamp']
+        )
+
+    @staticmethod
+    def generate_signal_from_candles(symbol: str, candles: Candles, cache=None, exchange_id: str = None,
+                                     timeframe: str = None):
+        """
+        generate_signal for the live path: no DataFrame, nothing is mutated.
+        Indicators follow the manual Wilder path. With an IndicatorCache the
+        values are shared with the scanner instead of recomputed.
+        """
+        if candles is None or len(candles) == 0:
+            return None
+
+        if cache is not None:
+            atr_value, rsi_value = cache.latest(exchange_id, symbol, timeframe or Config.DEFAULT_TIMEFRAME, candles)
+        else:
+            atr_value, rsi_value = latest_indicators(candles.high, candles.low, candles.close)
+        return SignalAnalysisService.build_signal(
+            symbol, float(candles.close[-1]), atr_value, rsi_value, candles.datetime_at(-1)
+        )
+
+    @staticmethod
+    def build_signal(symbol: str, current_price: float, atr_value: float, rsi_value: float, timestamp):
+        """
+        Applies the entry rules to the latest indicator values.
+        """
+        # NaN != NaN
+        if atr_value is None or rsi_value is None or atr_value != atr_value or rsi_value != rsi_value:
             return {"error": "Not enough data for indicators"}
 
         # Logic for Long/Short
         direction = None
         
         # RSI Logic
-        if rsi_value < 30:
+        if rsi_value < Config.RSI_OVERSOLD:
             direction = "LONG"
-        elif rsi_value > 70:
+        elif rsi_value > Config.RSI_OVERBOUGHT:
             direction = "SHORT"
             
         # If no condition met, return None (no signal)
@@ -151,5 +151,52 @@ class SignalAnalysisService:
             "tps": tp_levels,
             "atr": atr_value,
             "rsi": rsi_value,
-            "timestamp": latest['timestamp']
+            "timestamp": timestamp
         }
+
+    @staticmethod
+    def generate_signals_batch(symbols, high, low, close, timestamps=None):
+        """
+        Evaluates many symbols at once from aligned (symbols x bars) arrays.
+
+        Returns a list aligned with `symbols` holding what generate_signal
+        would return for each one: None, an error dict or a signal dict.
+        Shorter histories can be left-padded with NaN. Indicators follow the
+        manual Wilder path (the pandas_ta variants are not vectorized).
+        """
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        close = np.asarray(close, dtype=float)
+        if close.ndim != 2 or close.shape[1] == 0:
+            return [None] * len(symbols)
+
+        atr = batch_atr(high, low, close)[:, -1]
+        rsi = batch_rsi(close)[:, -1]
+        entry = close[:, -1]
+        timestamp = timestamps[-1] if timestamps is not None else None
+
+        valid = ~(np.isnan(atr) | np.isnan(rsi))
+        is_long = valid & (rsi < Config.RSI_OVERSOLD)
+        is_short = valid & (rsi > Config.RSI_OVERBOUGHT)
+
+        # Same SL/TP arithmetic as build_signal, for every symbol at once
+        sl_dist = atr * Config.ATR_MULTIPLIER_SL
+        sl = np.where(is_long, entry - sl_dist, entry + sl_dist)
+        ratios = np.asarray(Config.RISK_REWARD_RATIOS, dtype=float)
+        tps = entry[:, None] + (atr[:, None] * np.where(is_long[:, None], ratios, -ratios))
+
+        results = [None] * len(symbols)
+        for i in np.flatnonzero(~valid):
+            results[i] = {"error": "Not enough data for indicators"}
+        for i in np.flatnonzero(is_long | is_short):
+            results[i] = {
+                "symbol": symbols[i],
+                "direction": "LONG" if is_long[i] else "SHORT",
+                "entry": float(entry[i]),
+                "sl": float(sl[i]),
+                "tps": tps[i].tolist(),
+                "atr": float(atr[i]),
+                "rsi": float(rsi[i]),
+                "timestamp": timestamp
+            }
+        return results
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import numpy as np
+from config import Config
+from app.services.market_data import MarketDataService
+from app.services.signal_store import SignalStore
+from app.services.metrics import SIGNAL_OUTCOMES
+from app.bot.formatting import format_outcome_digest
+
+class SignalMonitor:
+    """
+    Tracks open signals against live prices.
+
+    Every tick is one fetch_tickers call for all symbols with an open
+    signal, however many signals there are, and the checks against SL and
+    the three TPs run over the whole set at once with numpy.
+    """
+
+    def __init__(self, market_service: MarketDataService, store: SignalStore, notifier=None):
+        self.market_service = market_service
+        self.store = store
+        self.notifier = notifier
+        self.is_running = False
+
+    @staticmethod
+    def evaluate(rows, prices: dict, now: int, max_age_ms: int):
+        """
+        Checks open signal rows (SignalStore.OPEN_COLUMNS) against {symbol: price}.
+
+        Returns (changes, events): the SignalStore.update rows, and one event
+        dict per signal that reached a new TP, hit its SL or expired.
+        """
+        if not rows:
+            return [], []
+
+        ids, symbols, directions, entry, sl, tp1, tp2, tp3, hit_tp, created_at = zip(*rows)
+        price = np.array([prices.get(symbol, np.nan) for symbol in symbols])
+        # +1 for LONG, -1 for SHORT: every level check becomes "above" for both
+        side = np.where(np.array(directions) == 'LONG', 1.0, -1.0)
+        hit_tp = np.array(hit_tp)
+        tps = np.column_stack([tp1, tp2, tp3])
+
+        priced = ~np.isnan(price)
+        sl_hit = priced & ((np.array(sl) - price) * side >= 0)
+        reached = ((price[:, None] - tps) * side[:, None] >= 0).sum(axis=1)
+        new_tp = np.where(priced & ~sl_hit, np.maximum(reached, hit_tp), hit_tp)
+        expired = ~sl_hit & (new_tp < 3) & (now - np.array(created_at) >= max_age_ms)
+
+        changes = []
+        events = []
+        for i in np.flatnonzero(sl_hit | (new_tp > hit_tp) | expired).tolist():
+            exit_price = float(price[i]) if priced[i] else None
+            if sl_hit[i]:
+                status, event = 'sl', 'SL'
+            elif new_tp[i] > hit_tp[i]:
+                status, event = ('tp3' if new_tp[i] == 3 else 'open'), f"TP{new_tp[i]}"
+            else:
+                status, event = 'expired', 'EXPIRED'
+            closed_at = None if status == 'open' else now
+            changes.append((ids[i], int(new_tp[i]), status, exit_price if closed_at else None, closed_at))
+            events.append({
+                "id": ids[i], "symbol": symbols[i], "direction": directions[i], "event": event,
+                "price": exit_price, "entry": entry[i], "hit_tp": int(new_tp[i]),
+            })
+        return changes, events
+
+    async def check(self):
+        """
+        One tick: fetches prices, updates the store and queues a report of
+        what changed. Returns the events.
+
+        Signals are checked against the prices of the exchange they were
+        found on, one fetch_tickers per exchange with open signals.
+        """
+        now = self.market_service.now()
+        max_age_ms = Config.SIGNAL_MAX_AGE_HOURS * 3600 * 1000
+        changes, events = [], []
+        for service in self.market_service.services:
+            # SQLite calls run in a thread, off the event loop
+            rows = await asyncio.to_thread(self.store.open_signals, service.exchange_id)
+            if not rows:
+                continue
+            symbols = sorted({row[1] for row in rows})
+            prices = await service.fetch_tickers(symbols)
+            exchange_changes, exchange_events = self.evaluate(rows, prices, now, max_age_ms)
+            changes += exchange_changes
+            events += exchange_events
+            for event in exchange_events:
+                SIGNAL_OUTCOMES.inc(exchange=service.exchange_id, outcome=event['event'])
+        if not changes:
+            return []
+
+        await asyncio.to_thread(self.store.update, changes)
+        if self.notifier is not None:
+            for message in format_outcome_digest(events, Config.NOTIFY_DIGEST_LIMIT):
+                self.notifier.publish(message)
+        return events
+
+    async def start_monitoring(self):
+        self.is_running = True
+        logging.info("👀 Signal monitor started...")
+
+        while self.is_running:
+            try:
+                await self.check()
+            except Exception as e:
+                logging.error(f"Error in signal monitor: {e}")
+            await asyncio.sleep(Config.MONITOR_INTERVAL)
+
+    def stop(self):
+        self.is_running = False
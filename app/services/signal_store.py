@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from config import Config
+
+class SignalStore:
+    """
+    SQLite record of every emitted signal and how it ended.
+
+    A partial unique index allows one open signal per (exchange, symbol,
+    timeframe, direction), so while a LONG is still running the scanner's
+    next LONG for that symbol is rejected by the INSERT itself, including
+    after a restart. `hit_tp` is the highest take-profit reached so far and
+    `status` becomes 'tp3', 'sl' or 'expired' when the signal closes.
+
+    The methods are blocking: async callers run them with asyncio.to_thread.
+    One lock serializes the connection across those threads.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS signals (
+            id INTEGER PRIMARY KEY,
+            exchange TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            direction TEXT NOT NULL,
+            entry REAL NOT NULL,
+            sl REAL NOT NULL,
+            tp1 REAL NOT NULL,
+            tp2 REAL NOT NULL,
+            tp3 REAL NOT NULL,
+            atr REAL,
+            rsi REAL,
+            candle_ts INTEGER,
+            created_at INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open',
+            hit_tp INTEGER NOT NULL DEFAULT 0,
+            exit_price REAL,
+            closed_at INTEGER
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS signals_one_open
+            ON signals (exchange, symbol, timeframe, direction) WHERE status = 'open';
+        CREATE INDEX IF NOT EXISTS signals_open
+            ON signals (exchange) WHERE status = 'open';
+    """
+
+    # Columns returned by open_signals(), in order
+    OPEN_COLUMNS = ('id', 'symbol', 'direction', 'entry', 'sl', 'tp1', 'tp2', 'tp3', 'hit_tp', 'created_at')
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = Config.SIGNAL_DB_PATH
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.db.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    @staticmethod
+    def _ms(timestamp):
+        if timestamp is None:
+            return None
+        if isinstance(timestamp, datetime):
+            # build_signal timestamps are naive UTC
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            return int(timestamp.timestamp() * 1000)
+        return int(timestamp)
+
+    def record(self, signal: dict, exchange_id: str, timeframe: str = None, now: int = None):
+        """
+        Stores a new signal. Returns its id, or None when the same signal is
+        already open (a duplicate that should not be sent again). A signal
+        with missing or NaN prices raises sqlite3.IntegrityError.
+        """
+        if timeframe is None:
+            timeframe = Config.DEFAULT_TIMEFRAME
+        if now is None:
+            now = int(time.time() * 1000)
+
+        tp1, tp2, tp3 = signal['tps'][:3]
+        try:
+            with self._lock, self.db:
+                cursor = self.db.execute(
+                    "INSERT INTO signals "
+                    "(exchange, symbol, timeframe, direction, entry, sl, tp1, tp2, tp3, atr, rsi, candle_ts, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (exchange_id, signal['symbol'], timeframe, signal['direction'],
+                     self._price(signal['entry']), self._price(signal['sl']),
+                     self._price(tp1), self._price(tp2), self._price(tp3),
+                     signal.get('atr'), signal.get('rsi'), self._ms(signal.get('timestamp')), now),
+                )
+        except sqlite3.IntegrityError as e:
+            # Only the one-open-signal index means "duplicate", NOT NULL violations are errors
+            if not str(e).startswith('UNIQUE constraint failed'):
+                raise
+            return None
+        return cursor.lastrowid
+
+    @staticmethod
+    def _price(value):
+        # None stays None (and NaN becomes NULL in SQLite), both hit NOT NULL
+        return None if value is None else float(value)
+
+    def open_signals(self, exchange_id: str):
+        """
+        Open signals of one exchange as tuples of OPEN_COLUMNS.
+        """
+        with self._lock:
+            return self.db.execute(
+                f"SELECT {', '.join(self.OPEN_COLUMNS)} FROM signals WHERE exchange = ? AND status = 'open'",
+                (exchange_id,),
+            ).fetchall()
+
+    def update(self, changes):
+        """
+        Applies (id, hit_tp, status, exit_price, closed_at) rows in one transaction.
+        """
+        with self._lock, self.db:
+            self.db.executemany(
+                "UPDATE signals SET hit_tp = ?, status = ?, exit_price = ?, closed_at = ? WHERE id = ?",
+                [(hit_tp, status, exit_price, closed_at, id) for id, hit_tp, status, exit_price, closed_at in changes],
+            )
@@ -0,0 +1,38 @@
+import logging
+import time
+
+class StartupReport:
+    """
+    Wall-clock cost of each startup phase. mark(phase) closes the phase
+    that has been running since the previous mark (or since `started`).
+    """
+
+    def __init__(self, started: float = None):
+        self.started = time.perf_counter() if started is None else started
+        self.last = self.started
+        self.phases = []
+
+    def mark(self, phase: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.phases.append((phase, elapsed))
+        self.last = now
+        return elapsed
+
+    def elapsed(self, phase: str = None) -> float:
+        """
+        Seconds from the start to the end of `phase` (or to the last mark).
+        """
+        total = 0.0
+        for name, seconds in self.phases:
+            total += seconds
+            if name == phase:
+                break
+        return total
+
+    def format(self) -> str:
+        parts = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases)
+        return f"⏱ Startup: {parts} (total {self.elapsed() * 1000:.0f}ms)"
+
+    def log(self):
+        logging.info(self.format())
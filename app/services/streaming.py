@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import random
+from collections import deque
+import aiohttp
+from config import Config
+from app.services.candles import Candles
+from app.services.metrics import STREAM_MESSAGES, STREAM_RECONNECTS, STREAM_GAP_FILLS
+
+def stream_name(symbol: str, timeframe: str) -> str:
+    # Binance spot stream names: BTC/USDT 1m -> btcusdt@kline_1m
+    return f"{symbol.replace('/', '').lower()}@kline_{timeframe}"
+
+class RollingWindow:
+    """
+    Last `size` closed candles of one (symbol, timeframe) plus the forming one.
+    """
+    __slots__ = ('timeframe_ms', 'closed', 'forming')
+
+    def __init__(self, timeframe_ms: int, size: int):
+        self.timeframe_ms = timeframe_ms
+        self.closed = deque(maxlen=size)
+        self.forming = None
+
+    @property
+    def last_closed(self):
+        return self.closed[-1][0] if self.closed else None
+
+    def add(self, row, is_closed: bool) -> bool:
+        """
+        Adds a [timestamp, o, h, l, c, v] row. Returns True if it closed a
+        candle that was not in the window yet.
+        """
+        last = self.last_closed
+        if last is not None and row[0] <= last:
+            # Replayed after a reconnect
+            return False
+        if is_closed:
+            self.closed.append(row)
+            if self.forming is not None and self.forming[0] <= row[0]:
+                self.forming = None
+            return True
+        self.forming = row
+        return False
+
+    def candles(self, limit: int = None, forming: bool = True) -> Candles:
+        rows = list(self.closed)
+        if forming and self.forming is not None:
+            rows.append(self.forming)
+        if limit is not None:
+            rows = rows[-limit:]
+        return Candles.from_ohlcv(rows)
+
+class KlineStream:
+    """
+    Live candle windows for a watchlist from Binance combined kline streams.
+    Other exchanges have their own protocols (and prices): check
+    supports() before streaming for them.
+
+    The (symbol, timeframe) streams are spread over as few WebSocket
+    connections as the per-connection limit allows. Windows are filled from
+    REST once, then kept current from the stream alone. `on_close(symbol,
+    timeframe)` is awaited the moment the exchange marks a candle final.
+    A dropped connection reconnects with backoff, and the candles that
+    closed while it was down are fetched over REST before going live again.
+    """
+
+    # Exchanges whose candles the stream carries
+    EXCHANGES = ('binance',)
+
+    def __init__(self, market_service, symbols, timeframes, on_close=None, url: str = None,
+                 window: int = None, per_connection: int = None):
+        if url is None:
+            url = Config.STREAM_URL
+        if window is None:
+            window = Config.DEFAULT_LIMIT
+        if per_connection is None:
+            per_connection = Config.STREAM_MAX_PER_CONNECTION
+        self.market_service = market_service
+        self.url = url.rstrip('/')
+        self.window = window
+        self.on_close = on_close
+
+        self.streams = {}
+        self.windows = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                key = (symbol, timeframe)
+                self.streams[stream_name(symbol, timeframe)] = key
+                tf_ms = market_service.exchange.parse_timeframe(timeframe) * 1000
+                self.windows[key] = RollingWindow(tf_ms, window)
+
+        names = list(self.streams)
+        self.groups = [names[i:i + per_connection] for i in range(0, len(names), per_connection)]
+        self.session = None
+        self.tasks = []
+        self.connected = 0
+
+    @classmethod
+    def supports(cls, exchange_id: str) -> bool:
+        return exchange_id in cls.EXCHANGES
+
+    def candles(self, symbol: str, timeframe: str, limit: int = None, forming: bool = True):
+        window = self.windows.get((symbol, timeframe))
+        if window is None or not window.closed:
+            return None
+        return window.candles(limit, forming)
+
+    async def start(self):
+        await asyncio.gather(*(self._fill(key) for key in self.windows))
+        self.session = aiohttp.ClientSession()
+        self.tasks = [asyncio.create_task(self._connection(group)) for group in self.groups]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _fill(self, key) -> bool:
+        """
+        Fetches the candles after the window's last closed one over REST,
+        page after page until the last closed candle is in. Returns True if
+        new closed candles were added.
+        """
+        symbol, timeframe = key
+        window = self.windows[key]
+        tf_ms = window.timeframe_ms
+        added = False
+        while True:
+            now = self.market_service.now()
+            # One extra for the forming candle
+            kwargs = {'limit': self.window + 1}
+            if window.last_closed is not None:
+                # After a long outage only the candles the window can hold
+                kwargs['since'] = max(window.last_closed + tf_ms, (now // tf_ms - self.window) * tf_ms)
+            try:
+                rows = await self.market_service.request('fetch_ohlcv', symbol, timeframe, **kwargs)
+            except Exception as e:
+                logging.error(f"Error filling {symbol} {timeframe}: {e}")
+                return added
+
+            before = window.last_closed
+            for row in rows or []:
+                added |= window.add(list(row), row[0] + tf_ms <= now)
+            # Done once the candle before the forming one is in, or the
+            # exchange has nothing newer (yet)
+            last = window.last_closed
+            if last is None or last == before or last >= (now // tf_ms - 1) * tf_ms:
+                return added
+
+    async def _connection(self, names):
+        url = f"{self.url}/stream?streams={'/'.join(names)}"
+        attempt = 0
+        first = True
+        while True:
+            try:
+                async with self.session.ws_connect(url, heartbeat=Config.STREAM_HEARTBEAT) as ws:
+                    self.connected += 1
+                    if not first:
+                        await self._gap_fill(names)
+                    first = False
+                    attempt = 0
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await self._handle(json.loads(msg.data))
+                        elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Kline stream error: {e}")
+
+            first = False
+            delay = min(Config.STREAM_RECONNECT_DELAY * 2 ** attempt, Config.STREAM_RECONNECT_MAX)
+            delay *= random.uniform(0.8, 1.2)
+            attempt += 1
+            STREAM_RECONNECTS.inc()
+            logging.warning(f"Kline stream disconnected, reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _gap_fill(self, names):
+        # Candles that closed while the connection was down
+        keys = [self.streams[name] for name in names]
+        filled = await asyncio.gather(*(self._fill(key) for key in keys))
+        for key, added in zip(keys, filled):
+            if added:
+                STREAM_GAP_FILLS.inc()
+                await self._closed(*key)
+
+    async def _handle(self, message: dict):
+        key = self.streams.get(message.get('stream'))
+        data = message.get('data') or {}
+        k = data.get('k')
+        if key is None or k is None:
+            return
+        STREAM_MESSAGES.inc()
+
+        window = self.windows[key]
+        row = [int(k['t']), float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v'])]
+        before = window.last_closed
+        if k['x'] and before is not None and row[0] > before + window.timeframe_ms:
+            # A close was skipped: fetch it before moving on
+            STREAM_GAP_FILLS.inc()
+            await self._fill(key)
+        window.add(row, bool(k['x']))
+        if window.last_closed != before:
+            await self._closed(*key)
+
+    async def _closed(self, symbol: str, timeframe: str):
+        if self.on_close is None:
+            return
+        try:
+            await self.on_close(symbol, timeframe)
+        except Exception as e:
+            logging.error(f"Error handling {symbol} {timeframe} close: {e}")
@@ -0,0 +1,103 @@
+import logging
+import numpy as np
+from config import Config
+
+class UniverseScreener:
+    """
+    Shortlists the symbols worth a full scan from one bulk ticker snapshot.
+
+    refresh() pulls 24h tickers for the whole exchange in a single
+    fetch_tickers call and keeps the `quote` pairs with enough volume that
+    moved: a 24h range of at least `min_range` or a 24h change of at least
+    `min_move`. Survivors are ranked by range, most active first, and split
+    into tiers of (size, cadence): a tier is scanned on every `cadence`-th
+    tick. Pinned symbols (SYMBOLS_TO_SCAN) always lead the first tier.
+    Everything else costs no OHLCV request at all.
+    """
+
+    def __init__(self, market_service, quote: str = None, min_volume: float = None, min_range: float = None,
+                 min_move: float = None, tiers=None, pinned=None):
+        self.market_service = market_service
+        self.quote = quote or Config.UNIVERSE_QUOTE
+        self.min_volume = Config.UNIVERSE_MIN_VOLUME if min_volume is None else min_volume
+        self.min_range = Config.UNIVERSE_MIN_RANGE if min_range is None else min_range
+        self.min_move = Config.UNIVERSE_MIN_MOVE if min_move is None else min_move
+        self.tier_specs = list(tiers or Config.UNIVERSE_TIERS)
+        self.pinned = list(Config.SYMBOLS_TO_SCAN if pinned is None else pinned)
+        # Until the first snapshot only the pinned symbols are scanned
+        self.tiers = [self.pinned] + [[] for _ in self.tier_specs[1:]]
+        self.universe = 0
+
+    @staticmethod
+    def screen(tickers: dict, quote: str, min_volume: float, min_range: float, min_move: float):
+        """
+        Symbols of `tickers` that pass the filters, ranked by 24h range.
+        """
+        suffix = f"/{quote}"
+        symbols = [s for s in tickers if s.endswith(suffix)]
+        if not symbols:
+            return []
+
+        def column(field):
+            return np.array([tickers[s].get(field) for s in symbols], dtype=float)
+
+        last = column('last')
+        high = column('high')
+        low = column('low')
+        volume = column('quoteVolume')
+        # Some exchanges only report base volume
+        volume = np.where(np.isnan(volume), column('baseVolume') * last, volume)
+        move = np.abs(column('percentage')) / 100
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            day_range = (high - low) / low
+            # NaN (missing fields) fails every comparison and drops out
+            keep = (volume >= min_volume) & ((day_range >= min_range) | (move >= min_move))
+        order = np.lexsort((-volume[keep], -day_range[keep]))
+        kept = np.flatnonzero(keep)
+        return [symbols[i] for i in kept[order]]
+
+    def assign(self, ranked):
+        """
+        Splits the ranked shortlist into tiers, pinned symbols first.
+        """
+        pinned = set(self.pinned)
+        queue = self.pinned + [s for s in ranked if s not in pinned]
+        tiers = []
+        start = 0
+        for i, (size, _) in enumerate(self.tier_specs):
+            # The first tier grows to fit the pinned symbols
+            end = start + (max(size, len(self.pinned)) if i == 0 else size)
+            tiers.append(queue[start:end])
+            start = end
+        return tiers
+
+    async def refresh(self):
+        """
+        Re-screens the universe from one bulk ticker call. On failure the
+        previous tiers are kept.
+        """
+        try:
+            tickers = await self.market_service.request('fetch_tickers', cost=Config.UNIVERSE_TICKERS_COST)
+        except Exception as e:
+            logging.error(f"Error screening the universe: {e}")
+            return self.tiers
+
+        ranked = self.screen(tickers, self.quote, self.min_volume, self.min_range, self.min_move)
+        self.universe = len(tickers)
+        self.tiers = self.assign(ranked)
+        logging.info(
+            f"🔭 Screened {self.universe} markets: {len(ranked)} shortlisted, "
+            f"tiers {'/'.join(str(len(t)) for t in self.tiers)}"
+        )
+        return self.tiers
+
+    def due(self, tick: int):
+        """
+        Symbols to scan on the `tick`-th scan (counting from 0).
+        """
+        symbols = []
+        for tier, (_, cadence) in zip(self.tiers, self.tier_specs):
+            if tick % max(cadence, 1) == 0:
+                symbols.extend(tier)
+        return symbols
@@ -0,0 +1,15 @@
+import asyncio
+
+class FakeBot:
+    """
+    Records what would have been sent to Telegram.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent.append((chat_id, text))
@@ -0,0 +1,137 @@
+import asyncio
+import random
+import time
+import zlib
+from collections import Counter, deque
+import ccxt.async_support as ccxt
+from app.testing.synthetic import generate_ohlcv
+
+class FakeExchange:
+    """
+    In-process stand-in for a ccxt async exchange.
+
+    Serves seeded synthetic candles (the same symbol always gets the same
+    history), adds per-request latency (plus optional random jitter) and
+    enforces a sliding-window budget of `max_requests` per `window` seconds
+    by raising ccxt.RateLimitExceeded like a real 429. Setting `down`
+    makes every request fail with ccxt.ExchangeNotAvailable.
+    """
+
+    def __init__(self, symbols=None, history: int = 1000, latency: float = 0.0, jitter: float = 0.0,
+                 max_requests: int = None, window: float = 1.0, rateLimit: int = 50,
+                 now: int = None, exchange_id: str = 'fake', seed: int = 0):
+        self.id = exchange_id
+        self.symbols = list(symbols) if symbols is not None else None
+        self.history = history
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self.max_requests = max_requests
+        self.window = window
+        self.rateLimit = rateLimit
+        self.enableRateLimit = True
+        self.now = now
+
+        self.calls = Counter()
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._recent = deque()
+        self._candles = {}
+        # symbol -> last price override for fetch_tickers
+        self.prices = {}
+        # While set every request fails like an outage (after its latency)
+        self.down = False
+
+    def parse_timeframe(self, timeframe):
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def milliseconds(self):
+        if self.now is not None:
+            return self.now
+        return int(time.time() * 1000)
+
+    def candles(self, symbol: str, timeframe: str):
+        """
+        Full synthetic history for a symbol, the last candle still forming.
+        """
+        key = (symbol, timeframe)
+        if key not in self._candles:
+            tf_ms = self.parse_timeframe(timeframe) * 1000
+            start = (self.milliseconds() // tf_ms - self.history + 1) * tf_ms
+            seed = zlib.crc32(f"{self.id}:{symbol}".encode())
+            self._candles[key] = generate_ohlcv(self.history, seed=seed, start=start, timeframe_ms=tf_ms)
+        return self._candles[key]
+
+    async def _request(self, method: str):
+        self.calls[method] += 1
+
+        if self.max_requests is not None:
+            now = time.monotonic()
+            while self._recent and self._recent[0] <= now - self.window:
+                self._recent.popleft()
+            if len(self._recent) >= self.max_requests:
+                self.rate_limited += 1
+                raise ccxt.RateLimitExceeded(f"{self.id} 429 Too Many Requests")
+            self._recent.append(now)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            if delay:
+                await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+        if self.down:
+            raise ccxt.ExchangeNotAvailable(f"{self.id} 503 Service Unavailable")
+
+    def _check_symbol(self, symbol: str):
+        if self.symbols is not None and symbol not in self.symbols:
+            raise ccxt.BadSymbol(f"{self.id} does not have market symbol {symbol}")
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        await self._request('fetch_ohlcv')
+        self._check_symbol(symbol)
+
+        rows = self.candles(symbol, timeframe)
+        if since is not None:
+            rows = [r for r in rows if r[0] >= since]
+            if limit:
+                rows = rows[:limit]
+        elif limit:
+            rows = rows[-limit:]
+        return [list(r) for r in rows]
+
+    async def fetch_tickers(self, symbols=None, params={}):
+        """
+        Last price of every requested symbol: the `prices` override, or
+        the close of its forming 1h candle. The 24h stats come from the
+        last 24 1h candles.
+        """
+        await self._request('fetch_tickers')
+        if symbols is None:
+            symbols = self.symbols if self.symbols is not None else list(self.prices)
+        for symbol in symbols:
+            self._check_symbol(symbol)
+
+        timestamp = self.milliseconds()
+        tickers = {}
+        for symbol in symbols:
+            day = self.candles(symbol, '1h')[-24:]
+            last = self.prices.get(symbol)
+            if last is None:
+                last = day[-1][4]
+            open_ = day[0][1]
+            volume = sum(r[5] for r in day)
+            tickers[symbol] = {
+                'symbol': symbol, 'timestamp': timestamp,
+                'last': last, 'close': last, 'bid': last, 'ask': last,
+                'open': open_, 'high': max(r[2] for r in day), 'low': min(r[3] for r in day),
+                'percentage': (last - open_) / open_ * 100,
+                'baseVolume': volume, 'quoteVolume': volume * last,
+            }
+        return tickers
+
+    async def close(self):
+        pass
@@ -0,0 +1,72 @@
+import json
+from aiohttp import web
+
+class FakeKlineServer:
+    """
+    Local stand-in for Binance combined kline streams.
+
+    Clients connect to /stream?streams=a@kline_1m/b@kline_1m like the real
+    endpoint. push() sends a kline to every connection subscribed to it and
+    drop() closes all connections, to exercise reconnects.
+    """
+
+    def __init__(self):
+        self.connections = []
+        self.subscriptions = []
+        self.runner = None
+        self.url = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/stream', self._handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        # Port 0: the OS picks a free port
+        await web.TCPSite(self.runner, '127.0.0.1', 0).start()
+        port = self.runner.addresses[0][1]
+        self.url = f"ws://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        await self.drop()
+        await self.runner.cleanup()
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        streams = set(request.query.get('streams', '').split('/'))
+        self.subscriptions.append(streams)
+        entry = (ws, streams)
+        self.connections.append(entry)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            if entry in self.connections:
+                self.connections.remove(entry)
+        return ws
+
+    async def push(self, stream: str, row, closed: bool):
+        """
+        Sends a [timestamp, open, high, low, close, volume] row as a kline event.
+        """
+        symbol, _, interval = stream.partition('@kline_')
+        message = json.dumps({
+            'stream': stream,
+            'data': {
+                'e': 'kline', 's': symbol.upper(),
+                'k': {
+                    't': int(row[0]), 'i': interval, 's': symbol.upper(),
+                    'o': str(row[1]), 'h': str(row[2]), 'l': str(row[3]), 'c': str(row[4]), 'v': str(row[5]),
+                    'x': closed,
+                },
+            },
+        })
+        for ws, streams in list(self.connections):
+            if stream in streams and not ws.closed:
+                await ws.send_str(message)
+
+    async def drop(self):
+        for ws, _ in list(self.connections):
+            await ws.close()
+        self.connections.clear()
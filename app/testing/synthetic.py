@@ -0,0 +1,37 @@
+import numpy as np
+
+def generate_ohlcv(n: int, seed: int = 0, start: int = 1_700_000_000_000, timeframe_ms: int = 3_600_000, price: float = 100.0):
+    """
+    Seeded random-walk candles as ccxt-style rows
+    [timestamp, open, high, low, close, volume].
+
+    The drift changes every 50 bars, so RSI regularly crosses 30/70 and the
+    strategy produces signals.
+    """
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.normal(0, 0.004, n // 50 + 1), 50)[:n]
+    close = price * np.exp(np.cumsum(drift + rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[price], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.006, n)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.uniform(100, 1000, n)
+    timestamp = start // timeframe_ms * timeframe_ms + np.arange(n, dtype=np.int64) * timeframe_ms
+
+    return [list(row) for row in zip(timestamp.tolist(), open_.tolist(), high.tolist(), low.tolist(), close.tolist(), volume.tolist())]
+
+# Candle counts used by the benchmark suite
+SIZES = {
+    'small': 100,  # one live fetch
+    'medium': 10_000,  # about a year of 1h candles
+    'large': 1_000_000,  # about two years of 1m candles
+}
+
+def generate_dataframe(n: int, seed: int = 0, **kwargs):
+    """
+    generate_ohlcv as a DataFrame shaped like MarketDataService.fetch_ohlcv.
+    """
+    import pandas as pd
+    df = pd.DataFrame(generate_ohlcv(n, seed=seed, **kwargs), columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
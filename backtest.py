@@ -1,115 +1,68 @@
+import argparse
 import asyncio
-import pandas as pd
-import numpy as np
 from app.services.market_data import MarketDataService
-from app.services.signal_analysis import SignalAnalysisService
+from app.services.backtest_engine import BacktestEngine
+from app.services.candle_store import CandleStore
+from app.services.portfolio_backtest import PortfolioBacktester, candle_feed
+from app.services.optimizer import build_grid
+from app.services.robustness import walk_forward, monte_carlo
 from config import Config
 
-async def run_backtest(symbol="BTC/USDT", days=30):
+# Parameters re-fitted on every walk-forward training window
+WALK_FORWARD_GRID = {
+    'rsi_oversold': [25, 30, 35],
+    'rsi_overbought': [65, 70, 75],
+    'atr_multiplier': [1.0, 1.5, 2.0],
+    'reward_ratio': [1.0, 1.5, 2.0],
+}
+
+async def run_backtest(symbol="BTC/USDT", days=30, market_service=None, store=None):
     print(f"[START] Starting Backtest for {symbol} over last {days} days...")
     
-    market_service = MarketDataService()
-    
-    # Fetch enough data (assuming 1h timeframe, 24 candles per day)
-    limit = days * 24
-    # ccxt limit might be capped (e.g. 1000), so we might need pagination in a real robust backtester.
-    # For now, let's try to fetch the max allowed or a reasonable amount.
-    # Binance usually allows 1000 candles. 30 days * 24h = 720 candles. So 1000 is enough.
-    
+    owns_market_service = market_service is None
+    if owns_market_service:
+        market_service = MarketDataService()
+    if store is None:
+        store = CandleStore()
+
+    # History is paged from the exchange into the local candle store, so later
+    # runs only download the candles that closed since the last run.
+    since = market_service.exchange.milliseconds() - days * 24 * 60 * 60 * 1000
+
     print("[INFO] Fetching historical data...")
-    df = await market_service.fetch_ohlcv(symbol, limit=1000)
-    await market_service.close()
+    try:
+        df = await store.load_dataframe(market_service, symbol, since=since)
+    except Exception as e:
+        print(f"[ERROR] History incomplete for {symbol}: {e}")
+        return
+    finally:
+        if owns_market_service:
+            await market_service.close()
     
     if df is None or df.empty:
         print("[ERROR] Failed to fetch data.")
         return
 
     print(f"[INFO] Analyzing {len(df)} candles...")
-    
-    # Initial Balance
-    initial_balance = 1000
-    balance = initial_balance
-    trades = []
-    wins = 0
-    losses = 0
-    
-    # Iterate through data
-    # We need a window for ATR/RSI, so start after period
-    start_idx = 50 
-    
-    for i in range(start_idx, len(df) - 1):
-        # Slice data up to current point to simulate "live"
-        current_df = df.iloc[:i+1].copy()
-        
-        # Generate Signal
-        signal = SignalAnalysisService.generate_signal(symbol, current_df)
-        
-        if signal and "error" not in signal:
-            # We have a signal!
-            # Let's simulate the trade outcome
-            entry_price = signal['entry']
-            sl_price = signal['sl']
-            tp1_price = signal['tps'][0] # Aiming for TP1 for simplicity in this basic backtest
-            direction = signal['direction']
-            
-            # Look ahead at future candles to see what happened
-            outcome = None
-            pnl = 0
-            
-            # Check next candles until SL or TP is hit
-            for j in range(i + 1, len(df)):
-                future_candle = df.iloc[j]
-                high = future_candle['high']
-                low = future_candle['low']
-                
-                if direction == "LONG":
-                    # Check SL first (conservative)
-                    if low <= sl_price:
-                        outcome = "LOSS"
-                        pnl = -10 # Assume $10 risk (1%)
-                        break
-                    if high >= tp1_price:
-                        outcome = "WIN"
-                        pnl = 10 * Config.RISK_REWARD_RATIOS[0] # Reward based on R:R
-                        break
-                elif direction == "SHORT":
-                    if high >= sl_price:
-                        outcome = "LOSS"
-                        pnl = -10
-                        break
-                    if low <= tp1_price:
-                        outcome = "WIN"
-                        pnl = 10 * Config.RISK_REWARD_RATIOS[0]
-                        break
-            
-            if outcome:
-                balance += pnl
-                trades.append({
-                    "date": signal['timestamp'],
-                    "type": direction,
-                    "entry": entry_price,
-                    "outcome": outcome,
-                    "pnl": pnl
-                })
-                if outcome == "WIN": wins += 1
-                else: losses += 1
-                
-                # Skip ahead to where trade closed to avoid overlapping trades (simple logic)
-                # In reality you can have multiple trades, but let's keep it simple
-                # We won't actually skip 'i' in the main loop easily without a while loop, 
-                # but since we only take one trade at a time logic, let's just ignore signals if we were "in a trade".
-                # For this simple script, we'll just log every signal as if we took it, 
-                # which might be unrealistic if signals are frequent.
-                # A better way:
-                # We can't easily skip 'i' here. Let's just print the trade.
-                pass
+
+    # Indicators are computed once and every trade is resolved with array
+    # operations (see BacktestEngine). Every signal is still counted as a
+    # separate trade, even when positions overlap: see run_portfolio_backtest
+    # for one position per symbol with partial exits, fees and slippage.
+    result = BacktestEngine.run(symbol, df, initial_balance=1000)
+
+    initial_balance = result['initial_balance']
+    balance = result['final_balance']
+    trades = result['trades']
+    wins = result['wins']
+    losses = result['losses']
 
     # Report
     print("\n" + "="*30)
     print("BACKTEST RESULTS")
     print("="*30)
     print(f"Symbol: {symbol}")
-    print(f"Period: Last {len(df)} hours")
+    print(f"Period: Last {days} days ({len(df)} candles)")
     print(f"Initial Balance: ${initial_balance}")
     print(f"Final Balance:   ${balance:.2f}")
     print(f"Total Trades:    {len(trades)}")
@@ -125,5 +78,134 @@ async def run_backtest(symbol="BTC/USDT", days=30):
         for t in trades[-5:]:
             print(f"{t['date']} | {t['type']} | {t['outcome']} | ${t['pnl']:.2f}")
 
+    return result
+
+async def run_portfolio_backtest(symbols=None, days=365, timeframe=None, market_service=None, store=None):
+    if symbols is None:
+        symbols = Config.SYMBOLS_TO_SCAN
+    if timeframe is None:
+        timeframe = Config.DEFAULT_TIMEFRAME
+    print(f"[START] Portfolio backtest of {len(symbols)} symbols ({timeframe}) over last {days} days...")
+
+    owns_market_service = market_service is None
+    if owns_market_service:
+        market_service = MarketDataService()
+    if store is None:
+        store = CandleStore()
+
+    since = market_service.exchange.milliseconds() - days * 24 * 60 * 60 * 1000
+    print("[INFO] Syncing historical data...")
+    try:
+        for symbol in symbols:
+            await store.sync(market_service, symbol, timeframe, since=since)
+    except Exception as e:
+        print(f"[ERROR] History incomplete for {symbol}: {e}")
+        return
+    finally:
+        if owns_market_service:
+            await market_service.close()
+
+    # Candles are streamed from disk in time order, nothing is loaded whole
+    feed = candle_feed(store, market_service.exchange_id, symbols, timeframe, since=since)
+    result = PortfolioBacktester(initial_balance=1000).run(feed)
+    if result['candles'] == 0:
+        print("[ERROR] Failed to fetch data.")
+        return
+
+    trades = result['trades']
+    print("\n" + "="*30)
+    print("PORTFOLIO BACKTEST RESULTS")
+    print("="*30)
+    print(f"Symbols:         {len(symbols)}")
+    print(f"Candles:         {result['candles']}")
+    print(f"Initial Balance: ${result['initial_balance']}")
+    print(f"Final Balance:   ${result['final_balance']:.2f}")
+    print(f"Equity:          ${result['equity']:.2f} ({result['open_positions']} open)")
+    print(f"Total Trades:    {trades}")
+    print(f"Wins:            {result['wins']}")
+    print(f"Losses:          {result['losses']}")
+    if trades > 0:
+        print(f"Win Rate:        {(result['wins']/trades)*100:.2f}%")
+    print(f"TP1/TP2/TP3:     {'/'.join(str(n) for n in result['tp_hits'])} | SL: {result['stopped']}")
+    print(f"Fees:            ${result['fees']:.2f}")
+    print(f"Max Drawdown:    {result['max_drawdown']*100:.2f}%")
+    print("="*30)
+
+    if result['recent_trades']:
+        print("\nLast 5 Trades:")
+        for t in result['recent_trades'][-5:]:
+            print(f"{t['closed']} | {t['symbol']} | {t['type']} | {t['outcome']} | ${t['pnl']:.2f}")
+
+    return result
+
+async def run_robustness(symbol="BTC/USDT", days=365, market_service=None, store=None, resamples=None, seed=None):
+    print(f"[START] Robustness checks for {symbol} over last {days} days...")
+
+    owns_market_service = market_service is None
+    if owns_market_service:
+        market_service = MarketDataService()
+    if store is None:
+        store = CandleStore()
+
+    since = market_service.exchange.milliseconds() - days * 24 * 60 * 60 * 1000
+    print("[INFO] Fetching historical data...")
+    try:
+        df = await store.load_dataframe(market_service, symbol, since=since)
+    except Exception as e:
+        print(f"[ERROR] History incomplete for {symbol}: {e}")
+        return
+    finally:
+        if owns_market_service:
+            await market_service.close()
+    if df is None or df.empty:
+        print("[ERROR] Failed to fetch data.")
+        return
+
+    grid = build_grid(**WALK_FORWARD_GRID)
+    print(f"[INFO] Walk-forward over {len(df)} candles, {len(grid)} parameter sets per fold...")
+    wf = walk_forward(df, grid)
+
+    print("\n" + "="*30)
+    print("WALK-FORWARD (out of sample)")
+    print("="*30)
+    for row in wf['folds']:
+        print(f"Fold {row['fold']}: RSI {row['rsi_oversold']}/{row['rsi_overbought']} "
+              f"ATRx{row['atr_multiplier']} RR {row['reward_ratio']} | "
+              f"train ${row['train_pnl']:.2f} ({row['train_trades']}) | test ${row['test_pnl']:.2f} ({row['test_trades']})")
+    print(f"Out-of-sample PnL: ${wf['test_pnl']:.2f} over {wf['test_trades']} trades")
+    print(f"Efficiency:        {wf['efficiency']:.2f} (out-of-sample / in-sample PnL per bar)")
+
+    # The out-of-sample trades of the parameters the walk-forward picked, reshuffled
+    mc = monte_carlo(wf['test_trade_pnl'], initial_balance=1000, resamples=resamples, seed=seed)
+    print("\n" + "="*30)
+    print("MONTE CARLO")
+    print("="*30)
+    if mc is None:
+        print("No trades to resample.")
+    else:
+        print(f"Resamples:       {mc['resamples']} x {mc['trades']} trades")
+        print("Final Balance:   " + " | ".join(f"p{q} ${v:.2f}" for q, v in mc['final_balance'].items()))
+        print("Max Drawdown:    " + " | ".join(f"p{q} {v*100:.1f}%" for q, v in mc['max_drawdown_pct'].items()))
+        print(f"P(loss):         {mc['prob_loss']*100:.1f}%")
+        print(f"P(ruin):         {mc['prob_ruin']*100:.2f}%")
+    print("="*30)
+
+    return {"walk_forward": wf, "monte_carlo": mc}
+
 if __name__ == "__main__":
-    asyncio.run(run_backtest())
+    parser = argparse.ArgumentParser(description="Backtest the RSI/ATR strategy.")
+    parser.add_argument("--portfolio", action="store_true", help="Backtest all symbols together as one portfolio")
+    parser.add_argument("--robustness", action="store_true", help="Walk-forward and Monte Carlo checks for one symbol")
+    parser.add_argument("--resamples", type=int, default=None, help="Monte Carlo resamples (default: Config.MONTE_CARLO_RESAMPLES)")
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: Config.SYMBOLS_TO_SCAN, or BTC/USDT)")
+    parser.add_argument("--days", type=int, default=None)
+    parser.add_argument("--timeframe", default=None, help="Portfolio candle timeframe (default: Config.DEFAULT_TIMEFRAME)")
+    args = parser.parse_args()
+
+    symbols = args.symbols.split(",") if args.symbols else None
+    if args.portfolio:
+        asyncio.run(run_portfolio_backtest(symbols, args.days or 365, args.timeframe))
+    elif args.robustness:
+        asyncio.run(run_robustness(symbols[0] if symbols else "BTC/USDT", args.days or 365, resamples=args.resamples))
+    else:
+        asyncio.run(run_backtest(symbols[0] if symbols else "BTC/USDT", args.days or 30))
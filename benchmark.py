@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from config import Config
+from app.services.market_data import MarketDataService
+from app.services.signal_analysis import SignalAnalysisService
+from app.services.candle_store import CandleStore
+from app.services.scanner import ScannerService
+from app.bot.formatting import format_signal_message
+from app.services.candles import Candles
+from app.testing.synthetic import SIZES, generate_dataframe, generate_ohlcv
+from app.testing.fake_exchange import FakeExchange
+from app.testing.fake_bot import FakeBot
+from backtest import run_backtest
+
+def measure(func, repeat: int):
+    """
+    Runs func `repeat` times (after one warm-up call), returns timings in seconds.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def indicator_benchmarks(sizes):
+    for size in sizes:
+        df = generate_dataframe(SIZES[size], seed=1)
+        repeat = 20 if SIZES[size] <= 10_000 else 3
+        yield f"calculate_atr[{size}]", repeat, lambda df=df: SignalAnalysisService.calculate_atr(df)
+        yield f"calculate_rsi[{size}]", repeat, lambda df=df: SignalAnalysisService.calculate_rsi(df)
+
+    df = generate_dataframe(SIZES['small'], seed=1)
+    yield "generate_signal[small]", 50, lambda: SignalAnalysisService.generate_signal("BTC/USDT", df.copy())
+
+    rows = generate_ohlcv(SIZES['small'], seed=1)
+    yield "candles_from_ohlcv[small]", 200, lambda: Candles.from_ohlcv(rows)
+    candles = Candles.from_ohlcv(rows)
+    yield "generate_signal_candles[small]", 200, lambda: SignalAnalysisService.generate_signal("BTC/USDT", candles)
+
+    signal = {
+        "symbol": "BTC/USDT", "direction": "LONG", "entry": 43000.5, "sl": 42500.25,
+        "tps": [43500.0, 44000.0, 44500.0], "atr": 333.3, "rsi": 27.1, "timestamp": None,
+    }
+    yield "format_signal_message", 1000, lambda: format_signal_message(signal)
+
+def backtest_benchmarks(sizes, workdir):
+    for size in sizes:
+        candles = SIZES[size]
+        if candles < 1000:
+            continue
+        exchange = FakeExchange(history=candles + 1)
+        market_service = MarketDataService(exchange)
+        store = CandleStore(os.path.join(workdir, size))
+        days = candles // 24 + 1
+
+        def backtest(market_service=market_service, store=store, days=days):
+            # run_backtest prints its report, keep the benchmark output clean
+            with contextlib.redirect_stdout(io.StringIO()):
+                asyncio.run(run_backtest("BTC/USDT", days, market_service, store))
+
+        # The warm-up call fills the store, timed runs only sync the tail
+        yield f"run_backtest[{size}]", 3, backtest
+
+def scanner_benchmarks(symbols: int = 300, latency: float = 0.02):
+    names = [f"COIN{i}/USDT" for i in range(symbols)]
+
+    def scan_pass():
+        # A 2ms rateLimit (500 req/s) so the pass measures the pipeline, not the throttle
+        exchange = FakeExchange(names, history=Config.DEFAULT_LIMIT, latency=latency, jitter=latency / 2, rateLimit=2)
+        scanner = ScannerService(FakeBot(), MarketDataService(exchange))
+
+        async def run():
+            await scanner.scan_pass(names)
+            # Delivery happens in the background and is not part of the pass
+            await scanner.notifier.close(timeout=0)
+
+        asyncio.run(run())
+
+    yield f"scanner_pass[{symbols}x{int(latency * 1000)}ms]", 3, scan_pass
+
+def run_all(sizes, workdir):
+    results = {}
+    benchmarks = [
+        *indicator_benchmarks(sizes),
+        *backtest_benchmarks(sizes, workdir),
+        *scanner_benchmarks(),
+    ]
+    for name, repeat, func in benchmarks:
+        timings = measure(func, repeat)
+        results[name] = {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "runs": len(timings),
+        }
+        print(f"{name:<36} median {results[name]['median'] * 1000:10.3f} ms   min {results[name]['min'] * 1000:10.3f} ms")
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """
+    Returns the benchmarks whose median is slower than the baseline by more
+    than `tolerance` (0.25 = 25%).
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = current["median"] / previous["median"] if previous["median"] > 0 else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append((name, previous["median"], current["median"], ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the signal, backtest and scanner paths.")
+    parser.add_argument("--sizes", default="small,medium", help=f"Comma-separated data sizes out of {', '.join(SIZES)}")
+    parser.add_argument("--baseline", default=Config.BENCHMARK_BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a regression is flagged")
+    args = parser.parse_args()
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"unknown size {size!r}")
+
+    # Keep the scanner's per-symbol logging out of the timings
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_all(sizes, workdir)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+
+    exit_code = 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            exit_code = 1
+            print(f"\n[REGRESSION] {len(regressions)} benchmark(s) slower than {args.baseline}:")
+            for name, before, after, ratio in regressions:
+                print(f"  {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms ({ratio:.2f}x)")
+        else:
+            print(f"\n[OK] No regressions against {args.baseline}")
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Baseline saved to {args.baseline}")
+
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,18 +8,120 @@ class Config:
     # Default to Binance if not specified, but can be changed
     EXCHANGE_ID = os.getenv("EXCHANGE_ID", "binance")
     
+    # Market data from several exchanges, best first (e.g. EXCHANGE_IDS=binance,bybit,okx). A request
+    # the first healthy one does not answer within HEDGE_BUDGET is also sent to the next one
+    EXCHANGE_IDS = [e.strip() for e in os.getenv("EXCHANGE_IDS", "").split(",") if e.strip()] or [EXCHANGE_ID]
+    HEDGE_BUDGET = 0.8  # Seconds before a backup request goes out
+    HEALTH_ALPHA = 0.2  # Smoothing of the per-exchange latency and error averages
+    HEALTH_MAX_ERROR_RATE = 0.3  # Above this an exchange drops behind the healthy ones (a single error does not)
+    HEALTH_HALF_LIFE = 60.0  # Seconds for the averages of an exchange that is not asked to fade by half
+    HEALTH_MAX_ERRORS = 3  # Failures in a row before an exchange is skipped...
+    HEALTH_COOLDOWN = 30.0  # ...for this many seconds
+
     # Trading defaults
     DEFAULT_TIMEFRAME = "1h"
     DEFAULT_LIMIT = 100  # Number of candles to fetch
+    MARKETS_CACHE_DIR = os.getenv("MARKETS_CACHE_DIR", "data/markets")  # load_markets metadata kept across restarts
+    MARKETS_CACHE_TTL = 24 * 3600  # Seconds before the cached markets are fetched again
+    OHLCV_CACHE_SIZE = 5000  # Cached (symbol, timeframe, limit) responses, each valid until its candle closes
+    INDICATOR_CACHE_SIZE = 20000  # Memoized (exchange, symbol, timeframe, indicator, params) states, least recently used evicted
+
+    # Local resampling: with e.g. BASE_TIMEFRAME=1m only 1m candles are polled and
+    # 5m/15m/1h/4h are built from them. Empty = fetch every timeframe directly
+    BASE_TIMEFRAME = os.getenv("BASE_TIMEFRAME", "")
+    BASE_LIMIT = 1000  # Base candles per fetch; longer timeframes are fetched directly, one that falls behind is re-seeded
+
+    # Historical data
+    HISTORY_PAGE_LIMIT = 1000  # Candles per request when paging through history
+    CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR", "data/candles")
     
+    # Exchange rate limiting
+    RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))  # 0 = use the exchange's ccxt rateLimit
+    RATE_LIMIT_BURST = 10  # Requests that may go out back to back
+    RATE_LIMIT_MAX_RETRIES = 4  # Retries after a 429 before giving up
+    RATE_LIMIT_BACKOFF = 1.0  # Seconds, doubled on every retry
+    RATE_LIMIT_MAX_BACKOFF = 60.0
+
     # ATR Settings
     ATR_PERIOD = 14
     ATR_MULTIPLIER_SL = 1.5
+
+    # RSI Settings
+    RSI_OVERSOLD = 30  # LONG below this
+    RSI_OVERBOUGHT = 70  # SHORT above this
     
     # Scanner Settings
     SYMBOLS_TO_SCAN = ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
-    SCAN_INTERVAL = 3600 # 1 hour in seconds
+    SCHEDULE_DELAY = 3.0  # Seconds after a candle closes before it is scanned (exchanges publish with a short lag)
+    SCHEDULE_JITTER = 2.0  # Up to this many extra random seconds, spreads load off the exact boundary
+    CLOCK_SYNC_INTERVAL = 3600  # Seconds between exchange clock offset checks
+
+    # Universe scan: screen every pair from one bulk ticker call, fetch candles for the shortlist only
+    UNIVERSE_SCAN = os.getenv("UNIVERSE_SCAN", "0") == "1"
+    UNIVERSE_QUOTE = os.getenv("UNIVERSE_QUOTE", "USDT")
+    UNIVERSE_MIN_VOLUME = 5_000_000  # 24h quote volume
+    UNIVERSE_MIN_RANGE = 0.04  # 24h (high - low) / low
+    UNIVERSE_MIN_MOVE = 0.03  # |24h change|, either this or the range qualifies
+    UNIVERSE_TIERS = [(20, 1), (80, 4)]  # (symbols, scanned every Nth tick), most active tier first
+    UNIVERSE_TICKERS_COST = 40  # Rate-limit weight of an all-symbols fetch_tickers (Binance)
+
+    # Analysis pool: indicator work runs off the event loop so bot commands stay responsive
+    ANALYSIS_EXECUTOR = os.getenv("ANALYSIS_EXECUTOR", "thread")  # thread, process or inline
+    ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+    ANALYSIS_MAX_PENDING = 64  # Analyses queued or running at once, further ones wait (backpressure)
+    LOOP_LAG_INTERVAL = 0.05  # Seconds between event-loop lag probes
+    LOOP_LAG_WARN = 0.1  # Log a warning when the loop stalls longer than this
+
+    # Streaming mode: candles arrive over Binance kline WebSockets instead of REST polling
+    STREAMING = os.getenv("STREAMING", "0") == "1"
+    STREAM_URL = os.getenv("STREAM_URL", "wss://stream.binance.com:9443")
+    STREAM_MAX_PER_CONNECTION = 200  # Streams multiplexed on one connection (Binance allows 1024)
+    STREAM_HEARTBEAT = 30.0  # Seconds between pings, a silent connection is dropped and reopened
+    STREAM_RECONNECT_DELAY = 1.0  # Seconds, doubled on every failed reconnect
+    STREAM_RECONNECT_MAX = 60.0
+    STREAM_DIGEST_DELAY = 2.0  # Seconds to collect closes of one candle into one digest
+    SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "10"))  # Symbols fetched in parallel
+    SCAN_TIMEFRAMES = [tf for tf in os.getenv("SCAN_TIMEFRAMES", DEFAULT_TIMEFRAME).split(",") if tf]
     ADMIN_ID = int(os.getenv("362508830", "0")) # Replace with your User ID or set in .env
+
+    # Notifications (signals are delivered from a background queue)
+    SUBSCRIBER_IDS = [int(x) for x in os.getenv("SUBSCRIBER_IDS", "").split(",") if x.strip()]  # Chats besides ADMIN_ID
+    TELEGRAM_GLOBAL_RATE = 25.0  # Messages per second across all chats (Telegram allows ~30)
+    TELEGRAM_CHAT_RATE = 1.0  # Messages per second to a single chat
+    NOTIFY_QUEUE_SIZE = 1000  # Pending messages before new ones are dropped
+    NOTIFY_MAX_RETRIES = 5  # Delivery attempts per message after a flood wait or network error
+    NOTIFY_DIGEST_LIMIT = 4000  # Characters per digest message (Telegram's hard limit is 4096)
+
+    # Signal tracking (emitted signals survive restarts, duplicates are suppressed while one is open)
+    SIGNAL_DB_PATH = os.getenv("SIGNAL_DB_PATH", "data/signals.db")
+    MONITOR_INTERVAL = 60  # Seconds between TP/SL checks, one fetch_tickers call each
+    SIGNAL_MAX_AGE_HOURS = 72  # Open signals older than this are closed as expired
+
+    # Metrics (Prometheus text format at http://METRICS_HOST:METRICS_PORT/metrics)
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # 0 = disabled
     
     # Risk Management
     RISK_REWARD_RATIOS = [1.0, 2.0, 3.0] # TP1, TP2, TP3 multipliers
+
+    # Parameter sweep (optimize.py)
+    SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", "0"))  # 0 = one per CPU
+    SWEEP_RESULTS_PATH = "data/sweep_results.csv"
+
+    # Portfolio backtest (backtest.py --portfolio)
+    PORTFOLIO_RISK_PER_TRADE = 0.01  # Share of the balance lost if the SL is hit
+    PORTFOLIO_MAX_POSITIONS = 10  # Concurrent open positions across all symbols
+    TP_FRACTIONS = [0.5, 0.25, 0.25]  # Share of a position closed at TP1, TP2, TP3
+    FEE_RATE = 0.001  # Per fill, as a fraction of the notional (0.1% taker)
+    SLIPPAGE = 0.0005  # Adverse fill on market entries and stops
+    PORTFOLIO_CHUNK = 1024  # Candles read per symbol at a time from the store
+
+    # Robustness checks (backtest.py --robustness)
+    WALK_FORWARD_FOLDS = 5  # Out-of-sample test windows
+    WALK_FORWARD_TRAIN_RATIO = 3.0  # Training window length, in test windows
+    MONTE_CARLO_RESAMPLES = 100_000  # Bootstrapped equity curves
+    MONTE_CARLO_POINTS = 100  # Equity values kept per curve for the confidence bands
+    MONTE_CARLO_CHUNK = 1 << 22  # Cells (curves x trades) resampled at once, bounds memory
+
+    # Benchmarks (benchmark.py)
+    BENCHMARK_BASELINE_PATH = "benchmark_baseline.json"
@@ -1,4 +1,9 @@
+import time
+# Before anything heavy is imported, so the report covers the imports too
+STARTED = time.perf_counter()
+
 import asyncio
+import importlib
 import logging
 import os
 from aiogram import Bot, Dispatcher
@@ -8,14 +13,25 @@ from aiogram.client.session.aiohttp import AiohttpSession
 
 from config import Config
 from app.services.market_data import MarketDataService
+from app.services.exchange_router import HedgedMarketData
 from app.services.signal_analysis import SignalAnalysisService
-from app.bot.formatting import format_signal_message
+from app.bot.formatting import format_signal_message, format_stats_message
 from app.services.scanner import ScannerService
+from app.services.notifier import NotificationService
+from app.services.signal_store import SignalStore
+from app.services.signal_monitor import SignalMonitor
+from app.services.indicator_cache import IndicatorCache
+from app.services.analysis_pool import AnalysisPool, LoopLagMonitor
+from app.services.metrics import metrics, start_metrics_server
+from app.services.startup import StartupReport
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
 async def main():
+    startup = StartupReport(STARTED)
+    startup.mark('imports')
+
     # Check for PythonAnywhere proxy
     session = None
     proxy_url = os.getenv("http_proxy")
@@ -26,6 +42,13 @@ async def main():
     # Initialize Bot with proxy session if needed
     bot = Bot(token=Config.BOT_TOKEN, session=session)
     dp = Dispatcher()
+    # Shared by /signal and the scanner: a symbol the scanner just evaluated
+    # costs /signal no indicator work
+    indicator_cache = IndicatorCache()
+    # With several EXCHANGE_IDS, slow or failing exchanges are hedged around
+    MarketData = HedgedMarketData if len(Config.EXCHANGE_IDS) > 1 else MarketDataService
+    # Indicator work runs off the loop so commands are answered during a scan
+    analysis_pool = AnalysisPool()
 
     # --- Command Handlers ---
     @dp.message(Command("start"))
@@ -34,29 +57,38 @@ async def main():
             f"👋 Hello! I am your Trading Bot.\n"
             f"Your ID is: `{message.from_user.id}` (Put this in config.py)\n\n"
             f"Commands:\n"
-            f"/signal <symbol> - Get manual signal (e.g. /signal BTC/USDT)"
+            f"/signal <symbol> [timeframe] - Get manual signal (e.g. /signal BTC/USDT 15m)"
         )
 
     @dp.message(Command("signal"))
     async def cmd_signal(message: Message):
         args = message.text.split()
         if len(args) < 2:
-            await message.answer("⚠️ Usage: /signal <symbol>\nExample: `/signal BTC/USDT`")
+            await message.answer("⚠️ Usage: /signal <symbol> [timeframe]\nExample: `/signal BTC/USDT 15m`")
             return
         
         symbol = args[1].upper()
-        await message.answer(f"🔍 Analyzing {symbol}...")
+        timeframe = args[2] if len(args) > 2 else Config.DEFAULT_TIMEFRAME
+        await message.answer(f"🔍 Analyzing {symbol} {timeframe}...")
         
         try:
-            market_service = MarketDataService()
-            df = await market_service.fetch_ohlcv(symbol)
-            await market_service.close()
+            # Shared client: concurrent requests for the same symbol share one fetch,
+            # and with BASE_TIMEFRAME set other timeframes are resampled locally
+            market = MarketData.shared()
+            exchange_id, candles = await market.fetch_candles_with_source(symbol, timeframe)
             
-            if df is None:
-                await message.answer(f"❌ Error fetching data for {symbol}")
+            if candles is None or len(candles) == 0:
+                await message.answer(f"❌ Error fetching data for {symbol} {timeframe}")
                 return
                 
-            signal = SignalAnalysisService.generate_signal(symbol, df)
+            atr_value, rsi_value = await indicator_cache.latest_in(
+                analysis_pool, exchange_id, symbol, timeframe, candles
+            )
+            signal = SignalAnalysisService.build_signal(
+                symbol, float(candles.close[-1]), atr_value, rsi_value, candles.datetime_at(-1)
+            )
+            if signal and "error" not in signal:
+                signal['timeframe'] = timeframe
             response = format_signal_message(signal)
             await message.answer(response, parse_mode="Markdown")
             
@@ -64,13 +96,76 @@ async def main():
             logging.error(f"Error processing signal: {e}")
             await message.answer("❌ An error occurred while analyzing.")
 
-    # --- Start Scanner ---
-    # Pass the bot instance to the scanner so it can send messages
-    scanner = ScannerService(bot)
-    asyncio.create_task(scanner.start_scanning())
+    @dp.message(Command("stats"))
+    async def cmd_stats(message: Message):
+        # Admin only: stage latencies and error counters of the scanner
+        if Config.ADMIN_ID == 0 or message.from_user.id != Config.ADMIN_ID:
+            return
+        await message.answer(format_stats_message(metrics.snapshot()), parse_mode="Markdown")
+
+    startup.mark('bot')
+
+    # --- Metrics endpoint ---
+    lag_monitor = LoopLagMonitor().start()
+    metrics_runner = None
+    if Config.METRICS_PORT:
+        metrics_runner = await start_metrics_server()
+        logging.info(f"📈 Metrics at http://{Config.METRICS_HOST}:{Config.METRICS_PORT}/metrics")
+
+    # Signals go out through the notifier's queue, paced to Telegram's limits
+    notifier = NotificationService(bot)
+    # Emitted signals are stored so they are not repeated and their TP/SL gets tracked
+    signal_store = SignalStore()
+    services = {}
+
+    async def start_services():
+        # The exchange client comes up after polling has started: importing
+        # ccxt and loading markets are the slow part of a restart
+        try:
+            await asyncio.to_thread(importlib.import_module, 'ccxt.async_support')
+            startup.mark('ccxt import')
+            market = MarketData.shared()
+            await market.load_markets()
+            startup.mark('markets')
+
+            scanner = services['scanner'] = ScannerService(
+                bot, market, notifier, signal_store, indicator_cache, analysis_pool
+            )
+            monitor = services['monitor'] = SignalMonitor(market, signal_store, notifier)
+            # Candles over WebSocket, evaluated as soon as they close, where
+            # the exchange has a stream
+            streaming = Config.STREAMING and await scanner.start_streaming()
+            if not streaming:
+                asyncio.create_task(scanner.start_scanning())
+            asyncio.create_task(monitor.start_monitoring())
+            startup.mark('scanner')
+        except Exception as e:
+            logging.error(f"Error starting scanner: {e}")
+        startup.log()
+
+    async def on_startup():
+        startup.mark('polling')
+        services['task'] = asyncio.create_task(start_services())
+
+    dp.startup.register(on_startup)
 
     # Start Polling
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if 'task' in services:
+            services['task'].cancel()
+        if 'monitor' in services:
+            services['monitor'].stop()
+        if 'scanner' in services:
+            await services['scanner'].stop()
+        await lag_monitor.stop()
+        analysis_pool.shutdown(wait=False)
+        await notifier.close()
+        signal_store.close()
+        await MarketData.close_shared()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
 if __name__ == "__main__":
     if not Config.BOT_TOKEN:
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+from app.services.market_data import MarketDataService
+from app.services.candle_store import CandleStore
+from app.services.optimizer import ParameterSweep, build_grid
+from config import Config
+
+# Grid to sweep. Parameters left out keep their Config value.
+GRID = {
+    'rsi_oversold': [20, 25, 30, 35],
+    'rsi_overbought': [65, 70, 75, 80],
+    'atr_period': [7, 10, 14, 21],
+    'atr_multiplier': [1.0, 1.5, 2.0, 2.5],
+    'reward_ratio': [1.0, 1.5, 2.0, 3.0],
+}
+
+async def load_candles(symbols, days):
+    market_service = MarketDataService()
+    store = CandleStore()
+    since = market_service.exchange.milliseconds() - days * 24 * 60 * 60 * 1000
+
+    candles = {}
+    try:
+        for symbol in symbols:
+            print(f"[INFO] Loading {symbol}...")
+            try:
+                df = await store.load_dataframe(market_service, symbol, since=since)
+            except Exception as e:
+                print(f"[ERROR] History incomplete for {symbol}, skipping it: {e}")
+                continue
+            if df is not None and len(df) > 0:
+                candles[symbol] = df
+    finally:
+        await market_service.close()
+    return candles
+
+def run_sweep(symbols=None, days=365):
+    if symbols is None:
+        symbols = Config.SYMBOLS_TO_SCAN
+
+    candles = asyncio.run(load_candles(symbols, days))
+    if not candles:
+        print("[ERROR] Failed to fetch data.")
+        return
+
+    grid = build_grid(**GRID)
+    print(f"[START] Sweeping {len(grid)} parameter sets over {len(candles)} symbols...")
+
+    started = time.perf_counter()
+    table = ParameterSweep(candles).run(grid)
+    elapsed = time.perf_counter() - started
+
+    os.makedirs(os.path.dirname(Config.SWEEP_RESULTS_PATH) or ".", exist_ok=True)
+    table.to_csv(Config.SWEEP_RESULTS_PATH, index=False)
+
+    print("\n" + "="*30)
+    print("SWEEP RESULTS")
+    print("="*30)
+    print(f"Finished in {elapsed:.1f}s, full table saved to {Config.SWEEP_RESULTS_PATH}")
+    print("\nTop 10:")
+    print(table.head(10).to_string(index=False))
+
+if __name__ == "__main__":
+    run_sweep()
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+from app.services.analysis_pool import AnalysisPool, LoopLagMonitor
+from app.services.indicators import latest_indicators
+from app.testing.synthetic import generate_ohlcv
+
+def busy(seconds):
+    # Pure Python CPU work, holds the GIL between switches
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+def test_pool_keeps_loop_responsive():
+    async def run(mode):
+        pool = AnalysisPool(mode, workers=2)
+        monitor = LoopLagMonitor(interval=0.01).start()
+        await asyncio.sleep(0.02)
+        await asyncio.gather(*(pool.run(busy, 0.2) for _ in range(4)))
+        # Let the probe that was due during the work report
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        pool.shutdown()
+        return monitor.max_lag
+
+    assert asyncio.run(run('thread')) < 0.1
+    # On the loop itself every job is a stall the monitor sees
+    assert asyncio.run(run('inline')) >= 0.15
+
+def test_backpressure_bounds_pending_work():
+    release = threading.Event()
+    running = []
+
+    def job(i):
+        running.append(i)
+        release.wait(5)
+        return i
+
+    async def run():
+        pool = AnalysisPool('thread', workers=4, max_pending=2)
+        tasks = [asyncio.create_task(pool.run(job, i)) for i in range(6)]
+        await asyncio.sleep(0.1)
+        # Only two calls were handed to the executor, the rest wait for a slot
+        assert pool.pending == 2 and len(running) == 2
+        release.set()
+        results = await asyncio.gather(*tasks)
+        pool.shutdown()
+        return results
+
+    assert asyncio.run(run()) == list(range(6))
+
+def test_process_pool_matches_inline():
+    rows = generate_ohlcv(300, seed=2)
+    high = [r[2] for r in rows]
+    low = [r[3] for r in rows]
+    close = [r[4] for r in rows]
+
+    async def run():
+        pool = AnalysisPool('process', workers=1)
+        assert not pool.shares_memory
+        result = await pool.run(latest_indicators, high, low, close)
+        pool.shutdown()
+        return result
+
+    assert asyncio.run(run()) == latest_indicators(high, low, close)
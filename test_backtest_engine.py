@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from app.services.signal_analysis import SignalAnalysisService
+from app.services.backtest_engine import BacktestEngine
+from app.services.optimizer import ParameterSweep, build_grid
+from config import Config
+
+def make_candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Random walk with slow regime changes so RSI crosses 30/70 regularly
+    drift = np.repeat(rng.normal(0, 0.004, n // 50 + 1), 50)[:n]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.006, n)) * close
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start='2023-01-01', periods=n, freq='h'),
+        'open': np.roll(close, 1),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(100, 1000, n),
+    })
+
+def reference_backtest(symbol, df):
+    # The original row-by-row loop from backtest.py
+    balance = 1000
+    trades = []
+    for i in range(50, len(df) - 1):
+        signal = SignalAnalysisService.generate_signal(symbol, df.iloc[:i+1].copy())
+        if not signal or "error" in signal:
+            continue
+
+        sl_price = signal['sl']
+        tp1_price = signal['tps'][0]
+        direction = signal['direction']
+        outcome = None
+        pnl = 0
+        for j in range(i + 1, len(df)):
+            high = df.iloc[j]['high']
+            low = df.iloc[j]['low']
+            if direction == "LONG":
+                if low <= sl_price:
+                    outcome, pnl = "LOSS", -10
+                    break
+                if high >= tp1_price:
+                    outcome, pnl = "WIN", 10 * Config.RISK_REWARD_RATIOS[0]
+                    break
+            else:
+                if high >= sl_price:
+                    outcome, pnl = "LOSS", -10
+                    break
+                if low <= tp1_price:
+                    outcome, pnl = "WIN", 10 * Config.RISK_REWARD_RATIOS[0]
+                    break
+
+        if outcome:
+            balance += pnl
+            trades.append({
+                "date": signal['timestamp'],
+                "type": direction,
+                "entry": signal['entry'],
+                "outcome": outcome,
+                "pnl": pnl
+            })
+    return balance, trades
+
+def test_matches_reference_loop():
+    for seed in range(3):
+        df = make_candles(600, seed)
+        balance, trades = reference_backtest("BTC/USDT", df)
+        result = BacktestEngine.run("BTC/USDT", df)
+
+        assert len(trades) > 0
+        assert result['trades'] == trades
+        assert result['final_balance'] == balance
+        assert result['wins'] + result['losses'] == len(trades)
+
+def test_search_window_does_not_change_results():
+    df = make_candles(3000, seed=7)
+    # Small windows force the forward search through several doubling rounds
+    old = BacktestEngine.INITIAL_WINDOW, BacktestEngine.MAX_CELLS
+    BacktestEngine.INITIAL_WINDOW, BacktestEngine.MAX_CELLS = 1, 64
+    try:
+        small = BacktestEngine.run("BTC/USDT", df)
+    finally:
+        BacktestEngine.INITIAL_WINDOW, BacktestEngine.MAX_CELLS = old
+    assert small == BacktestEngine.run("BTC/USDT", df)
+
+def test_sweep_matches_single_run():
+    candles = {"BTC/USDT": make_candles(800, 1), "ETH/USDT": make_candles(800, 2)}
+    grid = build_grid(rsi_oversold=[25, 30], atr_multiplier=[1.0, Config.ATR_MULTIPLIER_SL])
+    table = ParameterSweep(candles, workers=2).run(grid)
+    assert len(table) == 4
+    assert table['pnl'].is_monotonic_decreasing
+
+    default = table[(table['rsi_oversold'] == Config.RSI_OVERSOLD) & (table['atr_multiplier'] == Config.ATR_MULTIPLIER_SL)].iloc[0]
+    runs = [BacktestEngine.run(symbol, df) for symbol, df in candles.items()]
+    assert default['trades'] == sum(len(r['trades']) for r in runs)
+    assert default['pnl'] == sum(r['final_balance'] - r['initial_balance'] for r in runs)
+
+if __name__ == "__main__":
+    test_matches_reference_loop()
+    test_search_window_does_not_change_results()
+    test_sweep_matches_single_run()
+    print("[SUCCESS] Vectorized backtest matches the reference loop")
@@ -0,0 +1,89 @@
+import asyncio
+import ccxt.async_support as ccxt
+from app.services.market_data import MarketDataService
+from app.services.candle_store import CandleStore
+
+HOUR = 60 * 60 * 1000
+
+class PagedExchange:
+    # Serves a fixed hourly history, at most `page_size` candles per call
+    def __init__(self, start, count, page_size=100):
+        self.candles = [[start + i * HOUR, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0] for i in range(count)]
+        self.page_size = page_size
+        # The last candle is still forming
+        self.now = start + (count - 1) * HOUR + HOUR // 2
+        self.calls = 0
+        # Pages from this timestamp on fail
+        self.fail_at = None
+
+    def parse_timeframe(self, timeframe):
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def milliseconds(self):
+        return self.now
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls += 1
+        if self.fail_at is not None and since >= self.fail_at:
+            raise ccxt.NetworkError("connection reset")
+        limit = min(limit or self.page_size, self.page_size)
+        rows = [c for c in self.candles if c[0] >= since and c[0] <= self.now]
+        return rows[:limit]
+
+def make_service(exchange):
+    service = MarketDataService()
+    asyncio.run(service.close())
+    service.exchange = exchange
+    return service
+
+def test_sync_pages_and_fetches_only_the_tail(tmp_path):
+    start = 1_700_000_000_000 // HOUR * HOUR
+    exchange = PagedExchange(start, 350)
+    service = make_service(exchange)
+    store = CandleStore(str(tmp_path))
+
+    # The last candle is still forming and must not be stored
+    written = asyncio.run(store.sync(service, "BTC/USDT", "1h", since=start))
+    assert written == 349
+    assert exchange.calls == 4
+
+    candles = store.read(service.exchange_id, "BTC/USDT", "1h")
+    assert len(candles) == 349
+    assert candles['timestamp'][0] == start
+    assert (candles['timestamp'][1:] - candles['timestamp'][:-1] == HOUR).all()
+
+    # Two more candles close: only the tail is downloaded
+    exchange.candles += [[start + i * HOUR, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(350, 352)]
+    exchange.now += 2 * HOUR
+    exchange.calls = 0
+    assert asyncio.run(store.sync(service, "BTC/USDT", "1h", since=start)) == 2
+    assert exchange.calls == 1
+
+    df = store.to_dataframe(store.read(service.exchange_id, "BTC/USDT", "1h", since=start + 100 * HOUR))
+    assert len(df) == 251
+    assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def test_sync_backfills_the_head_and_raises_on_errors(tmp_path):
+    start = 1_700_000_000_000 // HOUR * HOUR
+    exchange = PagedExchange(start, 350)
+    service = make_service(exchange)
+    store = CandleStore(str(tmp_path))
+
+    # A failed page is an error, not the end of the history; what came before it is kept
+    exchange.fail_at = start + 300 * HOUR
+    try:
+        asyncio.run(store.sync(service, "BTC/USDT", "1h", since=start + 200 * HOUR))
+        assert False, "sync should raise"
+    except ccxt.NetworkError:
+        pass
+    assert store.last_timestamp(service.exchange_id, "BTC/USDT", "1h") == start + 299 * HOUR
+
+    # A longer run later: the head is downloaded in front of the stored candles
+    exchange.fail_at = None
+    exchange.calls = 0
+    assert asyncio.run(store.sync(service, "BTC/USDT", "1h", since=start)) == 249
+    # Two head pages, one tail page
+    assert exchange.calls == 3
+    candles = store.read(service.exchange_id, "BTC/USDT", "1h")
+    assert candles['timestamp'].tolist() == [start + i * HOUR for i in range(349)]
+    assert candles['close'].tolist() == [1.5 + i for i in range(349)]
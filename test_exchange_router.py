@@ -0,0 +1,140 @@
+import asyncio
+import time
+from config import Config
+from app.services.exchange_router import HedgedMarketData
+from app.services.market_data import MarketDataService
+from app.services.metrics import STAGE_SECONDS
+from app.services.scanner import ScannerService
+from app.services.signal_monitor import SignalMonitor
+from app.services.signal_store import SignalStore
+from app.testing.fake_exchange import FakeExchange
+from app.testing.fake_bot import FakeBot
+
+def make_router(*exchanges, budget=0.2):
+    return HedgedMarketData([MarketDataService(exchange) for exchange in exchanges], budget=budget)
+
+def test_slow_primary_is_hedged_demoted_and_retried(monkeypatch):
+    monkeypatch.setattr(Config, "HEALTH_ALPHA", 0.5)
+    primary = FakeExchange(exchange_id='primary', latency=1.0, rateLimit=1)
+    backup = FakeExchange(exchange_id='backup', latency=0.01, rateLimit=1)
+    router = make_router(primary, backup)
+
+    async def scenario():
+        # A slow ticker snapshot does not rate the exchange
+        await router.request('fetch_tickers')
+        assert router.services[0].health.latency == 0
+        assert router.route()[0].exchange_id == 'primary'
+
+        started = time.monotonic()
+        exchange_id, candles = await router.fetch_candles_with_source("BTC/USDT", "1h", 100)
+        elapsed = time.monotonic() - started
+        # Answered by the backup shortly after the budget, not after the primary's second
+        assert exchange_id == 'backup' and candles is not None and len(candles) == 100
+        assert 0.2 <= elapsed < 0.6
+        assert candles.close.tolist() == [r[4] for r in backup.candles("BTC/USDT", "1h")[-100:]]
+
+        # The primary's request finishes in the background and its latency counts
+        await asyncio.sleep(1.0)
+        assert router.services[0].health.latency >= 0.5
+        assert [s.exchange_id for s in router.route()] == ['backup', 'primary']
+
+        # Next call goes to the backup first, the primary is not asked at all
+        await router.fetch_candles("ETH/USDT", "1h", 100)
+        assert primary.calls['fetch_ohlcv'] == 1 and backup.calls['fetch_ohlcv'] == 2
+        # Keys and clock still follow the first exchange of the list
+        assert router.exchange_id == 'primary'
+
+        # Once its average has faded the primary is asked again, and its
+        # fresh answer replaces the stale average
+        monkeypatch.setattr(Config, "HEALTH_HALF_LIFE", 0.1)
+        primary.latency = 0.01
+        await asyncio.sleep(0.5)
+        assert router.route()[0].exchange_id == 'primary'
+        await router.fetch_candles("SOL/USDT", "1h", 100)
+        assert primary.calls['fetch_ohlcv'] == 2 and backup.calls['fetch_ohlcv'] == 2
+        assert router.services[0].health.latency < 0.05
+        await router.close()
+
+    asyncio.run(scenario())
+
+def test_outage_fails_over_without_waiting(monkeypatch):
+    monkeypatch.setattr(Config, "HEALTH_MAX_ERRORS", 2)
+    primary = FakeExchange(exchange_id='primary', rateLimit=1)
+    backup = FakeExchange(exchange_id='backup', rateLimit=1)
+    primary.down = True
+    router = make_router(primary, backup, budget=5.0)
+
+    async def scenario():
+        started = time.monotonic()
+        for symbol in ["BTC/USDT", "ETH/USDT", "SOL/USDT"]:
+            assert await router.fetch_candles(symbol, "1h", 50) is not None
+        # A failure hedges at once instead of waiting out the 5s budget
+        assert time.monotonic() - started < 2.5
+        # Two failures in a row: skipped while it cools down
+        assert primary.calls['fetch_ohlcv'] == 2 and router.services[0].health.down
+        assert router.route()[0].exchange_id == 'backup'
+
+        tickers = await router.fetch_tickers(["BTC/USDT"])
+        assert set(tickers) == {"BTC/USDT"}
+
+        # Nothing left to ask
+        backup.down = True
+        assert await router.fetch_candles("XRP/USDT", "1h", 50) is None
+        await router.close()
+
+    asyncio.run(scenario())
+
+def test_tickers_fail_over_without_hedging():
+    primary = FakeExchange(exchange_id='primary', latency=0.5, rateLimit=1)
+    backup = FakeExchange(exchange_id='backup', latency=0.01, rateLimit=1)
+    router = make_router(primary, backup, budget=0.1)
+
+    async def scenario():
+        # Slower than the budget, but a snapshot is too heavy to ask twice
+        assert set(await router.fetch_tickers(["BTC/USDT"])) == {"BTC/USDT"}
+        assert primary.calls['fetch_tickers'] == 1 and backup.calls['fetch_tickers'] == 0
+
+        # A failed snapshot goes to the next exchange
+        primary.down = True
+        assert set(await router.fetch_tickers(["BTC/USDT"])) == {"BTC/USDT"}
+        assert primary.calls['fetch_tickers'] == 2 and backup.calls['fetch_tickers'] == 1
+
+        backup.down = True
+        assert await router.fetch_tickers(["BTC/USDT"]) == {}
+        await router.close()
+
+    asyncio.run(scenario())
+
+def test_state_follows_the_answering_exchange():
+    primary = FakeExchange(exchange_id='primary', rateLimit=1)
+    backup = FakeExchange(exchange_id='backup', rateLimit=1)
+    primary.down = True
+    router = make_router(primary, backup)
+    store = SignalStore(':memory:')
+    scanner = ScannerService(FakeBot(), router, signal_store=store)
+
+    def fetches(exchange_id):
+        return STAGE_SECONDS.merged(stage='fetch', exchange=exchange_id)[2]
+
+    async def scenario():
+        # Indicators folded from the backup's candles are kept under its name,
+        # and the fetch is timed against it
+        before = fetches('primary'), fetches('backup')
+        await scanner.scan_symbol("BTC/USDT", "1h")
+        assert {key[0] for key in scanner.indicators.entries} == {'backup'}
+        assert (fetches('primary'), fetches('backup')) == (before[0], before[1] + 1)
+
+        # An open signal is checked against the prices of its own exchange
+        signal = {'symbol': "BTC/USDT", 'direction': 'LONG', 'entry': 100.0, 'sl': 90.0, 'tps': [110.0, 120.0, 130.0]}
+        store.record(signal, 'backup', '1h')
+        primary.down = False
+        primary.prices["BTC/USDT"] = 50.0
+        backup.prices["BTC/USDT"] = 200.0
+        events = await SignalMonitor(router, store).check()
+        assert [event['event'] for event in events] == ['TP3']
+        assert primary.calls['fetch_tickers'] == 0
+
+        await scanner.stop()
+        await router.close()
+
+    asyncio.run(scenario())
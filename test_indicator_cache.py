@@ -0,0 +1,57 @@
+import numpy as np
+from app.services.candles import Candles
+from app.services.indicator_cache import IndicatorCache
+from app.services.indicators import latest_indicators
+from app.testing.synthetic import generate_ohlcv
+
+def test_incremental_values_and_stats():
+    candles = Candles.from_ohlcv(generate_ohlcv(400, seed=5))
+    cache = IndicatorCache()
+
+    # Sliding 100-candle window with a forming candle, like the scanner
+    for end in range(100, 400):
+        window = candles[end - 100:end]
+        expected = latest_indicators(candles.high[:end], candles.low[:end], candles.close[:end])
+        # The forming candle is peeked, not committed
+        got = cache.latest("binance", "BTC/USDT", "1h", window)
+        full = latest_indicators(candles.high[:end - 1], candles.low[:end - 1], candles.close[:end - 1])
+        assert got[0] != full[0]
+        np.testing.assert_allclose(got, expected, rtol=1e-12)
+    stats = cache.stats()
+    assert stats['misses'] == 2 and stats['extends'] == 2 * 299 and stats['hits'] == 0
+
+    # Same candle again (e.g. /signal right after the scan): a lookup
+    last = candles[299:399]
+    again = cache.latest("binance", "BTC/USDT", "1h", last)
+    assert cache.stats()['hits'] == 2
+    # Another strategy on the same indicators, different period: its own entry
+    cache.get("binance", "BTC/USDT", "1h", 'rsi', last, (7,))
+    assert cache.stats()['misses'] == 3
+    assert again == cache.latest("binance", "BTC/USDT", "1h", last)
+
+    # Closed evaluation of an older candle rebuilds instead of reading ahead
+    old = cache.latest("binance", "BTC/USDT", "1h", candles[200:300], forming=False)
+    assert old == latest_indicators(candles.high[200:300], candles.low[200:300], candles.close[200:300])
+
+def test_lru_eviction_and_register():
+    candles = Candles.from_ohlcv(generate_ohlcv(50, seed=1))
+    cache = IndicatorCache(maxsize=2)
+
+    class LastClose:
+        # Minimal custom indicator
+        def __init__(self):
+            self.value = float('nan')
+
+        def update(self, close):
+            self.value = close
+
+        def peek(self, close):
+            return close
+
+    cache.register('last', LastClose)
+    assert cache.get("x", "A", "1h", 'last', candles, forming=False) == candles.close[-1]
+    cache.get("x", "B", "1h", 'last', candles)
+    cache.get("x", "A", "1h", 'last', candles, forming=False)  # A becomes most recent
+    cache.get("x", "C", "1h", 'last', candles)
+    assert [key[1] for key in cache.entries] == ["A", "C"]
+    assert cache.stats()['evictions'] == 1
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from app.services import signal_analysis
+from app.services.signal_analysis import SignalAnalysisService
+from app.services.candles import Candles
+from app.services.indicator_cache import IndicatorCache
+from app.testing.synthetic import generate_ohlcv
+
+def make_candles(n, seed=0):
+    rows = generate_ohlcv(n, seed=seed)
+    return Candles.from_ohlcv(rows), pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+
+def test_streaming_matches_batch(monkeypatch):
+    # The streaming indicators follow the manual Wilder path
+    monkeypatch.setattr(signal_analysis, "HAS_PANDAS_TA", False)
+    candles, df = make_candles(2000)
+    atr = SignalAnalysisService.calculate_atr(df).to_numpy()
+    rsi = SignalAnalysisService.calculate_rsi(df).to_numpy()
+
+    cache = IndicatorCache()
+    stream_atr = []
+    stream_rsi = []
+    # Feed a sliding 100-candle window of closed candles, one new candle per call, like the scanner
+    for end in range(1, len(df) + 1):
+        a, r = cache.latest("fake", "BTC/USDT", "1h", candles[max(0, end - 100):end], forming=False)
+        stream_atr.append(a)
+        stream_rsi.append(r)
+
+    np.testing.assert_allclose(stream_atr, atr, rtol=1e-12)
+    np.testing.assert_allclose(stream_rsi[1:], rsi[1:], rtol=1e-12)
+    assert np.isnan(stream_rsi[0]) and np.isnan(rsi[0])
+
+def test_gap_or_older_window_restarts_from_window():
+    candles, _ = make_candles(500, seed=3)
+    cache = IndicatorCache()
+    cache.latest("fake", "ETH/USDT", "1h", candles[:100], forming=False)
+
+    # Nothing between candle 99 and 300 was seen, so the state is rebuilt
+    window = candles[300:400]
+    expected = IndicatorCache().latest("fake", "ETH/USDT", "1h", window, forming=False)
+    assert cache.latest("fake", "ETH/USDT", "1h", window, forming=False) == expected
+
+    # A window ending before the stored state is not answered with a later candle's values
+    older = candles[250:350]
+    expected = IndicatorCache().latest("fake", "ETH/USDT", "1h", older, forming=False)
+    assert cache.latest("fake", "ETH/USDT", "1h", older, forming=False) == expected
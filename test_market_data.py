@@ -0,0 +1,114 @@
+import asyncio
+from config import Config
+from app.services.market_data import MarketDataService
+from app.testing.fake_exchange import FakeExchange
+
+HOUR = 60 * 60 * 1000
+
+def test_cache_expires_at_candle_close_and_coalesces():
+    now = 1_700_000_000_000 // HOUR * HOUR + 10 * 60 * 1000
+    exchange = FakeExchange(latency=0.05, now=now)
+    service = MarketDataService(exchange)
+
+    async def scenario():
+        # Ten concurrent identical requests share one fetch
+        frames = await asyncio.gather(*(service.fetch_ohlcv("BTC/USDT", "1h", 100) for _ in range(10)))
+        assert exchange.calls['fetch_ohlcv'] == 1
+        assert all(df is not None and len(df) == 100 for df in frames)
+
+        # Callers get their own copy, so generate_signal adding columns is harmless
+        frames[0]['ATR'] = 1.0
+        assert 'ATR' not in frames[1].columns
+
+        # Later in the same candle: served from the cache
+        exchange.now = now + 40 * 60 * 1000
+        await service.fetch_ohlcv("BTC/USDT", "1h", 100)
+        await service.fetch_ohlcv("ETH/USDT", "1h", 100)
+        assert exchange.calls['fetch_ohlcv'] == 2
+
+        # The candle has closed: fetched again
+        exchange.now = now + 50 * 60 * 1000
+        await service.fetch_ohlcv("BTC/USDT", "1h", 100)
+        assert exchange.calls['fetch_ohlcv'] == 3
+
+    asyncio.run(scenario())
+
+class MarketsExchange(FakeExchange):
+    # ccxt-style market metadata on top of the fake candles
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.markets = None
+        self.currencies = None
+
+    async def load_markets(self, reload=False):
+        self.calls['load_markets'] += 1
+        await asyncio.sleep(0.01)
+        return self.set_markets({"BTC/USDT": {"id": "BTCUSDT", "symbol": "BTC/USDT"}}, {"BTC": {"id": "BTC"}})
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+        self.currencies = currencies
+        return markets
+
+def test_markets_cached_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "MARKETS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(MarketDataService, "_markets", {})
+
+    async def first_requests(exchange):
+        service = MarketDataService(exchange)
+        # Concurrent first requests wait for one markets load
+        await asyncio.gather(*(service.fetch_candles(s, "1h") for s in ["BTC/USDT", "ETH/USDT"]))
+        return service
+
+    exchange = MarketsExchange()
+    asyncio.run(first_requests(exchange))
+    assert exchange.calls['load_markets'] == 1
+    assert (tmp_path / "fake.json").exists()
+
+    # A restart (nothing in memory) reads the markets from disk
+    monkeypatch.setattr(MarketDataService, "_markets", {})
+    restarted = MarketsExchange()
+    asyncio.run(first_requests(restarted))
+    assert restarted.calls['load_markets'] == 0
+    assert restarted.markets == exchange.markets and restarted.currencies == exchange.currencies
+
+    # Past the TTL they are fetched again
+    monkeypatch.setattr(MarketDataService, "_markets", {})
+    monkeypatch.setattr(Config, "MARKETS_CACHE_TTL", 0)
+    stale = MarketsExchange()
+    asyncio.run(first_requests(stale))
+    assert stale.calls['load_markets'] == 1
+
+def test_load_markets_before_any_request(tmp_path, monkeypatch):
+    # main.py loads the markets up front, on a cold cache
+    monkeypatch.setattr(Config, "MARKETS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(MarketDataService, "_markets", {})
+    exchange = MarketsExchange()
+
+    async def startup():
+        service = MarketDataService(exchange)
+        markets = await service.load_markets()
+        await service.fetch_candles("BTC/USDT", "1h")
+        return markets
+
+    markets = asyncio.run(startup())
+    assert markets == {"BTC/USDT": {"id": "BTCUSDT", "symbol": "BTC/USDT"}}
+    assert (tmp_path / "fake.json").exists()
+    # The first request reuses that load
+    assert exchange.calls['load_markets'] == 1
+
+def test_failures_are_logged(caplog):
+    exchange = FakeExchange(exchange_id='fake', rateLimit=1)
+    exchange.down = True
+    service = MarketDataService(exchange)
+
+    async def scenario():
+        assert await service.fetch_tickers(["BTC/USDT"]) == {}
+        await service.sync_clock()
+        await service.close()
+
+    with caplog.at_level('WARNING'):
+        asyncio.run(scenario())
+    messages = [(record.levelname, record.getMessage().split(':')[0]) for record in caplog.records]
+    assert ('ERROR', 'Error fetching tickers') in messages
+    assert ('WARNING', 'Error syncing clock with fake') in messages
@@ -0,0 +1,93 @@
+import threading
+from app.bot.formatting import format_stats_message
+from app.services.metrics import MetricsRegistry, Histogram, STAGE_SECONDS, metrics
+
+def test_quantile_interpolates_inside_buckets():
+    h = Histogram('h', 'test', ('stage',), buckets=(1.0, 2.0, 4.0))
+    assert h.quantile(0.5) == 0.0
+
+    for value in (0.5, 0.5, 1.5, 1.5):
+        h.observe(value, stage='a')
+    # Half of the observations are at or below the first bound
+    assert h.quantile(0.5) == 1.0
+    # Half way into the (1, 2] bucket
+    assert h.quantile(0.75) == 1.5
+    # The first bucket starts at 0
+    assert h.quantile(0.25) == 0.5
+
+    # Observations above the last bound land in +Inf, reported as the last bound
+    for _ in range(4):
+        h.observe(10.0, stage='b')
+    assert h.quantile(0.95) == 4.0
+    assert h.quantile(0.95, stage='a') == 1.9
+    assert h.quantile(0.5, stage='b') == 4.0
+    assert h.merged(stage='b') == ([0, 0, 0, 4], 40.0, 4)
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    errors = registry.counter('api_errors_total', 'API errors', ('exchange', 'error'))
+    latency = registry.histogram('latency_seconds', 'Latency', ('exchange',), buckets=(0.1, 1.0))
+    errors.inc(exchange='binance', error='NetworkError')
+    errors.inc(2, exchange='binance', error='NetworkError')
+    # Empty labels are left out
+    errors.inc(exchange='okx')
+    latency.observe(0.05, exchange='binance')
+    latency.observe(0.5, exchange='binance')
+    latency.observe(3.0, exchange='binance')
+
+    assert registry.render() == "\n".join([
+        '# HELP api_errors_total API errors',
+        '# TYPE api_errors_total counter',
+        'api_errors_total{exchange="binance",error="NetworkError"} 3',
+        'api_errors_total{exchange="okx"} 1',
+        '# HELP latency_seconds Latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{exchange="binance",le="0.1"} 1',
+        'latency_seconds_bucket{exchange="binance",le="1.0"} 2',
+        'latency_seconds_bucket{exchange="binance",le="+Inf"} 3',
+        'latency_seconds_sum{exchange="binance"} 3.55',
+        'latency_seconds_count{exchange="binance"} 3',
+    ]) + "\n"
+    # The same name returns the same metric
+    assert registry.counter('api_errors_total', 'API errors') is errors
+
+def test_snapshot_feeds_stats_message():
+    for value in (0.002, 0.004, 0.02):
+        STAGE_SECONDS.observe(value, stage='test_stage', exchange='fake')
+    # Series are per stage and exchange only
+    assert all(len(key) == 2 for key in STAGE_SECONDS.series)
+
+    stats = metrics.snapshot()
+    stage = stats['stages']['test_stage']
+    assert stage['count'] == 3
+    assert abs(stage['avg'] - 0.026 / 3) < 1e-12
+    assert stage['p50'] == STAGE_SECONDS.quantile(0.5, stage='test_stage')
+
+    message = format_stats_message(stats)
+    assert f"**Passes:** `{stats['passes']}`" in message
+    assert f"**Symbols scanned:** `{int(stats['symbols_scanned'])}`" in message
+    assert f"**API errors:** `{int(stats['api_errors'])}` | **Retries:** `{int(stats['retries'])}`" in message
+    assert f"`test_stage`: {stage['avg'] * 1000:.1f}ms / {stage['p50'] * 1000:.1f}ms / {stage['p95'] * 1000:.1f}ms (3)" in message
+
+def test_render_while_other_threads_add_series():
+    registry = MetricsRegistry()
+    errors = registry.counter('errors_total', 'Errors', ('symbol',))
+    latency = registry.histogram('latency_seconds', 'Latency', ('symbol',), buckets=(0.1, 1.0))
+
+    def writer(offset):
+        # Always a new series, so the dicts keep growing
+        for i in range(20000):
+            errors.inc(symbol=f"S{offset}-{i}")
+            latency.observe(0.5, symbol=f"S{offset}-{i}")
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(2)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        registry.render()
+        errors.total()
+        latency.merged()
+        latency.label_values('symbol')
+    for thread in threads:
+        thread.join()
+    assert errors.total() == latency.merged()[2] == len(errors.values) == 40000
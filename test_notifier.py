@@ -0,0 +1,80 @@
+import asyncio
+import time
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from config import Config
+from app.services.notifier import NotificationService
+from app.bot.formatting import format_signal_digest
+from app.testing.fake_bot import FakeBot
+
+class FloodBot(FakeBot):
+    """
+    Answers the first `floods` sends with a flood wait.
+    """
+
+    def __init__(self, floods: int, retry_after: int = 1, latency: float = 0.0):
+        super().__init__(latency)
+        self.floods = floods
+        self.retry_after = retry_after
+
+    async def send_message(self, chat_id, text, parse_mode=None, **kwargs):
+        if self.floods:
+            self.floods -= 1
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "Flood control exceeded", self.retry_after)
+        await super().send_message(chat_id, text, parse_mode, **kwargs)
+
+def make_signal(symbol):
+    return {
+        "symbol": symbol, "direction": "LONG", "entry": 100.0, "sl": 98.0,
+        "tps": [102.0, 104.0, 106.0], "atr": 1.3, "rsi": 25.0, "timestamp": None,
+    }
+
+def test_digest_is_split_by_size():
+    signals = [make_signal(f"COIN{i}/USDT") for i in range(40)]
+    messages = format_signal_digest(signals, limit=4000)
+    assert 1 < len(messages) < 40
+    assert all(len(m) <= 4000 for m in messages)
+    assert sum(m.count("Trading Signal") for m in messages) == 40
+    assert format_signal_digest(signals[:1]) == format_signal_digest(signals[:1], limit=10)
+
+def test_publish_does_not_wait_and_retries_flood_wait(monkeypatch):
+    monkeypatch.setattr(Config, "TELEGRAM_CHAT_RATE", 50.0)
+    bot = FloodBot(floods=1, latency=0.05)
+    notifier = NotificationService(bot, subscribers=[1, 2, 3])
+
+    async def run():
+        started = time.monotonic()
+        for i in range(3):
+            notifier.publish(f"message {i}")
+        queued_in = time.monotonic() - started
+        await notifier.join()
+        await notifier.close()
+        return queued_in, time.monotonic() - started
+
+    queued_in, elapsed = asyncio.run(run())
+
+    assert queued_in < 0.01
+    # Everyone got everything, in order, despite one flood wait
+    for chat_id in (1, 2, 3):
+        assert [text for chat, text in bot.sent if chat == chat_id] == ["message 0", "message 1", "message 2"]
+    assert 1.0 <= elapsed < 3.0
+
+def test_per_chat_rate(monkeypatch):
+    monkeypatch.setattr(Config, "TELEGRAM_CHAT_RATE", 20.0)
+    bot = FakeBot()
+    notifier = NotificationService(bot, subscribers=[1, 2])
+
+    async def run():
+        for i in range(6):
+            notifier.publish(f"message {i}")
+        started = time.monotonic()
+        await notifier.join()
+        elapsed = time.monotonic() - started
+        await notifier.close()
+        return elapsed
+
+    elapsed = asyncio.run(run())
+
+    assert len(bot.sent) == 12
+    # Six messages per chat at 20/s, both chats paced in parallel
+    assert 0.2 <= elapsed < 0.5
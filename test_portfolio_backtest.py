@@ -0,0 +1,120 @@
+import tracemalloc
+from app.services.candle_store import CandleStore
+from app.services.portfolio_backtest import PortfolioBacktester, candle_feed
+from app.testing.synthetic import generate_ohlcv
+
+HOUR = 60 * 60 * 1000
+START = 1_700_000_000_000 // HOUR * HOUR
+
+class ScriptedBacktester(PortfolioBacktester):
+    # Fires the given (is_long, atr) on the n-th candle of a symbol
+    def __init__(self, script, **kwargs):
+        super().__init__(**kwargs)
+        self.script = script
+        self.seen = {}
+
+    def signal(self, symbol, high, low, close):
+        n = self.seen[symbol] = self.seen.get(symbol, 0) + 1
+        return self.script.get((symbol, n))
+
+def test_feed_is_time_ordered(tmp_path):
+    store = CandleStore(str(tmp_path))
+    for i, symbol in enumerate(["A/USDT", "B/USDT", "C/USDT"]):
+        store.append("fake", symbol, "1h", generate_ohlcv(50 + i * 10, seed=i, start=START + i * 7 * HOUR))
+
+    rows = list(candle_feed(store, "fake", ["A/USDT", "B/USDT", "C/USDT"], "1h", chunk=7))
+    assert len(rows) == 50 + 60 + 70
+    assert [r[0] for r in rows] == sorted(r[0] for r in rows)
+    for symbol in ["A/USDT", "B/USDT", "C/USDT"]:
+        stored = store.read("fake", symbol, "1h")
+        assert [r[0] for r in rows if r[1] == symbol] == stored['timestamp'].tolist()
+
+    # Only candles from `since` on
+    since = START + 40 * HOUR
+    assert all(r[0] >= since for r in candle_feed(store, "fake", ["A/USDT", "B/USDT"], "1h", since=since))
+
+def test_partial_exits_fees_and_slippage():
+    fee, slip = 0.001, 0.0005
+    script = {
+        ("A", 1): (True, 1.0),   # LONG at 100: SL 98.5, TPs 101/102/103
+        ("A", 2): (True, 1.0),   # Repeats while open: ignored
+        ("B", 1): (False, 2.0),  # SHORT at 50: SL 53, TPs 48/46/44
+    }
+    bt = ScriptedBacktester(script, initial_balance=1000, risk_per_trade=0.01, fee_rate=fee, slippage=slip,
+                            tp_fractions=[0.5, 0.25, 0.25])
+    feed = [
+        (START, "A", 0, 100.5, 99.5, 100.0, 0),
+        (START, "B", 0, 50.5, 49.5, 50.0, 0),
+        (START + HOUR, "A", 0, 101.5, 99.5, 100.5, 0),    # TP1
+        (START + HOUR, "B", 0, 50.5, 43.0, 44.0, 0),      # TP1, TP2 and TP3 at once
+        (START + 2 * HOUR, "A", 0, 102.2, 100.0, 101.0, 0),  # TP2
+        (START + 3 * HOUR, "A", 0, 101.0, 98.0, 98.2, 0),  # SL on the rest
+    ]
+    result = bt.run(feed)
+
+    balance = 1000.0
+    # A
+    entry_a = 100 * (1 + slip)
+    qty_a = min(balance * 0.01 / (entry_a - 98.5), balance / entry_a)
+    # B is opened before A's first fill: sized off the balance after A's entry
+    # fee, and capped at what A does not hold
+    balance_after_a_fee = balance - entry_a * qty_a * fee
+    entry_b = 50 * (1 - slip)
+    qty_b = min(balance_after_a_fee * 0.01 / (53 - entry_b), (balance_after_a_fee - entry_a * qty_a) / entry_b)
+
+    def fill(entry, qty, price, side):
+        return (price - entry) * qty * side - price * qty * fee
+
+    pnl_a = (-entry_a * qty_a * fee + fill(entry_a, qty_a * 0.5, 101, 1) + fill(entry_a, qty_a * 0.25, 102, 1)
+             + fill(entry_a, qty_a * 0.25, 98.5 * (1 - slip), 1))
+    pnl_b = (-entry_b * qty_b * fee + fill(entry_b, qty_b * 0.5, 48, -1) + fill(entry_b, qty_b * 0.25, 46, -1)
+             + fill(entry_b, qty_b * 0.25, 44, -1))
+
+    assert result['trades'] == 2
+    assert result['tp_hits'] == [2, 2, 1]
+    assert result['stopped'] == 1
+    assert result['open_positions'] == 0
+    assert abs(result['final_balance'] - (1000 + pnl_a + pnl_b)) < 1e-9
+    outcomes = {t['symbol']: (t['outcome'], t['tps_hit']) for t in result['recent_trades']}
+    assert outcomes == {"A": ("SL", 2), "B": ("TP3", 3)}
+
+def test_same_bar_signals_share_the_balance_and_drawdown_is_marked():
+    fee, slip = 0.001, 0.0005
+    # Three symbols signal on the same bar, each would risk 1% with 65% of the balance
+    script = {(symbol, 1): (True, 1.0) for symbol in "ABC"}
+    bt = ScriptedBacktester(script, initial_balance=1000, risk_per_trade=0.01, fee_rate=fee, slippage=slip)
+    feed = [(START, symbol, 0, 100.5, 99.5, 100.0, 0) for symbol in "ABC"]
+    # All drop without touching the SL (98.5), then recover
+    feed += [(START + HOUR, symbol, 0, 100.0, 98.8, 99.0, 0) for symbol in "ABC"]
+    feed += [(START + 2 * HOUR, symbol, 0, 100.6, 99.0, 100.5, 0) for symbol in "ABC"]
+    result = bt.run(feed)
+
+    # No leverage: C finds nothing left to commit
+    assert sorted(bt.positions) == ["A", "B"]
+    entry = 100 * (1 + slip)
+    assert sum(p.entry * p.qty for p in bt.positions.values()) <= 1000
+    qty = sum(p.qty for p in bt.positions.values())
+
+    # No trade closed, the drawdown is the open loss at the low point
+    assert result['trades'] == 0
+    lowest = bt.balance + (99.0 - entry) * qty
+    assert abs(result['max_drawdown'] - (1000 - lowest) / 1000) < 1e-12
+    assert abs(result['equity'] - (bt.balance + (100.5 - entry) * qty)) < 1e-9
+
+def test_max_positions_and_bounded_memory(tmp_path):
+    store = CandleStore(str(tmp_path))
+    symbols = [f"COIN{i}/USDT" for i in range(40)]
+    for i, symbol in enumerate(symbols):
+        store.append("fake", symbol, "1h", generate_ohlcv(3000, seed=i, start=START))
+
+    bt = PortfolioBacktester(max_positions=3, keep_trades=10)
+    tracemalloc.start()
+    result = bt.run(candle_feed(store, "fake", symbols, "1h", chunk=256))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert result['candles'] == 40 * 3000
+    assert result['trades'] > 10 and len(result['recent_trades']) == 10
+    assert result['open_positions'] <= 3
+    # 120k candles pass through, far less than that is ever held at once
+    assert peak < 8 * 1024 * 1024
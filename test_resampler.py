@@ -0,0 +1,97 @@
+import asyncio
+import numpy as np
+import ccxt.async_support as ccxt
+from config import Config
+from app.services.market_data import MarketDataService
+from app.services.resampler import resample
+from app.testing.synthetic import generate_ohlcv
+
+MINUTE = 60 * 1000
+
+def reference(rows, timeframe_ms):
+    # Plain loop aggregation of [timestamp, open, high, low, close, volume] rows
+    out = []
+    for ts, o, h, l, c, v in rows:
+        bucket = ts // timeframe_ms * timeframe_ms
+        if out and out[-1][0] == bucket:
+            last = out[-1]
+            last[2] = max(last[2], h)
+            last[3] = min(last[3], l)
+            last[4] = c
+            last[5] += v
+        else:
+            out.append([bucket, o, h, l, c, v])
+    return out
+
+class MinuteExchange:
+    # One seeded 1m history, every other timeframe is aggregated from it
+    # like a real exchange would, up to the current clock
+    def __init__(self, start, minutes):
+        self.id = 'minute'
+        self.rateLimit = 1
+        self.rows = generate_ohlcv(minutes, seed=3, start=start, timeframe_ms=MINUTE)
+        self.now = start
+        self.calls = []
+
+    def parse_timeframe(self, timeframe):
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def milliseconds(self):
+        return self.now
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append(timeframe)
+        rows = [list(r) for r in self.rows if r[0] <= self.now]
+        if timeframe != '1m':
+            rows = reference(rows, self.parse_timeframe(timeframe) * 1000)
+        return rows[-limit:]
+
+    async def close(self):
+        pass
+
+def test_resample_matches_reference():
+    rows = generate_ohlcv(1000, seed=5, start=1_700_000_000_000, timeframe_ms=MINUTE)
+    for minutes in (5, 15, 60, 240):
+        expected = np.array(reference([list(r) for r in rows], minutes * MINUTE))
+        assert np.allclose(resample(np.array(rows), minutes * MINUTE), expected)
+
+def test_timeframes_are_built_from_one_base_feed(monkeypatch):
+    monkeypatch.setattr(Config, "BASE_TIMEFRAME", "1m")
+    monkeypatch.setattr(Config, "BASE_LIMIT", 300)
+    day = 24 * 60 * MINUTE
+    exchange = MinuteExchange(1_700_000_000_000 // day * day, 3 * 24 * 60)
+    service = MarketDataService(exchange)
+    timeframes = ['5m', '15m', '1h', '4h']
+    # 300 base candles cannot hold a forming 1d candle: fetched, not resampled
+    assert service.resamples('4h') and not service.resamples('1d')
+
+    def expected(timeframe, limit):
+        rows = [list(r) for r in exchange.rows if r[0] <= exchange.now]
+        return np.array(reference(rows, exchange.parse_timeframe(timeframe) * 1000)[-limit:])
+
+    async def fetch_all():
+        windows = await asyncio.gather(*(service.fetch_candles("BTC/USDT", tf, 50) for tf in timeframes))
+        for tf, candles in zip(timeframes, windows):
+            got = np.column_stack([candles.timestamp, candles.open, candles.high, candles.low, candles.close, candles.volume])
+            assert np.allclose(got, expected(tf, 50)), tf
+
+    async def scenario():
+        # First call: one base fetch plus one seed per timeframe
+        exchange.now += 2 * day + 7 * MINUTE + MINUTE // 2
+        await fetch_all()
+        assert sorted(exchange.calls) == sorted(['1m'] + timeframes)
+
+        # Afterwards every tick is a single 1m fetch, across a 4h boundary too
+        for step in (1, 14, 45, 131, 3):
+            exchange.calls.clear()
+            exchange.now += step * MINUTE
+            await fetch_all()
+            assert exchange.calls == ['1m']
+
+        # Falling behind the base window re-seeds instead of leaving a gap
+        exchange.calls.clear()
+        exchange.now += 400 * MINUTE
+        await fetch_all()
+        assert sorted(exchange.calls) == sorted(['1m'] + timeframes)
+
+    asyncio.run(scenario())
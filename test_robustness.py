@@ -0,0 +1,92 @@
+import asyncio
+import time
+import numpy as np
+import backtest
+from config import Config
+from app.services.optimizer import build_grid
+from app.services.robustness import walk_forward_splits, walk_forward, monte_carlo
+from app.testing.fake_exchange import FakeExchange
+from app.testing.synthetic import generate_dataframe
+
+def test_splits():
+    assert walk_forward_splits(800, folds=5, train_ratio=3) == [
+        (0, 300, 400), (100, 400, 500), (200, 500, 600), (300, 600, 700), (400, 700, 800),
+    ]
+    assert [s[0] for s in walk_forward_splits(800, folds=5, train_ratio=3, anchored=True)] == [0] * 5
+    assert walk_forward_splits(3, folds=5) == []
+
+def test_walk_forward_picks_in_sample_best_without_lookahead():
+    df = generate_dataframe(3000, seed=4)
+    grid = build_grid(rsi_oversold=[25, 35], atr_multiplier=[1.0, 2.0])
+    result = walk_forward(df, grid, folds=4, train_ratio=2)
+    assert len(result['folds']) == 4 and result['test_trades'] > 0
+    assert result['test_pnl'] == sum(r['test_pnl'] for r in result['folds'])
+    assert len(result['test_trade_pnl']) == result['test_trades']
+
+    # The chosen set had the best training PnL of the grid
+    fold = result['folds'][1]
+    for params in grid:
+        alone = walk_forward(df, [params], folds=4, train_ratio=2)['folds'][1]
+        assert alone['train_pnl'] <= fold['train_pnl']
+
+    # Changing candles after a fold's test window does not change that fold
+    test_end = walk_forward_splits(len(df), 4, 2)[0][2]
+    changed = df.copy()
+    changed.loc[test_end:, ['high', 'low', 'close']] *= 1.5
+    assert walk_forward(changed, grid, folds=4, train_ratio=2)['folds'][0] == result['folds'][0]
+
+def test_monte_carlo_matches_reference():
+    pnl = np.array([15.0, -10.0, 15.0, -10.0, -10.0, 20.0, -10.0])
+    mc = monte_carlo(pnl, initial_balance=100, resamples=50, seed=7, points=3)
+
+    # Same draws, one curve at a time
+    idx = np.random.default_rng(7).integers(0, len(pnl), size=(50, len(pnl)))
+    equity = np.hstack([np.full((50, 1), 100.0), 100 + np.cumsum(pnl[idx], axis=1)])
+    drawdown = (np.maximum.accumulate(equity, axis=1) - equity).max(axis=1)
+    assert mc['final_balance'][50] == np.percentile(equity[:, -1], 50)
+    assert mc['max_drawdown'][95] == np.percentile(drawdown, 95)
+    assert mc['prob_loss'] == (equity[:, -1] < 100).mean()
+    assert mc['steps'].tolist() == [0, 2, 5, 7]
+    np.testing.assert_allclose(mc['bands'][50], np.percentile(equity[:, [0, 2, 5, 7]], 50, axis=0), rtol=1e-6)
+
+def test_monte_carlo_scale(monkeypatch):
+    # Several chunks: the bound on memory, not on the number of curves
+    monkeypatch.setattr(Config, "MONTE_CARLO_CHUNK", 1 << 20)
+    pnl = np.random.default_rng(0).choice([-10.0, 15.0], size=300)
+    started = time.perf_counter()
+    mc = monte_carlo(pnl, initial_balance=1000, resamples=200_000, seed=1)
+    assert time.perf_counter() - started < 30
+    assert mc['resamples'] == 200_000
+    # The median curve ends near the expected balance
+    assert abs(mc['final_balance'][50] - (1000 + pnl.sum())) < 3 * 12.5 * np.sqrt(300)
+    assert mc['bands'][5][-1] < mc['bands'][50][-1] < mc['bands'][95][-1]
+    assert monte_carlo([], resamples=10) is None
+
+class FrameStore:
+    # Serves one DataFrame as the synced history
+    def __init__(self, df):
+        self.df = df
+
+    async def load_dataframe(self, market_service, symbol, since=None):
+        return self.df
+
+class ClockOnly:
+    exchange = FakeExchange()
+
+def test_robustness_bootstraps_out_of_sample_trades(monkeypatch):
+    monkeypatch.setattr(backtest, "WALK_FORWARD_GRID", {'rsi_oversold': [25, 35], 'atr_multiplier': [1.0, 2.0]})
+    resampled = []
+    real = backtest.monte_carlo
+
+    def spy(pnl, **kwargs):
+        resampled.append(np.asarray(pnl))
+        return real(pnl, **kwargs)
+
+    monkeypatch.setattr(backtest, "monte_carlo", spy)
+    store = FrameStore(generate_dataframe(3000, seed=4))
+    result = asyncio.run(backtest.run_robustness("BTC/USDT", market_service=ClockOnly(), store=store, resamples=100, seed=1))
+
+    wf = result['walk_forward']
+    assert len(resampled) == 1 and wf['test_trades'] > 0
+    assert np.array_equal(resampled[0], wf['test_trade_pnl'])
+    assert result['monte_carlo']['trades'] == wf['test_trades']
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+from config import Config
+from app.services.analysis_pool import AnalysisPool
+from app.services.candles import Candles
+from app.services.market_data import MarketDataService
+from app.services.scanner import ScannerService
+from app.services.signal_analysis import SignalAnalysisService
+from app.services.signal_store import SignalStore
+from app.testing.fake_exchange import FakeExchange
+from app.testing.fake_bot import FakeBot
+from app.testing.synthetic import generate_ohlcv
+
+def test_concurrent_pass_with_rate_limit(monkeypatch):
+    monkeypatch.setattr(Config, "ADMIN_ID", 1)
+    monkeypatch.setattr(Config, "RATE_LIMIT_PER_SECOND", 400.0)
+    monkeypatch.setattr(Config, "RATE_LIMIT_BACKOFF", 0.05)
+    monkeypatch.setattr(Config, "TELEGRAM_CHAT_RATE", 100.0)
+
+    symbols = [f"COIN{i}/USDT" for i in range(300)]
+    # The exchange allows less than the limiter's burst, so some requests get 429s
+    exchange = FakeExchange(symbols, history=200, latency=0.02, max_requests=8, window=0.05)
+    scanner = ScannerService(FakeBot(), MarketDataService(exchange))
+
+    async def run():
+        signals = await scanner.scan_pass(symbols, concurrency=20)
+        await scanner.notifier.join()
+        return signals
+
+    started = time.monotonic()
+    signals = asyncio.run(run())
+    elapsed = time.monotonic() - started
+
+    assert exchange.rate_limited > 0
+    # Every symbol was eventually fetched despite the 429s
+    assert exchange.calls['fetch_ohlcv'] == 300 + exchange.rate_limited
+    assert 1 < exchange.max_in_flight <= 20
+    # One digest (split by Telegram's size limit), not a message per signal
+    assert 0 < len(scanner.bot.sent) < len(signals)
+    delivered = "".join(text for _, text in scanner.bot.sent)
+    assert all(signal['symbol'] in delivered for signal in signals)
+    assert elapsed < 10
+
+def test_streaming_needs_a_kline_stream():
+    # The stream speaks Binance: any other exchange stays on REST scans
+    scanner = ScannerService(FakeBot(), MarketDataService(FakeExchange(["BTC/USDT"], exchange_id='bybit')))
+
+    async def run():
+        streaming = await scanner.start_streaming(["BTC/USDT"], ['1m'])
+        await scanner.stop()
+        return streaming
+
+    assert asyncio.run(run()) is False
+    assert scanner.market_service.stream is None and not scanner.streaming
+
+class BlockingStore(SignalStore):
+    # record() waits in its worker thread until released
+    def __init__(self):
+        super().__init__(':memory:')
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def record(self, *args, **kwargs):
+        self.entered.set()
+        self.release.wait(5)
+        return super().record(*args, **kwargs)
+
+def test_stream_signal_queued_during_a_flush_is_sent(monkeypatch):
+    monkeypatch.setattr(Config, "ADMIN_ID", 1)
+    monkeypatch.setattr(Config, "STREAM_DIGEST_DELAY", 0.01)
+    store = BlockingStore()
+    scanner = ScannerService(FakeBot(), MarketDataService(FakeExchange()), signal_store=store)
+
+    def signal(symbol):
+        found = SignalAnalysisService.build_signal(symbol, 100.0, 2.0, 10.0, datetime(2024, 1, 1))
+        found['timeframe'] = '1m'
+        return found
+
+    async def run():
+        scanner._queue_stream_signal(signal("A/USDT"), 0)
+        while not store.entered.is_set():
+            await asyncio.sleep(0.01)
+        # Arrives while the first flush is blocked in the store
+        scanner._queue_stream_signal(signal("B/USDT"), 0)
+        store.release.set()
+        await scanner._flush_task
+        await scanner.notifier.join()
+        await scanner.stop()
+
+    asyncio.run(run())
+    assert scanner._stream_signals == []
+    delivered = "".join(text for _, text in scanner.bot.sent)
+    assert "A/USDT" in delivered and "B/USDT" in delivered
+
+def test_process_and_thread_analysis_give_the_same_signals():
+    candles = Candles.from_ohlcv(generate_ohlcv(300, seed=3))
+
+    async def run(mode):
+        pool = AnalysisPool(mode, workers=1)
+        scanner = ScannerService(FakeBot(), MarketDataService(FakeExchange()), analysis_pool=pool)
+        signals = []
+        # A sliding window that only ever holds the last 100 candles, each asked twice
+        for end in range(100, 300):
+            for _ in range(2):
+                signals.append(await scanner.evaluate("BTC/USDT", "1h", candles[end - 100:end], exchange='fake'))
+        stats = scanner.indicators.stats()
+        pool.shutdown()
+        await scanner.stop()
+        return signals, stats
+
+    thread_signals, thread_stats = asyncio.run(run('thread'))
+    process_signals, process_stats = asyncio.run(run('process'))
+    # Workers fold the cached history too, not just the window
+    assert process_signals == thread_signals
+    assert any(signal is not None for signal in thread_signals)
+    assert process_stats == thread_stats
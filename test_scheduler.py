@@ -0,0 +1,82 @@
+import asyncio
+from config import Config
+from app.services.scheduler import CandleCloseScheduler
+from app.services.market_data import MarketDataService
+from app.services.scanner import ScannerService
+from app.services.signal_analysis import SignalAnalysisService
+from app.services.candles import Candles
+from app.testing.fake_exchange import FakeExchange
+from app.testing.fake_bot import FakeBot
+
+MINUTE = 60 * 1000
+HOUR = 60 * MINUTE
+
+class FakeClock:
+    # Exchange clock that only moves when the scheduler sleeps (or the test says so)
+    def __init__(self, now):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += int(seconds * 1000)
+
+def test_ticks_follow_candle_closes():
+    start = 1_700_000_000_000 // HOUR * HOUR
+    clock = FakeClock(start + 20 * MINUTE)
+    scheduler = CandleCloseScheduler(['15m', '1h'], clock, delay=3, jitter=1, sleep=clock.sleep)
+
+    async def collect(n, stall_at=None):
+        ticks = []
+        async for closes in scheduler.ticks():
+            ticks.append((clock.now, closes))
+            if len(ticks) == stall_at:
+                # The consumer hangs for 50 minutes
+                clock.now += 50 * MINUTE
+            if len(ticks) == n:
+                return ticks
+
+    ticks = asyncio.run(collect(4))
+    # 15m closes at :30, :45, :00 (together with 1h), :15
+    assert [closes for _, closes in ticks] == [
+        {'15m': start + 30 * MINUTE},
+        {'15m': start + 45 * MINUTE},
+        {'15m': start + HOUR, '1h': start + HOUR},
+        {'15m': start + HOUR + 15 * MINUTE},
+    ]
+    # Each tick is 3-4s after its close, never on a forming candle
+    for woke, closes in ticks:
+        assert all(3000 <= woke - close <= 4000 for close in closes.values())
+
+    # After a stall the missed 15m closes are skipped, not replayed
+    ticks = asyncio.run(collect(2, stall_at=1))
+    assert ticks[0][1] == {'15m': start + HOUR + 30 * MINUTE}
+    assert ticks[1][1] == {'15m': start + 2 * HOUR + 15 * MINUTE, '1h': start + 2 * HOUR}
+
+def test_scheduled_scan_evaluates_the_closed_candle(monkeypatch):
+    monkeypatch.setattr(Config, "ADMIN_ID", 1)
+    start = 1_700_000_000_000 // HOUR * HOUR
+    # Three seconds into a new candle
+    exchange = FakeExchange(history=200, now=start + 3000)
+    symbols = [f"COIN{i}/USDT" for i in range(40)]
+    scanner = ScannerService(FakeBot(), MarketDataService(exchange))
+
+    async def run():
+        signals = await scanner.scan_pass(symbols, closes={'1h': start})
+        await scanner.notifier.close(timeout=0)
+        return signals
+
+    signals = asyncio.run(run())
+
+    expected = []
+    for symbol in symbols:
+        # The fetched window minus the candle that opened at `start`
+        closed = Candles.from_ohlcv(exchange.candles(symbol, '1h')[-100:-1])
+        signal = SignalAnalysisService.generate_signal_from_candles(symbol, closed)
+        if signal and "error" not in signal:
+            expected.append((symbol, signal['entry']))
+    assert [(s['symbol'], s['entry']) for s in signals] == expected
+    assert len(expected) > 0
@@ -0,0 +1,59 @@
+import time
+import numpy as np
+import pandas as pd
+from app.services import signal_analysis
+from app.services.signal_analysis import SignalAnalysisService
+from app.services.candles import Candles
+from app.testing.synthetic import generate_ohlcv
+
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def test_batch_matches_generate_signal(monkeypatch):
+    monkeypatch.setattr(signal_analysis, "HAS_PANDAS_TA", False)
+    n_symbols, n_bars = 200, 100
+    symbols = [f"COIN{i}/USDT" for i in range(n_symbols)]
+    frames = [pd.DataFrame(generate_ohlcv(n_bars, seed=i), columns=COLUMNS) for i in range(n_symbols)]
+
+    # One symbol with a short history, left-padded with NaN in the batch
+    frames[1] = frames[1].iloc[70:].reset_index(drop=True)
+    # And one that is too short for the indicators
+    frames[2] = frames[2].iloc[99:].reset_index(drop=True)
+
+    def block(column):
+        out = np.full((n_symbols, n_bars), np.nan)
+        for i, df in enumerate(frames):
+            out[i, n_bars - len(df):] = df[column].to_numpy()
+        return out
+
+    timestamps = frames[0]['timestamp'].to_numpy()
+    batch = SignalAnalysisService.generate_signals_batch(symbols, block('high'), block('low'), block('close'), timestamps)
+
+    found = 0
+    for symbol, df, result in zip(symbols, frames, batch):
+        expected = SignalAnalysisService.generate_signal(symbol, df.copy())
+        if expected is None or "error" in expected:
+            assert result == expected, symbol
+            continue
+        found += 1
+        assert result['direction'] == expected['direction']
+        for key in ['entry', 'sl', 'atr', 'rsi']:
+            assert np.isclose(result[key], expected[key], rtol=1e-12), (symbol, key)
+        np.testing.assert_allclose(result['tps'], expected['tps'], rtol=1e-12)
+        assert result['timestamp'] == timestamps[-1]
+    assert found > 0
+
+def test_batch_is_fast():
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (1000, 100)), axis=1))
+    symbols = [f"COIN{i}/USDT" for i in range(1000)]
+
+    started = time.perf_counter()
+    SignalAnalysisService.generate_signals_batch(symbols, close * 1.01, close * 0.99, close)
+    assert time.perf_counter() - started < 0.5
+
+def test_candles_path_matches_dataframe(monkeypatch):
+    monkeypatch.setattr(signal_analysis, "HAS_PANDAS_TA", False)
+    for seed in range(20):
+        candles = Candles.from_ohlcv(generate_ohlcv(100, seed=seed))
+        df = candles.to_dataframe()
+        assert SignalAnalysisService.generate_signal("BTC/USDT", candles) == SignalAnalysisService.generate_signal("BTC/USDT", df)
@@ -0,0 +1,103 @@
+import asyncio
+import sqlite3
+from datetime import datetime
+from config import Config
+from app.services.market_data import MarketDataService
+from app.services.signal_store import SignalStore
+from app.services.signal_monitor import SignalMonitor
+from app.services.notifier import NotificationService
+from app.testing.fake_exchange import FakeExchange
+from app.testing.fake_bot import FakeBot
+
+HOUR = 60 * 60 * 1000
+
+def make_signal(symbol, direction="LONG", entry=100.0):
+    side = 1 if direction == "LONG" else -1
+    return {
+        "symbol": symbol, "direction": direction, "entry": entry, "sl": entry - side * 3,
+        "tps": [entry + side * 2, entry + side * 4, entry + side * 6], "atr": 2.0, "rsi": 25.0,
+        "timestamp": datetime(2024, 1, 1, 12),
+    }
+
+def test_duplicates_are_suppressed_across_restarts(tmp_path):
+    path = str(tmp_path / "signals.db")
+    store = SignalStore(path)
+    assert store.record(make_signal("BTC/USDT"), "fake") is not None
+    assert store.record(make_signal("BTC/USDT", "SHORT"), "fake") is not None
+    store.close()
+
+    # A restart does not forget what is still open
+    store = SignalStore(path)
+    assert store.record(make_signal("BTC/USDT"), "fake") is None
+    assert store.record(make_signal("BTC/USDT"), "other") is not None
+
+    # Once the open LONG closes a new one may go out
+    (long_id, *_), = [row for row in store.open_signals("fake") if row[2] == "LONG"]
+    store.update([(long_id, 0, 'sl', 97.0, 0)])
+    assert store.record(make_signal("BTC/USDT"), "fake") is not None
+
+def test_monitor_tracks_thousands_with_one_request_per_tick(monkeypatch):
+    monkeypatch.setattr(Config, "TELEGRAM_CHAT_RATE", 100.0)
+    symbols = [f"COIN{i}/USDT" for i in range(2000)]
+    exchange = FakeExchange(symbols, now=1_700_000_000_000)
+    market_service = MarketDataService(exchange)
+    store = SignalStore(":memory:")
+    bot = FakeBot()
+    notifier = NotificationService(bot, subscribers=[1])
+    monitor = SignalMonitor(market_service, store, notifier)
+
+    now = exchange.milliseconds()
+    for i, symbol in enumerate(symbols):
+        store.record(make_signal(symbol, "LONG" if i % 2 == 0 else "SHORT"), "fake", now=now)
+        exchange.prices[symbol] = 100.0
+
+    async def run():
+        assert await monitor.check() == []
+
+        # COIN0 LONG reaches TP2, COIN1 SHORT is stopped out, COIN2 LONG reaches TP1
+        exchange.prices.update({"COIN0/USDT": 104.5, "COIN1/USDT": 103.0, "COIN2/USDT": 102.0})
+        first = await monitor.check()
+
+        # COIN2 falls back to its SL after TP1, COIN0 reaches TP3
+        exchange.prices.update({"COIN0/USDT": 106.0, "COIN2/USDT": 96.0})
+        second = await monitor.check()
+
+        # Everything else expires
+        exchange.now = now + Config.SIGNAL_MAX_AGE_HOURS * HOUR
+        third = await monitor.check()
+        await notifier.join()
+        await notifier.close()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+
+    assert exchange.calls['fetch_tickers'] == 4
+    assert exchange.calls['fetch_ohlcv'] == 0
+    assert [(e['symbol'], e['event']) for e in first] == [("COIN0/USDT", "TP2"), ("COIN1/USDT", "SL"), ("COIN2/USDT", "TP1")]
+    assert [(e['symbol'], e['event'], e['hit_tp']) for e in second] == [("COIN0/USDT", "TP3", 3), ("COIN2/USDT", "SL", 1)]
+    assert len(third) == 1997 and all(e['event'] == "EXPIRED" for e in third)
+    assert store.open_signals("fake") == []
+    assert "COIN1/USDT" in bot.sent[0][1] and "stopped out" in bot.sent[0][1]
+
+def test_invalid_signals_are_errors_not_duplicates():
+    store = SignalStore(':memory:')
+    broken = make_signal("BTC/USDT")
+    broken['sl'] = float('nan')
+    try:
+        store.record(broken, "fake")
+        raised = False
+    except sqlite3.IntegrityError:
+        raised = True
+    assert raised
+    broken['sl'] = None
+    try:
+        store.record(broken, "fake")
+        raised = False
+    except sqlite3.IntegrityError:
+        raised = True
+    assert raised
+
+    # Nothing was stored, the valid signal still goes out, from a worker thread too
+    assert asyncio.run(asyncio.to_thread(store.record, make_signal("BTC/USDT"), "fake")) is not None
+    assert store.record(make_signal("BTC/USDT"), "fake") is None
+    assert len(store.open_signals("fake")) == 1
@@ -0,0 +1,115 @@
+import asyncio
+import time
+import ccxt.async_support as ccxt
+from config import Config
+from app.services.market_data import MarketDataService
+from app.services.streaming import stream_name
+from app.testing.fake_kline_server import FakeKlineServer
+from app.testing.synthetic import generate_ohlcv
+
+MINUTE = 60 * 1000
+
+class ClockedExchange:
+    # REST side: a fixed 1m history, served only up to the current clock
+    def __init__(self, symbols, start, minutes):
+        self.id = 'binance'
+        self.rateLimit = 1
+        self.rows = {s: generate_ohlcv(minutes, seed=i, start=start, timeframe_ms=MINUTE) for i, s in enumerate(symbols)}
+        self.now = start
+        self.calls = 0
+        # Largest page the exchange returns
+        self.max_limit = None
+
+    def parse_timeframe(self, timeframe):
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def milliseconds(self):
+        return self.now
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls += 1
+        if self.max_limit is not None:
+            limit = min(limit, self.max_limit)
+        rows = [list(r) for r in self.rows[symbol] if r[0] <= self.now and (since is None or r[0] >= since)]
+        return rows[:limit] if since is not None else rows[-limit:]
+
+    async def close(self):
+        pass
+
+async def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_stream_windows_reconnect_and_gap_fill(monkeypatch):
+    monkeypatch.setattr(Config, "STREAM_RECONNECT_DELAY", 0.05)
+    symbols = ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
+    start = 1_700_000_000_000 // MINUTE * MINUTE
+    exchange = ClockedExchange(symbols, start, 400)
+    service = MarketDataService(exchange)
+    # Row 200 is forming
+    exchange.now = start + 200 * MINUTE + MINUTE // 2
+
+    closes = []
+
+    async def on_close(symbol, timeframe):
+        closes.append((symbol, int(service.stream.candles(symbol, timeframe, forming=False).timestamp[-1])))
+
+    def window_matches(symbol, last_row):
+        candles = service.stream.candles(symbol, '1m', 100, forming=False)
+        expected = exchange.rows[symbol][last_row - 99:last_row + 1]
+        return [list(r) for r in zip(candles.timestamp.tolist(), candles.close.tolist())] == [[r[0], r[4]] for r in expected]
+
+    async def scenario():
+        server = await FakeKlineServer().start()
+        monkeypatch.setattr(Config, "STREAM_URL", server.url)
+        # Two streams per connection: the three symbols need two connections
+        monkeypatch.setattr(Config, "STREAM_MAX_PER_CONNECTION", 2)
+        try:
+            await service.start_stream(symbols, ['1m'], on_close)
+            await wait_until(lambda: len(server.connections) == 2)
+            assert exchange.calls == 3
+            assert all(window_matches(s, 199) for s in symbols)
+
+            # Forming updates do not close anything, the final one does
+            for symbol in symbols:
+                row = exchange.rows[symbol][200]
+                await server.push(stream_name(symbol, '1m'), row, False)
+                await server.push(stream_name(symbol, '1m'), row, True)
+            await wait_until(lambda: len(closes) == 3)
+            assert sorted(closes) == sorted((s, start + 200 * MINUTE) for s in symbols)
+            assert all(window_matches(s, 200) for s in symbols)
+
+            # While reading from the stream, fetch_candles costs no request
+            calls = exchange.calls
+            await service.fetch_candles("BTC/USDT", '1m', 50)
+            assert exchange.calls == calls
+
+            # Connections drop while four candles close: recovered over REST
+            closes.clear()
+            exchange.now = start + 205 * MINUTE + 10
+            await server.drop()
+            await wait_until(lambda: len(server.connections) == 2 and len(closes) == 3)
+            assert sorted(closes) == sorted((s, start + 204 * MINUTE) for s in symbols)
+            assert all(window_matches(s, 204) for s in symbols)
+
+            # A close skipped by the stream itself is fetched before the next one
+            closes.clear()
+            exchange.now = start + 207 * MINUTE + 10
+            await server.push(stream_name("BTC/USDT", '1m'), exchange.rows["BTC/USDT"][206], True)
+            await wait_until(lambda: len(closes) == 1)
+            assert window_matches("BTC/USDT", 206)
+
+            # An outage longer than the window, with pages smaller than it
+            closes.clear()
+            exchange.now = start + 360 * MINUTE + 10
+            exchange.max_limit = 30
+            await server.drop()
+            await wait_until(lambda: len(server.connections) == 2 and len(closes) == 3)
+            assert all(window_matches(s, 359) for s in symbols)
+        finally:
+            await service.close()
+            await server.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+import asyncio
+from app.services.market_data import MarketDataService
+from app.services.scanner import ScannerService
+from app.services.universe import UniverseScreener
+from app.testing.fake_bot import FakeBot
+from app.testing.fake_exchange import FakeExchange
+
+def ticker(last, high, low, change, volume):
+    return {'last': last, 'high': high, 'low': low, 'percentage': change, 'quoteVolume': volume}
+
+def test_screen_filters_and_ranks():
+    tickers = {
+        "A/USDT": ticker(10, 11, 9, 1.0, 1e7),      # range 22%
+        "B/USDT": ticker(10, 10.2, 9.9, 5.0, 1e7),  # range 3%, moved 5%
+        "C/USDT": ticker(10, 12, 9, 1.0, 1e3),      # too illiquid
+        "D/USDT": ticker(10, 10.1, 9.9, 0.5, 1e8),  # liquid but flat
+        "E/BTC": ticker(10, 15, 9, 20.0, 1e9),      # other quote
+        "F/USDT": {'last': 10, 'high': 13, 'low': 10, 'percentage': None, 'baseVolume': 2e6},  # range 30%
+        "G/USDT": {'last': 10},                     # no 24h stats
+    }
+    ranked = UniverseScreener.screen(tickers, "USDT", 1e6, 0.04, 0.03)
+    assert ranked == ["F/USDT", "A/USDT", "B/USDT"]
+
+    screener = UniverseScreener(None, tiers=[(2, 1), (3, 3)], pinned=["BTC/USDT"])
+    tiers = screener.assign(["A/USDT", "BTC/USDT", "B/USDT", "C/USDT", "D/USDT", "E/USDT"])
+    assert tiers == [["BTC/USDT", "A/USDT"], ["B/USDT", "C/USDT", "D/USDT"]]
+    screener.tiers = tiers
+    assert screener.due(0) == tiers[0] + tiers[1]
+    assert screener.due(1) == screener.due(2) == tiers[0]
+    assert screener.due(3) == tiers[0] + tiers[1]
+
+def test_shortlist_scan_costs_one_ticker_call():
+    symbols = [f"COIN{i}/USDT" for i in range(300)]
+    exchange = FakeExchange(symbols=symbols, rateLimit=1)
+    market = MarketDataService(exchange)
+    scanner = ScannerService(FakeBot(), market)
+    # Thresholds low enough for the synthetic tickers, the tiers cap the shortlist
+    screener = UniverseScreener(market, min_volume=0, min_range=0.01, min_move=0.01,
+                                tiers=[(10, 1), (20, 2)], pinned=[])
+
+    async def run():
+        for tick in range(4):
+            await screener.refresh()
+            await scanner.scan_pass(screener.due(tick), timeframes=["1h"])
+        await scanner.stop()
+
+    asyncio.run(run())
+    assert screener.universe == 300
+    assert exchange.calls['fetch_tickers'] == 4
+    # The first tier on every tick, the second on every other one, the cache
+    # serves repeats within the same candle
+    scanned = set(screener.tiers[0]) | set(screener.tiers[1])
+    assert exchange.calls['fetch_ohlcv'] == len(scanned) <= 30